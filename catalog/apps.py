@@ -1,6 +1,10 @@
 from django.apps import AppConfig
+import importlib
 
 
 class CatalogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'catalog'
+
+    def ready(self):
+        importlib.import_module('catalog.signals')  # Index de recherche
@@ -0,0 +1,125 @@
+"""
+Import / export NDJSON (un composant JSON par ligne) du catalogue.
+
+L'import lit le flux ligne à ligne, valide chaque ligne avec
+`ComponentSerializer` et insère par lots (`bulk_create`, une transaction
+par lot). L'export parcourt les composants avec `.iterator()` : la
+mémoire reste constante quelle que soit la taille du catalogue.
+"""
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from .cache import bump_catalog_version_on_commit
+from .models import CatalogFacetCount, Component
+from .search import index_components
+from .serializers import ComponentSerializer
+
+IMPORT_BATCH_SIZE = getattr(settings, 'CATALOG_IMPORT_BATCH_SIZE', 500)
+EXPORT_CHUNK_SIZE = getattr(settings, 'CATALOG_EXPORT_CHUNK_SIZE', 500)
+MAX_BATCH_SIZE = 5000
+# Au-delà, les erreurs sont seulement comptées
+MAX_REPORTED_ERRORS = 100
+
+
+def parse_ndjson(lines):
+    """Produit (numéro de ligne, objet ou None, erreur ou None) ; ignore les lignes vides."""
+    for number, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            try:
+                line = line.decode('utf-8')
+            except UnicodeDecodeError:
+                yield number, None, 'Encodage invalide (UTF-8 attendu)'
+                continue
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            payload = json.loads(line)
+        except ValueError as exc:
+            yield number, None, f'JSON invalide : {exc}'
+            continue
+        if not isinstance(payload, dict):
+            yield number, None, 'Objet JSON attendu'
+            continue
+        yield number, payload, None
+
+
+def import_components(lines, user, batch_size=IMPORT_BATCH_SIZE, allow_status=False):
+    """
+    Importe un flux NDJSON pour `user`. Les composants sont créés en
+    brouillon, sauf si `allow_status` (Coach/Admin) et qu'un `status` est fourni.
+
+    Renvoie {'created': int, 'error_count': int, 'errors': [{'line', 'errors'}]}.
+    """
+    batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+    validator = ComponentSerializer()
+    summary = {'created': 0, 'error_count': 0, 'errors': []}
+
+    def report(number, errors):
+        summary['error_count'] += 1
+        if len(summary['errors']) < MAX_REPORTED_ERRORS:
+            summary['errors'].append({'line': number, 'errors': errors})
+
+    rows = parse_ndjson(lines)
+    while True:
+        chunk = list(islice(rows, batch_size))
+        if not chunk:
+            break
+
+        batch = []
+        for number, payload, error in chunk:
+            if error:
+                report(number, error)
+                continue
+            try:
+                data = validator.run_validation(payload)
+            except ValidationError as exc:
+                report(number, exc.detail)
+                continue
+            if not allow_status or 'status' not in payload:
+                data['status'] = 'draft'
+            batch.append(Component(created_by=user, **data))
+
+        if batch:
+            with transaction.atomic():
+                created = Component.objects.bulk_create(batch)
+                # bulk_create n'envoie pas post_save : index, facettes et cache à la main
+                index_components(created)
+                facet_changes = {}
+                for component in created:
+                    key = (component.category, component.status)
+                    facet_changes[key] = facet_changes.get(key, 0) + 1
+                CatalogFacetCount.objects.adjust(facet_changes)
+                bump_catalog_version_on_commit()
+            summary['created'] += len(created)
+
+    return summary
+
+
+def export_components(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Produit une ligne NDJSON (str, avec '\\n') par composant."""
+    components = (
+        queryset
+        .select_related('created_by', 'code_blob')
+        .order_by('id')
+        .iterator(chunk_size=chunk_size)
+    )
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    for component in components:
+        row = {
+            'id': component.id,
+            'name': component.name,
+            'description': component.description,
+            'category': component.category,
+            'code': component.code,
+            'status': component.status,
+            'created_by': component.created_by.email,
+            'created_at': component.created_at,
+            'updated_at': component.updated_at,
+        }
+        yield encoder.encode(row) + '\n'
@@ -0,0 +1,60 @@
+"""
+Cache des réponses de `list_components` et `list_facets` (catalogue public).
+
+Chaque entrée est rangée sous le numéro de version courant du catalogue.
+Toute modification d'un composant incrémente ce numéro (voir
+`catalog.signals`) : les anciennes entrées ne sont plus jamais lues et
+expirent d'elles-mêmes. L'invalidation coûte donc un seul `incr`.
+
+En production, utiliser un cache partagé (Redis) pour que tous les
+workers voient la même version.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+CATALOG_VERSION_KEY = 'catalog:version'
+CATALOG_CACHE_TIMEOUT = getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300)
+
+# Paramètres de requête qui changent la réponse
+CACHE_PARAMS = ('category', 'search', 'ordering', 'cursor', 'page_size')
+FACET_CACHE_PARAMS = ('search',)
+
+
+def get_catalog_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        # Clé absente (premier accès ou éviction) : repartir d'une valeur
+        # horodatée, forcément supérieure aux versions déjà utilisées
+        cache.add(CATALOG_VERSION_KEY, time.time_ns() // 1000, timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    try:
+        return cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        return get_catalog_version()
+
+
+def bump_catalog_version_on_commit():
+    # Après le commit : une requête concurrente ne doit pas remettre en
+    # cache l'état d'avant sous la nouvelle version
+    transaction.on_commit(bump_catalog_version)
+
+
+def catalog_cache_key(request, prefix='catalog:list', params=CACHE_PARAMS):
+    # Les liens `next` / `previous` sont absolus : schéma et hôte font partie
+    # de la réponse (sinon un Host forgé resterait en cache pour tous)
+    parts = [f'{request.scheme}://{request.get_host()}']
+    for name in params:
+        value = request.query_params.get(name) or ''
+        if name == 'category':
+            value = value.upper()
+        parts.append(f'{name}={value}')
+    digest = hashlib.sha1('&'.join(parts).encode()).hexdigest()
+    return f'{prefix}:v{get_catalog_version()}:{digest}'
@@ -0,0 +1,86 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from catalog.models import Component
+from catalog.search import index_components, search_components
+
+User = get_user_model()
+
+WORDS = [
+    'primary', 'secondary', 'ghost', 'outline', 'rounded', 'compact', 'large',
+    'dark', 'light', 'gradient', 'shadow', 'animated', 'sticky', 'responsive',
+    'icon', 'avatar', 'pricing', 'login', 'hero', 'footer', 'stepper', 'tabs',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare la recherche icontains et la recherche plein texte sur un "
+        "catalogue synthétique. Tout est fait dans une transaction annulée."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000)
+        parser.add_argument('--batch-size', type=int, default=2_000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--query', action='append', dest='queries')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        queries = options['queries'] or ['btn', 'primary', 'dark hero', 'stepper animated']
+        categories = [value for value, _ in Component._meta.get_field('category').choices]
+
+        with transaction.atomic():
+            user = User.objects.create_user(
+                email='bench-search@redteamcn.local', username='bench-search', password=None,
+            )
+            self.stdout.write(f"Création de {options['rows']} composants...")
+            started = time.perf_counter()
+            remaining = options['rows']
+            while remaining > 0:
+                size = min(remaining, options['batch_size'])
+                batch = []
+                for _ in range(size):
+                    words = rng.sample(WORDS, 3)
+                    batch.append(Component(
+                        name=' '.join(words[:2]).title(),
+                        description=f"Composant {' '.join(words)} pour le design system",
+                        category=rng.choice(categories),
+                        code=f'<div class="btn-{words[0]} {words[2]}">{words[1]}</div>',
+                        created_by=user,
+                        status='approved',
+                    ))
+                index_components(Component.objects.bulk_create(batch))
+                remaining -= size
+            self.stdout.write(f"  {time.perf_counter() - started:.1f}s")
+
+            base = Component.objects.filter(status='approved')
+            for query in queries:
+                icontains = self._measure(
+                    lambda: list(base.filter(name__icontains=query).order_by('-created_at', '-id')[:20]),
+                    options['repeat'],
+                )
+                fts = self._measure(
+                    lambda: list(search_components(base, query).order_by('-search_rank', '-id')[:20]),
+                    options['repeat'],
+                )
+                self.stdout.write(
+                    f"{query!r:>22}  icontains {icontains:8.2f} ms   plein texte {fts:8.2f} ms"
+                )
+
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def _measure(run, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
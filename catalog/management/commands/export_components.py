@@ -0,0 +1,39 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from catalog.bulk import EXPORT_CHUNK_SIZE, export_components
+from catalog.models import Component
+
+
+class Command(BaseCommand):
+    help = "Exporte les composants en NDJSON (un composant JSON par ligne)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-', help="Fichier de sortie ('-' : sortie standard)")
+        parser.add_argument('--status', action='append', help="Filtrer par statut (répétable)")
+        parser.add_argument('--category')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        components = Component.objects.all()
+        if options['status']:
+            components = components.filter(status__in=options['status'])
+        if options['category']:
+            components = components.filter(category=options['category'].upper())
+
+        lines = export_components(components, chunk_size=options['chunk_size'])
+        if options['path'] == '-':
+            self._write(sys.stdout, lines)
+        else:
+            with open(options['path'], 'w', encoding='utf-8') as stream:
+                count = self._write(stream, lines)
+            self.stderr.write(f"{count} composant(s) exporté(s) dans {options['path']}")
+
+    @staticmethod
+    def _write(stream, lines):
+        count = 0
+        for line in lines:
+            stream.write(line)
+            count += 1
+        return count
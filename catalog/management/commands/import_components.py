@@ -0,0 +1,47 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.bulk import IMPORT_BATCH_SIZE, import_components
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Importe des composants depuis un fichier NDJSON (un composant JSON par ligne)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Fichier NDJSON, ou '-' pour l'entrée standard")
+        parser.add_argument('--user', required=True, help="Email du créateur des composants")
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument(
+            '--keep-status', action='store_true',
+            help="Conserver le champ status des lignes (sinon : draft)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"Utilisateur introuvable : {options['user']}")
+
+        if options['path'] == '-':
+            summary = self._import(sys.stdin, user, options)
+        else:
+            with open(options['path'], 'rb') as stream:
+                summary = self._import(stream, user, options)
+
+        for error in summary['errors']:
+            self.stderr.write(f"ligne {error['line']} : {error['errors']}")
+        self.stdout.write(
+            f"{summary['created']} composant(s) importé(s), {summary['error_count']} ligne(s) en erreur"
+        )
+
+    @staticmethod
+    def _import(stream, user, options):
+        return import_components(
+            stream, user,
+            batch_size=options['batch_size'],
+            allow_status=options['keep_status'],
+        )
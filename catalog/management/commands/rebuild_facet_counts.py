@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from catalog.cache import bump_catalog_version
+from catalog.models import CatalogFacetCount
+
+
+class Command(BaseCommand):
+    help = "Recalcule les compteurs de facettes (catégorie, statut) depuis les composants."
+
+    def handle(self, *args, **options):
+        rows = CatalogFacetCount.objects.rebuild()
+        bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(f"{len(rows)} compteur(s) recalculé(s)"))
@@ -0,0 +1,64 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+SEARCH_TABLE = 'catalog_component_search'
+
+PG_BACKFILL_DOCUMENT = (
+    "setweight(to_tsvector('simple', name), 'A') || "
+    "setweight(to_tsvector('simple', description), 'B') || "
+    "setweight(to_tsvector('simple', left(code, 100000)), 'C')"
+)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE TABLE {SEARCH_TABLE} ("
+            f"component_id bigint PRIMARY KEY "
+            f"REFERENCES catalog_component (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            f"document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX {SEARCH_TABLE}_gin ON {SEARCH_TABLE} USING gin (document)"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (component_id, document) "
+            f"SELECT id, {PG_BACKFILL_DOCUMENT} FROM catalog_component"
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+            f"component_id UNINDEXED, name, description, code, "
+            f"tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, component_id, name, description, code) "
+            f"SELECT id, id, name, description, substr(code, 1, 100000) FROM catalog_component"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('postgresql', 'sqlite'):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0003_alter_component_category'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComponentSearchDocument',
+            fields=[
+                ('component', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_document', serialize=False, to='catalog.component')),
+            ],
+            options={
+                'db_table': 'catalog_component_search',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:58
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def fill_code_fingerprint(apps, schema_editor):
+    Component = apps.get_model('catalog', 'Component')
+    batch = []
+    for component in Component.objects.only('id', 'code').iterator(chunk_size=500):
+        encoded = component.code.encode('utf-8')
+        component.code_size = len(encoded)
+        component.code_hash = hashlib.sha256(encoded).hexdigest()
+        batch.append(component)
+        if len(batch) >= 500:
+            Component.objects.bulk_update(batch, ['code_size', 'code_hash'])
+            batch = []
+    if batch:
+        Component.objects.bulk_update(batch, ['code_size', 'code_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0004_component_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='component',
+            name='code_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='component',
+            name='code_size',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_code_fingerprint, migrations.RunPython.noop),
+    ]
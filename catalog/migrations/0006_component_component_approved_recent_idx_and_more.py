@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_component_code_fingerprint'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='component',
+            index=models.Index(condition=models.Q(('status', 'approved')), fields=['-created_at', '-id'], name='component_approved_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='component',
+            index=models.Index(condition=models.Q(('status', 'approved')), fields=['category', '-created_at', '-id'], name='component_approved_cat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='component',
+            index=models.Index(fields=['created_by', '-created_at', '-id'], name='component_owner_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Étape 1/3 du passage au stockage par blob : schéma seul.
+
+    Schéma, données et contraintes sont dans trois migrations distinctes
+    (une transaction chacune) : sous PostgreSQL, modifier une table qui a
+    des déclencheurs de contraintes en attente dans la même transaction
+    échoue (« pending trigger events »).
+    """
+
+    dependencies = [
+        ('catalog', '0006_component_component_approved_recent_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CodeBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('encoding', models.CharField(choices=[('deflate', 'zlib')], default='deflate', max_length=10)),
+                ('data', models.BinaryField()),
+                ('size', models.PositiveIntegerField()),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='component',
+            name='code_blob',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='components', to='catalog.codeblob'),
+        ),
+        migrations.AlterField(
+            model_name='component',
+            name='code',
+            field=models.TextField(default=''),
+        ),
+    ]
@@ -0,0 +1,45 @@
+import hashlib
+import zlib
+
+from django.db import migrations
+
+
+def move_code_to_blobs(apps, schema_editor):
+    Component = apps.get_model('catalog', 'Component')
+    CodeBlob = apps.get_model('catalog', 'CodeBlob')
+    for component in Component.objects.only('id', 'code').iterator(chunk_size=500):
+        raw = component.code.encode('utf-8')
+        sha256 = hashlib.sha256(raw).hexdigest()
+        blob, created = CodeBlob.objects.get_or_create(
+            sha256=sha256,
+            defaults={
+                'encoding': 'deflate',
+                'data': zlib.compress(raw, 6),
+                'size': len(raw),
+                'ref_count': 0,
+            },
+        )
+        blob.ref_count += 1
+        blob.save(update_fields=['ref_count'])
+        Component.objects.filter(pk=component.pk).update(code_blob=blob, code_size=len(raw))
+
+
+def restore_code_from_blobs(apps, schema_editor):
+    Component = apps.get_model('catalog', 'Component')
+    for component in Component.objects.select_related('code_blob').iterator(chunk_size=500):
+        raw = zlib.decompress(bytes(component.code_blob.data))
+        Component.objects.filter(pk=component.pk).update(
+            code=raw.decode('utf-8'), code_hash=component.code_blob_id,
+        )
+
+
+class Migration(migrations.Migration):
+    """Étape 2/3 : copie du code de chaque composant dans un blob partagé"""
+
+    dependencies = [
+        ('catalog', '0007_codeblob'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_code_to_blobs, restore_code_from_blobs),
+    ]
@@ -0,0 +1,26 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Étape 3/3 : suppression de l'ancienne colonne, blob obligatoire"""
+
+    dependencies = [
+        ('catalog', '0008_move_code_to_blobs'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='component',
+            name='code',
+        ),
+        migrations.RemoveField(
+            model_name='component',
+            name='code_hash',
+        ),
+        migrations.AlterField(
+            model_name='component',
+            name='code_blob',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='components', to='catalog.codeblob'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:08
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_facet_counts(apps, schema_editor):
+    Component = apps.get_model('catalog', 'Component')
+    CatalogFacetCount = apps.get_model('catalog', 'CatalogFacetCount')
+    rows = Component.objects.order_by().values('category', 'status').annotate(total=Count('id'))
+    CatalogFacetCount.objects.bulk_create([
+        CatalogFacetCount(category=row['category'], status=row['status'], count=row['total'])
+        for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0010_component_rating_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogFacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=50)),
+                ('status', models.CharField(max_length=10)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('category', 'status'), name='facet_count_unique')],
+            },
+        ),
+        migrations.RunPython(fill_facet_counts, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,154 @@
-from django.db import models
+import hashlib
+import zlib
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, Count, F, FloatField, Value, When
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.db.models.deletion import ProtectedError
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 User = get_user_model()
 
+# zlib (RFC 1950) = content-coding HTTP `deflate` : servi tel quel au client
+CODE_COMPRESSION_LEVEL = 6
+
+
+class CodeBlobManager(models.Manager):
+    """Stockage adressé par contenu avec comptage de références"""
+
+    @staticmethod
+    def digest(text):
+        raw = text.encode('utf-8')
+        return hashlib.sha256(raw).hexdigest(), raw
+
+    def _new_blob(self, sha256, raw, ref_count):
+        return self.model(
+            sha256=sha256,
+            encoding='deflate',
+            data=zlib.compress(raw, CODE_COMPRESSION_LEVEL),
+            size=len(raw),
+            ref_count=ref_count,
+        )
+
+    def acquire(self, text):
+        """Référence le blob de `text` (créé si besoin) et renvoie sa clé"""
+        sha256, raw = self.digest(text)
+        with transaction.atomic(using=self.db):
+            if self.filter(pk=sha256).update(ref_count=F('ref_count') + 1):
+                return sha256
+            try:
+                with transaction.atomic(using=self.db):
+                    self._new_blob(sha256, raw, ref_count=1).save(force_insert=True, using=self.db)
+            except IntegrityError:
+                # Créé entre-temps par une autre requête
+                self.filter(pk=sha256).update(ref_count=F('ref_count') + 1)
+        return sha256
+
+    def acquire_many(self, texts):
+        """Version groupée de `acquire` : renvoie les clés dans l'ordre de `texts`"""
+        keys, references, raws = [], {}, {}
+        for text in texts:
+            sha256, raw = self.digest(text)
+            keys.append(sha256)
+            references[sha256] = references.get(sha256, 0) + 1
+            raws[sha256] = raw
+        if not keys:
+            return keys
+
+        with transaction.atomic(using=self.db):
+            existing = set(self.filter(pk__in=references).values_list('pk', flat=True))
+            self.bulk_create(
+                [self._new_blob(sha256, raws[sha256], ref_count=0) for sha256 in references if sha256 not in existing],
+                ignore_conflicts=True,
+            )
+            self.filter(pk__in=references).update(ref_count=F('ref_count') + Case(
+                *[When(pk=sha256, then=Value(count)) for sha256, count in references.items()],
+                default=Value(0),
+            ))
+        return keys
+
+    def release(self, sha256):
+        """Retire une référence ; le blob est supprimé quand plus rien ne le référence"""
+        if not sha256:
+            return
+        with transaction.atomic(using=self.db):
+            # Jamais sous zéro (PositiveIntegerField) si le compteur est désynchronisé
+            self.filter(pk=sha256, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+            try:
+                self.filter(pk=sha256, ref_count__lte=0).delete()
+            except ProtectedError:
+                # Compteur désynchronisé : le blob est encore utilisé
+                pass
+
+
+class CodeBlob(models.Model):
+    """
+    Code d'un composant (HTML/CSS/JS), stocké une seule fois par contenu
+    (clé = SHA-256 du texte UTF-8) et compressé.
+    """
+    ENCODING_CHOICES = [
+        ('deflate', 'zlib'),
+    ]
+
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    encoding = models.CharField(max_length=10, choices=ENCODING_CHOICES, default='deflate')
+    data = models.BinaryField()
+    size = models.PositiveIntegerField()  # taille décompressée (octets)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = CodeBlobManager()
+
+    def __str__(self):
+        return self.sha256
+
+    @property
+    def text(self):
+        return zlib.decompress(bytes(self.data)).decode('utf-8')
+
+
+class ComponentManager(models.Manager):
+
+    def apply_rating_change(self, component_id, added=None, removed=None):
+        """
+        Met à jour les compteurs de notes d'un composant en un seul UPDATE
+        (expressions F, sans lecture préalable) : `added` / `removed` sont
+        la note ajoutée et/ou retirée (modification = les deux).
+
+        `updated_at` avance aussi : les validateurs de `my_components`
+        (MAX(updated_at)) changent quand une note arrive.
+        """
+        count_delta = (added is not None) - (removed is not None)
+        sum_delta = (added or 0) - (removed or 0)
+        updates = {
+            'rating_count': F('rating_count') + count_delta,
+            'rating_sum': F('rating_sum') + sum_delta,
+            # Les F() désignent les valeurs avant l'UPDATE
+            'rating_avg': Coalesce(
+                Cast(F('rating_sum') + sum_delta, FloatField())
+                / NullIf(F('rating_count') + count_delta, 0),
+                Value(0.0),
+            ),
+            'updated_at': timezone.now(),
+        }
+        for star, delta in ((added, 1), (removed, -1)):
+            if star is not None:
+                field = f'rating_{star}'
+                updates[field] = updates.get(field, F(field)) + delta
+        return self.filter(pk=component_id).update(**updates)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create n'appelle pas save() : référencer les blobs ici
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            pending = [obj for obj in objs if obj._code is not None]
+            keys = CodeBlob.objects.db_manager(self.db).acquire_many([obj._code for obj in pending])
+            for obj, sha256 in zip(pending, keys):
+                obj.code_blob_id = sha256
+                obj.code_size = len(obj._code.encode('utf-8'))
+            return super().bulk_create(objs, *args, **kwargs)
+
+
 class Component(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
@@ -28,7 +175,10 @@ class Component(models.Model):
         ('PAGINATION', 'Pagination'),
         ('PROGRESS', 'Progress'),
     ])
-    code = models.TextField()  # HTML/CSS/JS du composant
+    # HTML/CSS/JS du composant : blob partagé par contenu (voir `code`)
+    code_blob = models.ForeignKey(CodeBlob, on_delete=models.PROTECT, related_name='components')
+    # Taille du code en octets : exposée dans les listes sans charger le blob
+    code_size = models.PositiveIntegerField(default=0, editable=False)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='components')
     
     # AJOUT ICI : Champ status pour le workflow de validation
@@ -39,12 +189,189 @@ class Component(models.Model):
         ('rejected', 'Rejeté'),
     ]
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='draft')
+
+    # Compteurs de notes (reviews), maintenus par reviews.signals
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_avg = models.FloatField(default=0.0, editable=False)
+    rating_1 = models.PositiveIntegerField(default=0, editable=False)
+    rating_2 = models.PositiveIntegerField(default=0, editable=False)
+    rating_3 = models.PositiveIntegerField(default=0, editable=False)
+    rating_4 = models.PositiveIntegerField(default=0, editable=False)
+    rating_5 = models.PositiveIntegerField(default=0, editable=False)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ComponentManager()
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Catalogue public : status='approved' (+ catégorie), plus récents d'abord
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(status='approved'),
+                name='component_approved_recent_idx',
+            ),
+            models.Index(
+                fields=['category', '-created_at', '-id'],
+                condition=models.Q(status='approved'),
+                name='component_approved_cat_idx',
+            ),
+            # Catalogue public trié par note (?ordering=-rating)
+            models.Index(
+                fields=['-rating_avg', '-id'],
+                condition=models.Q(status='approved'),
+                name='component_approved_rating_idx',
+            ),
+            # Mes composants
+            models.Index(fields=['created_by', '-created_at', '-id'], name='component_owner_recent_idx'),
+        ]
     
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # (catégorie, statut) en base, pour ajuster les compteurs de facettes
+        if 'category' in field_names and 'status' in field_names:
+            instance._loaded_facet = (instance.category, instance.status)
+        return instance
+
+    # Texte du code connu en mémoire (chargé ou modifié), None sinon
+    _code = None
+
+    @property
+    def code(self):
+        if self._code is None and self.code_blob_id:
+            self._code = self.code_blob.text
+        return self._code
+
+    @code.setter
+    def code(self, value):
+        self._code = value
+
+    @property
+    def code_hash(self):
+        return self.code_blob_id
+
+    @property
+    def rating_histogram(self):
+        return {star: getattr(self, f'rating_{star}') for star in range(1, 6)}
+
+    def save(self, *args, **kwargs):
+        # Référencer le nouveau blob si le code a changé, libérer l'ancien
+        update_fields = kwargs.get('update_fields')
+        if self._code is None or (update_fields is not None and 'code' not in update_fields):
+            # Compteurs de facettes (signal post_save) dans la même transaction
+            with transaction.atomic(using=kwargs.get('using')):
+                return super().save(*args, **kwargs)
+
+        update_fields = set(update_fields or ()) - {'code'}
+        sha256, raw = CodeBlob.objects.digest(self._code)
+        previous = self.code_blob_id
+        with transaction.atomic():
+            if sha256 != previous:
+                self.code_blob_id = CodeBlob.objects.acquire(self._code)
+                self.code_size = len(raw)
+                update_fields |= {'code_blob', 'code_size'}
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = update_fields
+            super().save(*args, **kwargs)
+            if previous and sha256 != previous:
+                CodeBlob.objects.release(previous)
+
+
+class CatalogFacetCountManager(models.Manager):
+
+    def adjust(self, changes):
+        """
+        Applique des variations {(category, status): delta} : un UPDATE
+        (expression F) par couple, la ligne étant créée au premier usage.
+        """
+        changes = {key: delta for key, delta in changes.items() if delta}
+        if not changes:
+            return
+        with transaction.atomic(using=self.db):
+            self.bulk_create(
+                [self.model(category=category, status=status_) for category, status_ in changes],
+                ignore_conflicts=True,
+            )
+            for (category, status_), delta in changes.items():
+                self.filter(category=category, status=status_).update(count=F('count') + delta)
+
+    def rebuild(self):
+        """Recalcule toute la table depuis `Component` (une requête groupée)"""
+        rows = (
+            Component.objects.order_by()
+            .values('category', 'status')
+            .annotate(total=Count('pk'))
+        )
+        with transaction.atomic(using=self.db):
+            self.all().delete()
+            return self.bulk_create([
+                self.model(category=row['category'], status=row['status'], count=row['total'])
+                for row in rows
+            ])
+
+    def facets(self, rows=None):
+        """
+        Renvoie {'categories', 'statuses', 'total'} depuis des lignes
+        (category, status, count) : la table elle-même par défaut.
+        """
+        if rows is None:
+            rows = self.values_list('category', 'status', 'count')
+        categories = dict.fromkeys((value for value, _ in Component._meta.get_field('category').choices), 0)
+        statuses = dict.fromkeys((value for value, _ in Component.STATUS_CHOICES), 0)
+        for category, status_, count in rows:
+            # Catégories : catalogue public uniquement
+            if status_ == 'approved' and category in categories:
+                categories[category] += count
+            if status_ in statuses:
+                statuses[status_] += count
+        return {
+            'categories': categories,
+            'statuses': statuses,
+            'total': statuses['approved'],
+        }
+
+
+class CatalogFacetCount(models.Model):
+    """
+    Nombre de composants par (catégorie, statut), maintenu au fil de l'eau
+    par `catalog.signals` (et à la main pour les opérations groupées) :
+    `list_facets` le lit sans parcourir `Component`.
+    """
+    category = models.CharField(max_length=50)
+    status = models.CharField(max_length=10)
+    count = models.IntegerField(default=0)
+
+    objects = CatalogFacetCountManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'status'], name='facet_count_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.category}/{self.status}: {self.count}'
+
+
+class ComponentSearchDocument(models.Model):
+    """
+    Document plein texte d'un composant (table `catalog_component_search`).
+
+    Table gérée à la main par la migration 0004 (FTS5 sur SQLite, tsvector
+    sur PostgreSQL) et alimentée par `catalog.search.index_components` :
+    le modèle ne sert qu'à faire la jointure depuis `Component`.
+    """
+    component = models.OneToOneField(
+        Component, on_delete=models.DO_NOTHING, primary_key=True,
+        related_name='search_document', db_constraint=False,
+    )
+
+    class Meta:
+        managed = False
+        db_table = 'catalog_component_search'
@@ -0,0 +1,13 @@
+from redteamcnbackend.pagination import KeysetPagination
+
+
+class ComponentPagination(KeysetPagination):
+    """Pagination des listes de composants (plus récents d'abord)"""
+    ordering = ('-created_at', '-id')
+    max_page_size = 100
+
+    # Valeurs de ?ordering= -> tri keyset (chacun suit un index partiel)
+    orderings = {
+        '-created_at': ('-created_at', '-id'),
+        '-rating': ('-rating_avg', '-id'),
+    }
@@ -0,0 +1,151 @@
+"""
+Recherche plein texte sur les composants (nom, description, code).
+
+L'index vit dans une table annexe `catalog_component_search` (modèle
+non géré `ComponentSearchDocument`), créée par la migration 0004 selon
+le moteur :
+
+- PostgreSQL : `tsvector` pondéré (nom > description > code) + index GIN
+- SQLite : table virtuelle FTS5 (classement bm25)
+
+Il est alimenté depuis Python (voir `catalog.signals`) à chaque
+sauvegarde d'un `Component`. Sur un autre moteur, on retombe sur des
+`icontains` (nom, description) sans classement.
+"""
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+SEARCH_TABLE = 'catalog_component_search'
+
+# to_tsvector refuse les documents > 1 Mo : on n'indexe que le début du code
+CODE_MAX_LENGTH = 100_000
+MAX_TERMS = 8
+
+# Poids des colonnes (nom, description, code)
+FTS5_WEIGHTS = (10.0, 4.0, 1.0)
+
+PG_DOCUMENT_SQL = (
+    "setweight(to_tsvector('simple', %s), 'A') || "
+    "setweight(to_tsvector('simple', %s), 'B') || "
+    "setweight(to_tsvector('simple', %s), 'C')"
+)
+
+
+def is_supported(connection):
+    return connection.vendor in ('postgresql', 'sqlite')
+
+
+def search_terms(query):
+    """Découpe la saisie utilisateur en mots (la syntaxe FTS n'est jamais exposée)."""
+    return re.findall(r'\w+', query.lower())[:MAX_TERMS]
+
+
+def _document(component):
+    return (
+        component.pk,
+        component.name or '',
+        component.description or '',
+        (component.code or '')[:CODE_MAX_LENGTH],
+    )
+
+
+def index_components(components, using='default'):
+    """Ajoute ou remplace les documents indexés des composants donnés."""
+    connection = connections[using]
+    if not is_supported(connection):
+        return
+    rows = [_document(component) for component in components]
+    if not rows:
+        return
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.executemany(
+                f"INSERT INTO {SEARCH_TABLE} (component_id, document) "
+                f"VALUES (%s, {PG_DOCUMENT_SQL}) "
+                f"ON CONFLICT (component_id) DO UPDATE SET document = EXCLUDED.document",
+                rows,
+            )
+        else:
+            cursor.executemany(
+                f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s",
+                [(row[0],) for row in rows],
+            )
+            cursor.executemany(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, component_id, name, description, code) "
+                f"VALUES (%s, %s, %s, %s, %s)",
+                [(row[0],) + row for row in rows],
+            )
+
+
+def unindex_components(pks, using='default'):
+    """Retire des documents de l'index (PostgreSQL le fait déjà par cascade)."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or not pks:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s",
+            [(pk,) for pk in pks],
+        )
+
+
+def search_components(queryset, query):
+    """
+    Filtre `queryset` sur `query` et l'annote avec `search_rank`
+    (plus grand = plus pertinent).
+
+    La table d'index est jointe (INNER JOIN via `search_document`) : le
+    moteur part des documents trouvés par l'index puis lit les composants
+    par clé primaire.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    vendor = connections[queryset.db].vendor
+
+    if vendor == 'postgresql':
+        tsquery = ' & '.join(f"{term}:*" for term in terms)
+        match = RawSQL(
+            f"{SEARCH_TABLE}.document @@ to_tsquery('simple', %s)",
+            (tsquery,),
+            output_field=BooleanField(),
+        )
+        rank = RawSQL(
+            f"ts_rank({SEARCH_TABLE}.document, to_tsquery('simple', %s))",
+            (tsquery,),
+            output_field=FloatField(),
+        )
+    elif vendor == 'sqlite':
+        expression = ' '.join(f'"{term}"*' for term in terms)
+        weights = ', '.join(str(weight) for weight in FTS5_WEIGHTS)
+        match = RawSQL(
+            f"{SEARCH_TABLE} MATCH %s",
+            (expression,),
+            output_field=BooleanField(),
+        )
+        # bm25() est négatif (plus petit = meilleur) : on l'inverse
+        rank = RawSQL(
+            f"-bm25({SEARCH_TABLE}, 0.0, {weights})",
+            (),
+            output_field=FloatField(),
+        )
+    else:
+        # Le code est compressé en base : seuls nom et description sont cherchés
+        condition = Q()
+        for term in terms:
+            condition &= Q(name__icontains=term) | Q(description__icontains=term)
+        return queryset.filter(condition).annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+
+    return (
+        queryset
+        .filter(search_document__isnull=False)
+        .filter(match)
+        .annotate(search_rank=rank)
+    )
@@ -1,10 +1,37 @@
 from rest_framework import serializers
 from .models import Component
+from redteamcnbackend.serializers import EagerLoadingMixin
 
-class ComponentSerializer(serializers.ModelSerializer):
+class ComponentSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     created_by = serializers.StringRelatedField()
+    # Stocké dans un CodeBlob compressé (propriété `Component.code`)
+    code = serializers.CharField(trim_whitespace=False)
+
+    select_related_fields = ('created_by', 'code_blob')
+
+    class Meta:
+        model = Component
+        fields = [
+            'id', 'name', 'description', 'category', 'code', 'code_size', 'code_hash', 'created_by', 'status',
+            'rating_count', 'rating_avg', 'rating_histogram', 'created_at', 'updated_at',
+        ]
+        read_only_fields = ['id', 'code_size', 'code_hash', 'created_by', 'rating_count', 'rating_avg', 'created_at', 'updated_at']
+
+
+class ComponentListSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    """
+    Projection allégée pour les listes : pas de `code`, seulement sa taille
+    et son empreinte (le code se récupère via /components/<id>/code/).
+    Le blob du code n'est jamais chargé.
+    """
+    created_by = serializers.StringRelatedField()
+
+    select_related_fields = ('created_by',)
 
     class Meta:
         model = Component
-        fields = ['id', 'name', 'description', 'category', 'code', 'created_by', 'status', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'created_by', 'created_at', 'updated_at']
\ No newline at end of file
+        fields = [
+            'id', 'name', 'description', 'category', 'code_size', 'code_hash', 'created_by', 'status',
+            'rating_count', 'rating_avg', 'rating_histogram', 'created_at', 'updated_at',
+        ]
+        read_only_fields = fields
@@ -0,0 +1,58 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump_catalog_version_on_commit
+from .models import CatalogFacetCount, CodeBlob, Component
+from .search import index_components, unindex_components
+
+SEARCH_FIELDS = {'name', 'description', 'code_blob'}
+FACET_FIELDS = {'category', 'status'}
+
+
+@receiver(post_save, sender=Component)
+def sync_search_index(sender, instance, created, update_fields=None, using='default', **kwargs):
+    # Pas besoin de réindexer si aucun champ texte n'a été modifié
+    if update_fields is not None and not SEARCH_FIELDS.intersection(update_fields):
+        return
+    index_components([instance], using=using)
+
+
+@receiver(post_delete, sender=Component)
+def remove_from_search_index(sender, instance, using='default', **kwargs):
+    unindex_components([instance.pk], using=using)
+
+
+@receiver(post_save, sender=Component)
+@receiver(post_delete, sender=Component)
+def invalidate_catalog_cache(sender, instance, **kwargs):
+    bump_catalog_version_on_commit()
+
+
+@receiver(post_delete, sender=Component)
+def release_code_blob(sender, instance, **kwargs):
+    # Aussi appelé pour les suppressions en cascade (ex: suppression d'un user)
+    CodeBlob.objects.release(instance.code_blob_id)
+
+
+@receiver(post_save, sender=Component)
+def update_facet_counts(sender, instance, created, update_fields=None, using='default', **kwargs):
+    if update_fields is not None and not FACET_FIELDS.intersection(update_fields):
+        return
+    current = (instance.category, instance.status)
+    previous = None if created else getattr(instance, '_loaded_facet', None)
+    if not created and previous is None:
+        # Instance construite à la main (pas lue en base) : rien à comparer
+        return
+    if previous == current:
+        return
+    changes = {current: 1}
+    if previous is not None:
+        changes[previous] = changes.get(previous, 0) - 1
+    CatalogFacetCount.objects.db_manager(using).adjust(changes)
+    instance._loaded_facet = current
+
+
+@receiver(post_delete, sender=Component)
+def remove_facet_count(sender, instance, using='default', **kwargs):
+    facet = getattr(instance, '_loaded_facet', (instance.category, instance.status))
+    CatalogFacetCount.objects.db_manager(using).adjust({facet: -1})
@@ -1,3 +1,657 @@
+import base64
+import json
+import zlib
+from itertools import count
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from notifications.models import Notification, UnreadCounter
+from redteamcnbackend.testing import QueryBudgetAssertionsMixin, QueryPlanAssertionsMixin
+from .models import CatalogFacetCount, CodeBlob, Component, ComponentSearchDocument
+from .search import search_components
+from .views import MAX_BATCH_REVIEW_ITEMS
+
+User = get_user_model()
+
+
+class ComponentQueryPlanTests(QueryPlanAssertionsMixin, TestCase):
+    """Les listes du catalogue doivent suivre un index, sans tri en mémoire."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='dev@example.com', username='dev', password='x' * 10)
+        for index, status in enumerate(['approved', 'approved', 'pending', 'draft']):
+            Component.objects.create(
+                name=f'Bouton {index}', category='BUTTON', code='<button></button>',
+                created_by=cls.user, status=status,
+            )
+
+    def test_public_catalog_uses_partial_index(self):
+        queryset = Component.objects.filter(status='approved').order_by('-created_at', '-id')[:21]
+        self.assertUsesIndex(queryset, 'component_approved_recent_idx')
+
+    def test_public_catalog_next_page_uses_partial_index(self):
+        now = timezone.now()
+        queryset = (
+            Component.objects.filter(status='approved')
+            .filter(created_at__lt=now)
+            .order_by('-created_at', '-id')[:21]
+        )
+        self.assertUsesIndex(queryset, 'component_approved_recent_idx')
+
+    def test_category_filter_uses_partial_index(self):
+        queryset = (
+            Component.objects.filter(status='approved', category='BUTTON')
+            .order_by('-created_at', '-id')[:21]
+        )
+        self.assertUsesIndex(queryset, 'component_approved_cat_idx')
+
+    def test_my_components_uses_owner_index(self):
+        queryset = Component.objects.filter(created_by=self.user).order_by('-created_at', '-id')[:21]
+        self.assertUsesIndex(queryset, 'component_owner_recent_idx')
+
+
+
+class ComponentQueryBudgetTests(QueryBudgetAssertionsMixin, TestCase):
+    """Les listes de composants ne font pas une requête par ligne."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='dev@example.com', username='dev')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.numbers = count()
+        self.seeded = 0
+
+    def seed(self, n, owner=None):
+        for _ in range(n):
+            number = next(self.numbers)
+            # Un créateur différent par composant, sauf pour "mes composants"
+            author = owner or User.objects.create_user(email=f'author{number}@example.com', username=f'author{number}')
+            Component.objects.create(
+                name=f'Bouton {number}', category='BUTTON', code=f'<button>{number}</button>',
+                created_by=author, status='approved',
+            )
+        self.seeded += n
+
+    def fetch(self, url):
+        # Pas de réponse en cache : on mesure la construction de la liste
+        cache.clear()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), self.seeded)
+
+    def test_public_catalog(self):
+        self.assertConstantQueries(self.seed, lambda: self.fetch('/api/components/'))
+
+    def test_public_catalog_search(self):
+        self.assertConstantQueries(self.seed, lambda: self.fetch('/api/components/?search=bouton'))
+
+    def test_my_components(self):
+        self.assertConstantQueries(
+            lambda n: self.seed(n, owner=self.user), lambda: self.fetch('/api/components/my/'),
+        )
+
+
+class ComponentPaginationTests(TestCase):
+    """Curseur keyset : pages stables, sans doublon ni trou, même à created_at égal."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='dev@example.com', username='dev')
+        for index in range(7):
+            Component.objects.create(
+                name=f'Bouton {index}', category='BUTTON', code=f'<button>{index}</button>',
+                created_by=cls.user, status='approved',
+            )
+        # Même horodatage partout : seul -id départage
+        Component.objects.update(created_at=timezone.now())
+        cls.expected = list(Component.objects.order_by('-id').values_list('id', flat=True))
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_next_then_previous_round_trip(self):
+        pages = [self.get('/api/components/', page_size=3)]
+        self.assertIsNone(pages[0]['previous'])
+        while pages[-1]['next']:
+            pages.append(self.get(pages[-1]['next']))
+        forward = [[item['id'] for item in page['results']] for page in pages]
+        self.assertEqual(sum(forward, []), self.expected)
+        self.assertEqual([len(ids) for ids in forward], [3, 3, 1])
+
+        # Retour en arrière depuis la dernière page : mêmes pages
+        backward = []
+        page = pages[-1]
+        while page['previous']:
+            page = self.get(page['previous'])
+            backward.insert(0, [item['id'] for item in page['results']])
+        self.assertEqual(backward, forward[:-1])
+        self.assertIsNone(page['previous'])
+
+    def test_rating_ordering_round_trip(self):
+        page = self.get('/api/components/', ordering='-rating', page_size=2)
+        ids = [item['id'] for item in page['results']]
+        while page['next']:
+            page = self.get(page['next'])
+            ids += [item['id'] for item in page['results']]
+        self.assertEqual(ids, self.expected)
+
+    def test_invalid_cursor_is_rejected(self):
+        def token(payload):
+            return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+        for cursor in ('pas-un-curseur', token({'x': 1}), token({'p': [1]}), token({'p': ['hier', 3]})):
+            response = self.client.get('/api/components/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 404, cursor)
+            self.assertEqual(response.json()['detail'], 'Curseur invalide')
+
+    def test_malformed_positions_are_rejected(self):
+        def token(payload):
+            return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+        positions = ([{'a': 1}, 3], [[1], 3], [None, 3], ['x', 3], [1, None], [1, [3]])
+        for params in ({}, {'ordering': '-rating'}, {'search': 'bouton'}):
+            for position in positions:
+                for cursor in (token({'p': position}), token({'p': position, 'r': 1})):
+                    response = self.client.get('/api/components/', {**params, 'cursor': cursor})
+                    self.assertEqual(response.status_code, 404, (params, position))
+                    self.assertEqual(response.json()['detail'], 'Curseur invalide')
+
+    def test_invalid_ordering_is_rejected(self):
+        response = self.client.get('/api/components/', {'ordering': 'name'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.json())
+
+
+class ComponentSearchTests(TestCase):
+    """Index plein texte tenu à jour par catalog.signals, classé par pertinence."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='dev@example.com', username='dev')
+
+    def create(self, name, description='', code='<div></div>'):
+        return Component.objects.create(
+            name=name, description=description, code=code, category='MODAL', created_by=self.user, status='approved',
+        )
+
+    def search(self, query):
+        return list(search_components(Component.objects.all(), query).order_by('-search_rank', '-id'))
+
+    def test_name_edit_reindexes(self):
+        component = self.create('Bouton primaire')
+        self.assertEqual(self.search('primaire'), [component])
+
+        component.name = 'Accordéon'
+        component.save()
+        self.assertEqual(self.search('primaire'), [])
+        self.assertEqual(self.search('accord'), [component])
+
+    def test_delete_removes_document(self):
+        component = self.create('Bouton primaire')
+        pk = component.pk
+        self.assertTrue(ComponentSearchDocument.objects.filter(component_id=pk).exists())
+        component.delete()
+        self.assertFalse(ComponentSearchDocument.objects.filter(component_id=pk).exists())
+        self.assertEqual(self.search('primaire'), [])
+
+    def test_better_match_ranks_first(self):
+        in_code = self.create('Fenêtre', code='<div class="modal"></div>')
+        in_name = self.create('Modal de confirmation')
+        in_description = self.create('Fenêtre', description='Une modal simple')
+        self.assertEqual(self.search('modal'), [in_name, in_description, in_code])
+
+        response = self.client.get('/api/components/', {'search': 'modal'})
+        self.assertEqual([item['id'] for item in response.json()['results']], [in_name.pk, in_description.pk, in_code.pk])
+
+
+class ComponentListProjectionTests(TestCase):
+    """Les listes exposent la taille et l'empreinte du code, jamais le code."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='dev@example.com', username='dev')
+        cls.component = Component.objects.create(
+            name='Bouton', category='BUTTON', code='<button>OK</button>', created_by=cls.user, status='approved',
+        )
+
+    def test_list_omits_code_and_blob(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for url in ('/api/components/', '/api/components/my/'):
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url)
+            item = response.json()['results'][0]
+            self.assertNotIn('code', item)
+            self.assertEqual(item['code_size'], len('<button>OK</button>'))
+            self.assertEqual(item['code_hash'], self.component.code_blob_id)
+            self.assertFalse(any('catalog_codeblob' in query['sql'] for query in queries), url)
+
+
+class CatalogCacheTests(TestCase):
+    """Réponses du catalogue en cache, invalidées par toute modification."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='dev@example.com', username='dev')
+        cls.coach = User.objects.create_user(email='coach@example.com', username='coach', role='coach')
+        cls.approved = Component.objects.create(
+            name='Bouton', category='BUTTON', code='<button></button>', created_by=cls.user, status='approved',
+        )
+        cls.pending = Component.objects.create(
+            name='Carte', category='CARD', code='<div></div>', created_by=cls.user, status='pending',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.owner = APIClient()
+        self.owner.force_authenticate(self.user)
+        self.reviewer = APIClient()
+        self.reviewer.force_authenticate(self.coach)
+
+    def names(self):
+        return [item['name'] for item in self.client.get('/api/components/').json()['results']]
+
+    def test_second_read_is_served_from_cache(self):
+        self.assertEqual(self.names(), ['Bouton'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names(), ['Bouton'])
+
+    def test_approve_invalidates_list(self):
+        self.assertEqual(self.names(), ['Bouton'])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.reviewer.post(f'/api/components/review/{self.pending.pk}/', {'action': 'approve'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.names(), ['Carte', 'Bouton'])
+
+    def test_batch_approve_invalidates_list(self):
+        self.assertEqual(self.names(), ['Bouton'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reviewer.post(
+                '/api/components/review/batch/', {'items': [{'id': self.pending.pk, 'action': 'approve'}]}, format='json',
+            )
+        self.assertEqual(self.names(), ['Carte', 'Bouton'])
+
+    def test_edit_invalidates_list(self):
+        self.assertEqual(self.names(), ['Bouton'])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.owner.put(f'/api/components/{self.approved.pk}/', {'name': 'Bouton primaire'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.names(), ['Bouton primaire'])
+
+    def test_links_are_cached_per_host(self):
+        Component.objects.create(
+            name='Lien', category='BUTTON', code='<a></a>', created_by=self.user, status='approved',
+        )
+        forged = self.client.get('/api/components/?page_size=1', HTTP_HOST='evil.example').json()
+        self.assertTrue(forged['next'].startswith('http://evil.example/'))
+        response = self.client.get('/api/components/?page_size=1', HTTP_HOST='testserver').json()
+        self.assertTrue(response['next'].startswith('http://testserver/'))
+        self.assertNotEqual(response['next'], forged['next'])
+
+    def test_conditional_get(self):
+        etag = self.client.get('/api/components/')['ETag']
+        response = self.client.get('/api/components/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reviewer.post(f'/api/components/review/{self.pending.pk}/', {'action': 'approve'})
+
+        response = self.client.get('/api/components/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.json()['results']), 2)
+
+
+class ComponentBulkTests(TestCase):
+    """Import / export NDJSON."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='dev@example.com', username='dev')
+        cls.coach = User.objects.create_user(email='coach@example.com', username='coach', role='coach')
+        for name, code in (('Bouton', '<button>Envoyer</button>'), ('Carte', '<div>Café ☕</div>')):
+            Component.objects.create(name=name, category='CARD', code=code, created_by=cls.user, status='approved')
+        Component.objects.create(name='Brouillon', category='CARD', code='<p></p>', created_by=cls.user)
+
+    def export(self):
+        response = self.client.get('/api/components/export/')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        return b''.join(response.streaming_content)
+
+    def import_as(self, user, body):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post('/api/components/import/?batch_size=2', body, content_type='application/x-ndjson')
+
+    def test_export_import_round_trip(self):
+        exported = self.export()
+        rows = [json.loads(line) for line in exported.decode().splitlines()]
+        self.assertEqual([row['name'] for row in rows], ['Bouton', 'Carte'])
+        self.assertEqual(rows[1]['code'], '<div>Café ☕</div>')
+
+        response = self.import_as(self.coach, exported)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {'created': 2, 'error_count': 0, 'errors': []})
+
+        imported = Component.objects.filter(created_by=self.coach).order_by('id')
+        self.assertEqual(
+            [(c.name, c.category, c.code, c.status) for c in imported],
+            [(row['name'], row['category'], row['code'], row['status']) for row in rows],
+        )
+        # Même code : mêmes blobs, référencés deux fois
+        blobs = CodeBlob.objects.filter(pk__in=[component.code_blob_id for component in imported])
+        self.assertEqual(sorted(blobs.values_list('ref_count', flat=True)), [2, 2])
+        # bulk_create : index, facettes tenus à la main
+        self.assertEqual(search_components(Component.objects.all(), 'café').count(), 2)
+        self.assertEqual(CatalogFacetCount.objects.get(category='CARD', status='approved').count, 4)
+
+    def test_status_forced_to_draft_for_developers(self):
+        response = self.import_as(self.user, self.export())
+        self.assertEqual(response.status_code, 201)
+        imported = Component.objects.filter(created_by=self.user, name__in=['Bouton', 'Carte'])
+        self.assertEqual(sorted(imported.values_list('status', flat=True)), ['approved', 'approved', 'draft', 'draft'])
+
+    def test_invalid_lines_are_reported(self):
+        body = '\n'.join([
+            json.dumps({'name': 'Bon', 'category': 'CARD', 'code': '<div></div>'}),
+            '{pas du json',
+            json.dumps({'name': 'Sans code', 'category': 'CARD'}),
+            '',
+            json.dumps(['liste']),
+        ])
+        data = self.import_as(self.user, body.encode()).json()
+        self.assertEqual(data['created'], 1)
+        self.assertEqual(data['error_count'], 3)
+        self.assertEqual([error['line'] for error in data['errors']], [2, 3, 5])
+        self.assertIn('code', data['errors'][1]['errors'])
+
+
+class BatchReviewTests(TestCase):
+    """Validation en lot : un résultat par élément, dans l'ordre."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user(email='alice@example.com', username='alice')
+        cls.bob = User.objects.create_user(email='bob@example.com', username='bob')
+        cls.coach = User.objects.create_user(email='coach@example.com', username='coach', role='coach')
+        cls.components = {
+            name: Component.objects.create(
+                name=name, category='CARD', code='<div></div>', created_by=owner, status=status_,
+            )
+            for name, owner, status_ in (
+                ('a1', cls.alice, 'pending'), ('a2', cls.alice, 'pending'),
+                ('b1', cls.bob, 'pending'), ('b2', cls.bob, 'draft'),
+            )
+        }
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.coach)
+
+    def review(self, items):
+        return self.client.post('/api/components/review/batch/', {'items': items}, format='json')
+
+    def test_per_item_results(self):
+        ids = {name: component.pk for name, component in self.components.items()}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.review([
+                {'id': ids['a1'], 'action': 'approve'},
+                {'id': ids['a2'], 'action': 'reject', 'reason': 'Pas accessible'},
+                {'id': ids['a1'], 'action': 'reject'},
+                {'id': ids['b1'], 'action': 'publier'},
+                {'id': 'b1', 'action': 'approve'},
+                {'id': ids['b2'], 'action': 'approve'},
+                {'id': 999999, 'action': 'approve'},
+            ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['processed'], 2)
+        self.assertEqual(response.data['results'], [
+            {'id': ids['a1'], 'status': 'approved'},
+            {'id': ids['a2'], 'status': 'rejected'},
+            {'id': ids['a1'], 'error': 'Composant en double dans le lot'},
+            {'id': ids['b1'], 'error': 'action doit être "approve" ou "reject"'},
+            {'id': 'b1', 'error': 'id invalide'},
+            {'id': ids['b2'], 'error': 'Composant non trouvé ou non en attente'},
+            {'id': 999999, 'error': 'Composant non trouvé ou non en attente'},
+        ])
+        statuses = dict(Component.objects.values_list('name', 'status'))
+        self.assertEqual(statuses, {'a1': 'approved', 'a2': 'rejected', 'b1': 'pending', 'b2': 'draft'})
+
+        # Une notification par composant traité, au seul créateur
+        notifications = Notification.objects.filter(verb='component_reviewed').order_by('target_id')
+        self.assertEqual([n.recipient_id for n in notifications], [self.alice.pk, self.alice.pk])
+        self.assertEqual(
+            [n.message for n in notifications],
+            ["Votre composant 'a1' a été validé", "Votre composant 'a2' a été rejeté : Pas accessible"],
+        )
+        self.assertEqual(UnreadCounter.objects.get_counts([self.alice.pk, self.bob.pk]), {self.alice.pk: 2, self.bob.pk: 0})
+
+    def test_already_reviewed_component(self):
+        pk = self.components['a1'].pk
+        self.review([{'id': pk, 'action': 'approve'}])
+        response = self.review([{'id': pk, 'action': 'reject'}])
+        self.assertEqual(response.data['processed'], 0)
+        self.assertEqual(response.data['results'], [{'id': pk, 'error': 'Composant non trouvé ou non en attente'}])
+        self.assertEqual(UnreadCounter.objects.get_count(self.alice.pk), 1)
+
+    def test_requires_coach(self):
+        self.client.force_authenticate(self.alice)
+        self.assertEqual(self.review([{'id': self.components['a1'].pk, 'action': 'approve'}]).status_code, 403)
+
+    def test_rejects_empty_or_oversized_batch(self):
+        self.assertEqual(self.review([]).status_code, 400)
+        items = [{'id': index, 'action': 'approve'} for index in range(MAX_BATCH_REVIEW_ITEMS + 1)]
+        self.assertEqual(self.review(items).status_code, 400)
+
+
+class CatalogFacetCountTests(TestCase):
+    """Compteurs (catégorie, statut) tenus par les signaux et les opérations groupées."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='dev@example.com', username='dev')
+        cls.coach = User.objects.create_user(email='coach@example.com', username='coach', role='coach')
+
+    def setUp(self):
+        cache.clear()
+        self.reviewer = APIClient()
+        self.reviewer.force_authenticate(self.coach)
+        self.pending = [
+            Component.objects.create(
+                name=f'Carte {index}', category='CARD', code='<div></div>', created_by=self.user, status='pending',
+            )
+            for index in range(3)
+        ]
+        Component.objects.create(name='Bouton', category='BUTTON', code='<b></b>', created_by=self.user, status='approved')
+
+    def counts(self):
+        return {
+            (category, status_): count
+            for category, status_, count in CatalogFacetCount.objects.values_list('category', 'status', 'count')
+            if count
+        }
+
+    def assertMatchesComponents(self):
+        expected = dict(
+            ((row['category'], row['status']), row['total'])
+            for row in Component.objects.order_by().values('category', 'status').annotate(total=Count('pk'))
+        )
+        self.assertEqual(self.counts(), expected)
+
+    def test_approve_reject_delete(self):
+        self.assertEqual(self.counts(), {('CARD', 'pending'): 3, ('BUTTON', 'approved'): 1})
+
+        self.reviewer.post(f'/api/components/review/{self.pending[0].pk}/', {'action': 'approve'})
+        self.reviewer.post(f'/api/components/review/{self.pending[1].pk}/', {'action': 'reject'})
+        self.assertEqual(
+            self.counts(),
+            {('CARD', 'pending'): 1, ('CARD', 'approved'): 1, ('CARD', 'rejected'): 1, ('BUTTON', 'approved'): 1},
+        )
+
+        Component.objects.get(pk=self.pending[0].pk).delete()
+        self.assertEqual(self.counts(), {('CARD', 'pending'): 1, ('CARD', 'rejected'): 1, ('BUTTON', 'approved'): 1})
+        self.assertMatchesComponents()
+
+    def test_batch_review_and_cascade_delete(self):
+        self.reviewer.post('/api/components/review/batch/', {'items': [
+            {'id': component.pk, 'action': 'approve'} for component in self.pending[:2]
+        ]}, format='json')
+        self.assertEqual(self.counts(), {('CARD', 'pending'): 1, ('CARD', 'approved'): 2, ('BUTTON', 'approved'): 1})
+
+        # Suppression de l'auteur : composants supprimés en cascade
+        self.user.delete()
+        self.assertEqual(self.counts(), {})
+
+    def test_facets_endpoint(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reviewer.post(f'/api/components/review/{self.pending[0].pk}/', {'action': 'approve'})
+        data = self.client.get('/api/components/facets/').json()
+        self.assertEqual(data['total'], 2)
+        self.assertEqual(data['categories']['CARD'], 1)
+        self.assertEqual(data['categories']['BUTTON'], 1)
+        self.assertEqual(data['statuses'], {'draft': 0, 'pending': 2, 'approved': 2, 'rejected': 0})
+
+        # Avec recherche : comptage groupé sur les résultats
+        data = self.client.get('/api/components/facets/', {'search': 'carte'}).json()
+        self.assertEqual(data['statuses'], {'draft': 0, 'pending': 2, 'approved': 1, 'rejected': 0})
+
+    def test_rebuild_matches_signals(self):
+        Component.objects.filter(pk=self.pending[2].pk).update(status='draft')  # sans signal
+        CatalogFacetCount.objects.rebuild()
+        self.assertMatchesComponents()
+
+
+class CodeBlobTests(TestCase):
+    """Code stocké une fois par contenu, avec comptage de références."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='dev@example.com', username='dev')
+
+    def create(self, code, **kwargs):
+        return Component.objects.create(name='Bouton', category='BUTTON', code=code, created_by=self.user, **kwargs)
+
+    def ref_counts(self):
+        return dict(CodeBlob.objects.values_list('sha256', 'ref_count'))
+
+    def test_identical_code_is_stored_once(self):
+        first, second = self.create('<button>A</button>'), self.create('<button>A</button>')
+        self.assertEqual(first.code_blob_id, second.code_blob_id)
+        self.assertEqual(self.ref_counts(), {first.code_blob_id: 2})
+        blob = CodeBlob.objects.get()
+        self.assertEqual(blob.text, '<button>A</button>')
+        self.assertEqual(blob.size, len('<button>A</button>'))
+
+    def test_code_change_moves_reference(self):
+        first, second = self.create('<button>A</button>'), self.create('<button>A</button>')
+        old = first.code_blob_id
+
+        first.code = '<button>B</button>'
+        first.save()
+        self.assertEqual(self.ref_counts(), {old: 1, first.code_blob_id: 1})
+
+        # Dernière référence retirée : l'ancien blob est supprimé
+        second = Component.objects.get(pk=second.pk)
+        second.code = '<button>B</button>'
+        second.save(update_fields=['code'])
+        self.assertEqual(self.ref_counts(), {first.code_blob_id: 2})
+
+    def test_delete_releases_blob(self):
+        first, second = self.create('<button>A</button>'), self.create('<button>A</button>')
+        first.delete()
+        self.assertEqual(self.ref_counts(), {second.code_blob_id: 1})
+        second.delete()
+        self.assertFalse(CodeBlob.objects.exists())
+
+    def test_bulk_create_references_blobs(self):
+        self.create('<button>A</button>')
+        Component.objects.bulk_create([
+            Component(name=f'Bouton {index}', category='BUTTON', code=code, created_by=self.user)
+            for index, code in enumerate(['<button>A</button>', '<button>B</button>', '<button>B</button>'])
+        ])
+        digest = CodeBlob.objects.digest
+        self.assertEqual(self.ref_counts(), {
+            digest('<button>A</button>')[0]: 2,
+            digest('<button>B</button>')[0]: 2,
+        })
+
+    def test_release_never_goes_below_zero(self):
+        component = self.create('<button>A</button>')
+        # Compteur désynchronisé : le blob est encore référencé
+        CodeBlob.objects.filter(pk=component.code_blob_id).update(ref_count=0)
+        CodeBlob.objects.release(component.code_blob_id)
+        self.assertEqual(self.ref_counts(), {component.code_blob_id: 0})
+
+        orphan = CodeBlob.objects.acquire('<button>orphelin</button>')
+        CodeBlob.objects.filter(pk=orphan).update(ref_count=0)
+        CodeBlob.objects.release(orphan)
+        self.assertFalse(CodeBlob.objects.filter(pk=orphan).exists())
+
+
+class ComponentCodeTests(TestCase):
+    """`component_code` : octets compressés servis tels quels, ETag fort et 304."""
+
+    CODE = '<button class="btn">Valider</button>' * 20
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='dev@example.com', username='dev')
+        cls.component = Component.objects.create(
+            name='Bouton', category='BUTTON', code=cls.CODE, created_by=cls.user, status='approved',
+        )
+        cls.url = f'/api/components/{cls.component.pk}/code/'
+
+    def test_deflate_when_accepted(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'deflate')
+        self.assertEqual(response['ETag'], f'"{self.component.code_blob_id}-deflate"')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertLess(len(response.content), len(self.CODE))
+        self.assertEqual(zlib.decompress(response.content).decode(), self.CODE)
+
+    def test_identity_when_deflate_refused(self):
+        for accept in ('', 'gzip', 'deflate;q=0'):
+            response = self.client.get(self.url, HTTP_ACCEPT_ENCODING=accept)
+            self.assertFalse(response.has_header('Content-Encoding'))
+            self.assertEqual(response['ETag'], f'"{self.component.code_blob_id}"')
+            self.assertEqual(response.content.decode(), self.CODE)
+
+    def test_not_modified_without_loading_blob(self):
+        etag = self.client.get(self.url, HTTP_ACCEPT_ENCODING='deflate')['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='deflate', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        # ETag propre à l'encodage : l'autre représentation n'est pas à jour
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_unapproved_code_is_private(self):
+        draft = Component.objects.create(name='Brouillon', category='BUTTON', code='<b></b>', created_by=self.user)
+        url = f'/api/components/{draft.pk}/code/'
+        self.assertEqual(self.client.get(url).status_code, 404)
 
-# Create your tests here.
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
@@ -3,10 +3,15 @@ from . import views
 
 urlpatterns = [
     path('components/', views.list_components, name='list_components'),
+    path('components/facets/', views.list_facets, name='list_facets'),
     path('components/create/', views.create_component, name='create_component'),
+    path('components/import/', views.import_components_ndjson, name='import_components'),
+    path('components/export/', views.export_components_ndjson, name='export_components'),
     path('components/<int:pk>/', views.update_component, name='update_component'),
     path('components/<int:pk>/', views.delete_component, name='delete_component'),
+    path('components/<int:pk>/code/', views.component_code, name='component_code'),
     path('components/submit/<int:component_id>/', views.submit_for_review, name='submit_for_review'),
     path('components/review/<int:component_id>/', views.review_component, name='review_component'),
+    path('components/review/batch/', views.review_components_batch, name='review_components_batch'),
     path('components/my/', views.my_components, name='my_components'),
 ]
\ No newline at end of file
@@ -1,13 +1,39 @@
 from rest_framework import status
-from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
-from .models import Component
-from .serializers import ComponentSerializer
-from notifications.models import Notification
+from .models import CatalogFacetCount, Component
+from .serializers import ComponentSerializer, ComponentListSerializer
+from .pagination import ComponentPagination
+from .search import search_components
+from .bulk import export_components, import_components, IMPORT_BATCH_SIZE
+from .cache import (
+    CATALOG_CACHE_TIMEOUT, FACET_CACHE_PARAMS, bump_catalog_version_on_commit, catalog_cache_key, get_catalog_version,
+)
+from redteamcnbackend.conditional import add_validators, not_modified, queryset_validators
+from notifications.fanout import publish_notification
+from notifications.models import Notification, UnreadCounter
+from notifications.push import push_notifications
 
-User = get_user_model()
+# Durée de cache (secondes) du code d'un composant validé
+CODE_CACHE_MAX_AGE = 300
+
+# Nombre max de décisions par appel à review_components_batch
+MAX_BATCH_REVIEW_ITEMS = 500
+
+REVIEW_STATUSES = {'approve': 'approved', 'reject': 'rejected'}
+
+
+def _review_message(component_name, action, reason):
+    message = f"Votre composant '{component_name}' a été {action == 'approve' and 'validé' or 'rejeté'}"
+    message += f" : {reason}" if reason else ""
+    return message[:Notification._meta.get_field('message').max_length]
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -18,26 +44,170 @@ def create_component(request):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+# Import en masse (NDJSON : un composant par ligne)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def import_components_ndjson(request):
+    try:
+        batch_size = int(request.query_params.get('batch_size', IMPORT_BATCH_SIZE))
+    except ValueError:
+        return Response({'error': 'batch_size doit être un entier'}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Lecture ligne à ligne du corps de la requête (request.data n'est pas utilisé)
+    summary = import_components(
+        request.stream or [],
+        request.user,
+        batch_size=batch_size,
+        allow_status=request.user.is_coach(),
+    )
+    if summary['created']:
+        return Response(summary, status=status.HTTP_201_CREATED)
+    if summary['error_count']:
+        return Response(summary, status=status.HTTP_400_BAD_REQUEST)
+    return Response(summary)
+
+# Export en masse du catalogue public (NDJSON en streaming)
 @api_view(['GET'])
 @permission_classes([AllowAny])
-def list_components(request):
-    # Récupérer le filtre
-    category = request.query_params.get('category')
-
-    # Base : seulement les composants validés
+def export_components_ndjson(request):
     components = Component.objects.filter(status='approved')
-
-    # Filtrer par catégorie si demandé
+    category = request.query_params.get('category')
     if category:
         components = components.filter(category=category.upper())
-    
-    # RECHERCHE PAR NOM
-    search = request.query_params.get('search')
-    if search:
-        components = components.filter(name__icontains=search)
 
-    serializer = ComponentSerializer(components, many=True)
-    return Response(serializer.data)
+    response = StreamingHttpResponse(export_components(components), content_type='application/x-ndjson')
+    response['Content-Disposition'] = 'attachment; filename="components.ndjson"'
+    return response
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def list_components(request):
+    # Réponse en cache pour (hôte, catégorie, recherche, curseur) à la version courante du catalogue
+    cache_key = catalog_cache_key(request)
+    cached = cache.get(cache_key)
+
+    if cached is None:
+        # Récupérer le filtre
+        category = request.query_params.get('category')
+
+        # Base : seulement les composants validés (le code est servi à part)
+        components = Component.objects.filter(status='approved')
+
+        # Filtrer par catégorie si demandé
+        if category:
+            components = components.filter(category=category.upper())
+
+        # Pagination par curseur sur (-created_at, -id)
+        paginator = ComponentPagination()
+
+        # RECHERCHE PLEIN TEXTE (nom, description, code), classée par pertinence
+        search = request.query_params.get('search')
+        if search:
+            components = search_components(components, search)
+            paginator.ordering = ('-search_rank', '-id')
+
+        # TRI EXPLICITE (?ordering=-rating), prioritaire sur la pertinence
+        ordering = request.query_params.get('ordering')
+        if ordering:
+            if ordering not in ComponentPagination.orderings:
+                return Response(
+                    {'error': f"ordering doit être parmi : {', '.join(ComponentPagination.orderings)}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            paginator.ordering = ComponentPagination.orderings[ordering]
+
+        validators = queryset_validators(
+            request, components, extra=(get_catalog_version(),), per_user=False,
+        )
+    else:
+        validators, data = cached
+
+    # Client à jour : 304 sans rien sérialiser
+    response = not_modified(request, validators)
+    if response is not None:
+        return response
+
+    if cached is None:
+        components = ComponentListSerializer.setup_eager_loading(components)
+        page = paginator.paginate_queryset(components, request)
+        serializer = ComponentListSerializer(page, many=True)
+        data = paginator.get_paginated_data(list(serializer.data))
+        cache.set(cache_key, (validators, data), CATALOG_CACHE_TIMEOUT)
+    return add_validators(request, Response(data), validators)
+
+# Nombre de composants par catégorie (catalogue public) et par statut
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def list_facets(request):
+    cache_key = catalog_cache_key(request, prefix='catalog:facets', params=FACET_CACHE_PARAMS)
+    data = cache.get(cache_key)
+
+    if data is None:
+        search = request.query_params.get('search')
+        if search:
+            # Une requête groupée sur les résultats de la recherche
+            rows = (
+                search_components(Component.objects.all(), search)
+                .order_by()
+                .values_list('category', 'status')
+                .annotate(total=Count('pk'))
+            )
+            data = CatalogFacetCount.objects.facets(rows)
+        else:
+            # Sans recherche : table de compteurs tenue à jour par les signaux
+            data = CatalogFacetCount.objects.facets()
+        cache.set(cache_key, data, CATALOG_CACHE_TIMEOUT)
+
+    return Response(data)
+
+def _accepts_encoding(request, encoding):
+    """`encoding` figure dans Accept-Encoding avec q > 0"""
+    for item in request.headers.get('Accept-Encoding', '').split(','):
+        name, _, params = item.strip().partition(';')
+        if name.strip().lower() != encoding:
+            continue
+        quality = params.strip().partition('=')[2] if params.strip().startswith('q=') else '1'
+        try:
+            return float(quality) > 0
+        except ValueError:
+            return False
+    return False
+
+# Code brut d'un component (hors listes), avec ETag fort
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def component_code(request, pk):
+    try:
+        component = Component.objects.select_related('code_blob').defer('code_blob__data').get(pk=pk)
+    except Component.DoesNotExist:
+        return Response({'error': 'Component not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    # Public si validé, sinon réservé au créateur
+    is_public = component.status == 'approved'
+    if not is_public and component.created_by_id != request.user.id:
+        return Response({'error': 'Component not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    # Octets compressés servis tels quels si le client accepte leur encodage
+    blob = component.code_blob
+    encoding = blob.encoding if _accepts_encoding(request, blob.encoding) else None
+    etag = f'"{blob.sha256}-{encoding}"' if encoding else f'"{blob.sha256}"'
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        # Le blob n'est chargé qu'ici (pas pour un 304)
+        if encoding:
+            response = HttpResponse(bytes(blob.data), content_type='text/plain; charset=utf-8')
+            response['Content-Encoding'] = encoding
+        else:
+            response = HttpResponse(blob.text, content_type='text/plain; charset=utf-8')
+
+    response['ETag'] = etag
+    patch_vary_headers(response, ['Accept-Encoding'])
+    if is_public:
+        patch_cache_control(response, public=True, max_age=CODE_CACHE_MAX_AGE)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
 
 # Modification d'un component
 @api_view(['PUT'])
@@ -81,16 +251,14 @@ def submit_for_review(request, component_id):
     component.status = 'pending'
     component.save()
 
-    # NOTIFIER LES COACHS
-    coaches = User.objects.filter(role='coach')
-    for coach in coaches:
-        Notification.objects.create(
-            recipient=coach,
-            actor=request.user,
-            verb='component_submitted',
-            target=component,
-            message=f"{request.user.email} a soumis '{component.name}' pour validation"
-        )
+    # NOTIFIER LES COACHS : un seul événement, diffusé par le worker
+    publish_notification(
+        verb='component_submitted',
+        actor_id=request.user.id,
+        target_id=component.id,
+        message=f"{request.user.email} a soumis '{component.name}' pour validation",
+        recipients={'role': 'coach'},
+    )
 
     return Response({'message': 'Soumis pour validation'})
 
@@ -119,13 +287,12 @@ def review_component(request, component_id):
     component.save()
 
     # NOTIFIER LE DEVELOPER
-    Notification.objects.create(
-        recipient=component.created_by,
-        actor=request.user,
+    publish_notification(
         verb='component_reviewed',
-        target=component,
-        message=f"Votre composant '{component.name}' a été {action == 'approve' and 'validé' or 'rejeté'}"
-        + (f" : {reason}" if reason else "")
+        actor_id=request.user.id,
+        target_id=component.id,
+        message=_review_message(component.name, action, reason),
+        recipients={'ids': [component.created_by_id]},
     )
 
     return Response({
@@ -133,15 +300,116 @@ def review_component(request, component_id):
         'status': component.status
     })
 
+# Validation / rejet en lot par un Coach (une seule transaction)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def review_components_batch(request):
+    """
+    Body: {"items": [{"id": 12, "action": "approve"}, {"id": 13, "action": "reject", "reason": "..."}]}
+
+    Renvoie un résultat par élément, dans l'ordre : {"id", "status"} ou {"id", "error"}.
+    """
+    if request.user.role != 'coach':
+        return Response(
+            {'error': 'Seuls les Coachs peuvent valider/rejeter'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    items = request.data.get('items')
+    if not isinstance(items, list) or not items:
+        return Response({'error': 'items doit être une liste non vide'}, status=400)
+    if len(items) > MAX_BATCH_REVIEW_ITEMS:
+        return Response({'error': f'{MAX_BATCH_REVIEW_ITEMS} éléments maximum'}, status=400)
+
+    # Validation des éléments (sans requête)
+    results = []
+    decisions = {}
+    for item in items:
+        item = item if isinstance(item, dict) else {}
+        component_id, action = item.get('id'), item.get('action')
+        if not isinstance(component_id, int) or isinstance(component_id, bool):
+            results.append({'id': component_id, 'error': 'id invalide'})
+        elif action not in REVIEW_STATUSES:
+            results.append({'id': component_id, 'error': 'action doit être "approve" ou "reject"'})
+        elif component_id in decisions:
+            results.append({'id': component_id, 'error': 'Composant en double dans le lot'})
+        else:
+            decisions[component_id] = (action, str(item.get('reason') or ''))
+            results.append({'id': component_id})
+
+    with transaction.atomic():
+        # Verrouille les composants encore en attente
+        pending = {
+            component.id: component
+            for component in Component.objects.select_for_update()
+            .filter(id__in=decisions, status='pending')
+            .only('id', 'name', 'category', 'created_by_id')
+        }
+
+        # UPDATE ... WHERE status='pending', un par action
+        now = timezone.now()
+        facet_changes = {}
+        for action, new_status in REVIEW_STATUSES.items():
+            ids = [pk for pk, (chosen, _) in decisions.items() if chosen == action and pk in pending]
+            if ids:
+                Component.objects.filter(id__in=ids, status='pending').update(status=new_status, updated_at=now)
+            for pk in ids:
+                category = pending[pk].category
+                facet_changes[category, 'pending'] = facet_changes.get((category, 'pending'), 0) - 1
+                facet_changes[category, new_status] = facet_changes.get((category, new_status), 0) + 1
+        CatalogFacetCount.objects.adjust(facet_changes)
+
+        # NOTIFIER LES DEVELOPERS (messages distincts : insertion directe)
+        notifications = Notification.objects.bulk_create([
+            Notification(
+                recipient_id=component.created_by_id,
+                actor=request.user,
+                verb='component_reviewed',
+                target=component,
+                message=_review_message(component.name, *decisions[pk]),
+            )
+            for pk, component in pending.items()
+        ])
+        # bulk_create n'envoie pas post_save : compteurs de non lues à la main
+        unread = {}
+        for notification in notifications:
+            unread[notification.recipient_id] = unread.get(notification.recipient_id, 0) + 1
+        UnreadCounter.objects.adjust(unread)
+        transaction.on_commit(lambda: push_notifications(notifications))
+
+        if pending:
+            # update() n'envoie pas post_save : invalider le cache du catalogue
+            # (les compteurs de facettes sont ajustés ci-dessus)
+            bump_catalog_version_on_commit()
+
+    for result in results:
+        if 'error' in result:
+            continue
+        if result['id'] in pending:
+            result['status'] = REVIEW_STATUSES[decisions[result['id']][0]]
+        else:
+            result['error'] = 'Composant non trouvé ou non en attente'
+
+    return Response({
+        'processed': len(pending),
+        'results': results,
+    })
+
 # Permettre à l'utilisateur de voir tous ses composants
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def my_components(request):
     # Tous les composants du user connecté
     components = Component.objects.filter(created_by=request.user)
-    
-    # Optionnel : trier par date
-    components = components.order_by('-created_at')
 
-    serializer = ComponentSerializer(components, many=True)
-    return Response(serializer.data)
\ No newline at end of file
+    validators = queryset_validators(request, components)
+    response = not_modified(request, validators)
+    if response is not None:
+        return response
+
+    # Tri (-created_at, -id) appliqué par la pagination
+    paginator = ComponentPagination()
+    components = ComponentListSerializer.setup_eager_loading(components)
+    page = paginator.paginate_queryset(components, request)
+    serializer = ComponentListSerializer(page, many=True)
+    return add_validators(request, paginator.get_paginated_response(serializer.data), validators)
\ No newline at end of file
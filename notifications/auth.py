@@ -0,0 +1,38 @@
+"""
+Authentification des WebSockets par jeton d'accès SimpleJWT.
+
+Les navigateurs ne permettent pas d'ajouter un en-tête Authorization à
+une connexion WebSocket : le jeton est passé dans la query string
+(`ws/notifications/?token=<access>`), puis validé comme le ferait
+`CachedJWTAuthentication` pour l'API HTTP.
+"""
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+
+from users.authentication import CachedJWTAuthentication
+
+
+@database_sync_to_async
+def get_user_for_token(raw_token):
+    authentication = CachedJWTAuthentication()
+    try:
+        validated = authentication.get_validated_token(raw_token)
+        return authentication.get_user(validated)
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return AnonymousUser()
+
+
+class JWTAuthMiddleware:
+    """Renseigne `scope['user']` à partir du paramètre `token`"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        params = parse_qs(scope.get('query_string', b'').decode())
+        token = (params.get('token') or [None])[0]
+        scope = dict(scope, user=await get_user_for_token(token) if token else AnonymousUser())
+        return await self.app(scope, receive, send)
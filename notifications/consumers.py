@@ -0,0 +1,42 @@
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .push import unread_counts, user_group
+
+# Code de fermeture : jeton absent ou invalide
+CLOSE_UNAUTHENTICATED = 4401
+
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    """
+    ws/notifications/?token=<access>
+
+    Envoie au client :
+        {"type": "unread_count", "unread_count": 3}             à la connexion et à chaque changement
+        {"type": "notification", "notification": {...}, "unread_count": 4}
+    """
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(code=CLOSE_UNAUTHENTICATED)
+            return
+        self.group_name = user_group(user.pk)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        counts = await database_sync_to_async(unread_counts)([user.pk])
+        await self.send_json({'type': 'unread_count', 'unread_count': counts[user.pk]})
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def notification_created(self, event):
+        await self.send_json({
+            'type': 'notification',
+            'notification': event['notification'],
+            'unread_count': event['unread_count'],
+        })
+
+    async def unread_count(self, event):
+        await self.send_json({'type': 'unread_count', 'unread_count': event['unread_count']})
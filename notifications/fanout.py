@@ -0,0 +1,32 @@
+"""
+Diffusion des notifications hors du cycle requête/réponse.
+
+La vue (ou le signal) publie un seul événement après le commit ; la tâche
+`notifications.tasks.fanout_notification` résout les destinataires et
+insère leurs lignes par lots (`bulk_create`). L'écriture HTTP ne dépend
+donc plus du nombre de destinataires.
+
+Destinataires (`recipients`), au choix :
+    {'ids': [1, 2, 3]}             utilisateurs donnés
+    {'role': 'coach'}              tous les utilisateurs actifs d'un rôle
+    {'component_owner': 12}        créateur d'un composant
+"""
+from django.db import transaction
+
+from .tasks import fanout_notification
+
+
+def publish_notification(verb, actor_id, message, recipients, target_id=None, review_id=None, exclude_actor=False):
+    """Programme la diffusion d'un événement au commit de la transaction courante."""
+    event = {
+        'verb': verb,
+        'actor_id': actor_id,
+        'target_id': target_id,
+        'review_id': review_id,
+        'message': message,
+        'recipients': recipients,
+        'exclude_actor': exclude_actor,
+    }
+    # Après le commit : le worker doit voir les lignes référencées
+    transaction.on_commit(lambda: fanout_notification.delay(event))
+    return event
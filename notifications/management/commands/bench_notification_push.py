@@ -0,0 +1,85 @@
+import asyncio
+import statistics
+import time
+
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.tokens import AccessToken
+
+from notifications.tasks import fanout_notification
+from redteamcnbackend.asgi import application
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure l'envoi temps réel des notifications à N clients WebSocket "
+        "connectés simultanément (couche de canaux configurée). Les "
+        "utilisateurs créés pour l'occasion sont supprimés à la fin."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=500)
+        parser.add_argument('--rounds', type=int, default=3)
+        parser.add_argument('--timeout', type=float, default=30.0)
+
+    def handle(self, *args, **options):
+        # Pas de transaction englobante : channels ferme les connexions
+        # hors autocommit (close_old_connections) autour de chaque accès base
+        actor = User.objects.create_user(email='bench-push@redteamcn.local', username='bench-push')
+        users = User.objects.bulk_create([
+            User(email=f'bench-push-{index}@redteamcn.local', username=f'bench-push-{index}')
+            for index in range(options['clients'])
+        ])
+        try:
+            tokens = [str(AccessToken.for_user(user)) for user in users]
+            async_to_sync(self._run)(actor, users, tokens, options)
+        finally:
+            # Notifications supprimées en cascade
+            User.objects.filter(email__startswith='bench-push', email__endswith='@redteamcn.local').delete()
+
+    async def _run(self, actor, users, tokens, options):
+        timeout = options['timeout']
+        clients = [
+            WebsocketCommunicator(
+                application, f'/ws/notifications/?token={token}', headers=[(b'origin', b'http://localhost')],
+            )
+            for token in tokens
+        ]
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(client.connect(timeout=timeout) for client in clients))
+        if not all(connected for connected, _ in results):
+            raise RuntimeError('Connexion refusée pour au moins un client')
+        # Compteur initial envoyé à la connexion
+        await asyncio.gather(*(client.receive_json_from(timeout) for client in clients))
+        self.stdout.write(f"{len(clients)} clients connectés en {time.perf_counter() - started:.2f}s")
+
+        event = {
+            'verb': 'component_submitted',
+            'actor_id': actor.pk,
+            'target_id': None,
+            'review_id': None,
+            'message': 'Benchmark',
+            'recipients': {'ids': [user.pk for user in users]},
+            'exclude_actor': False,
+        }
+        for index in range(options['rounds']):
+            started = time.perf_counter()
+
+            async def delivered(client):
+                await client.receive_json_from(timeout)
+                return (time.perf_counter() - started) * 1000
+
+            waiting = [asyncio.ensure_future(delivered(client)) for client in clients]
+            await sync_to_async(fanout_notification)(event)
+            latencies = sorted(await asyncio.gather(*waiting))
+            self.stdout.write(
+                f"tour {index + 1} : p50 {statistics.median(latencies):8.1f} ms   "
+                f"p95 {latencies[int(len(latencies) * 0.95) - 1]:8.1f} ms   max {latencies[-1]:8.1f} ms"
+            )
+
+        await asyncio.gather(*(client.disconnect() for client in clients))
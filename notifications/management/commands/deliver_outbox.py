@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.outbox import BATCH_SIZE, deliver_pending, outbox_metrics
+
+
+class Command(BaseCommand):
+    help = (
+        "Envoie les emails en attente de l'outbox, par lots sur une connexion "
+        "réutilisée. --loop : worker permanent (sans Celery)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help="Ne pas s'arrêter quand la file est vide")
+        parser.add_argument('--interval', type=float, default=5.0, help="Attente (secondes) quand la file est vide")
+        parser.add_argument('--metrics', action='store_true', help="Afficher l'état de la file et quitter")
+
+    def handle(self, *args, **options):
+        if options['metrics']:
+            for name, value in outbox_metrics().items():
+                self.stdout.write(f"{name}: {value}")
+            return
+
+        while True:
+            result = deliver_pending(batch_size=max(1, options['batch_size']))
+            if result['batches']:
+                self.stdout.write(f"{result['sent']} email(s) envoyé(s), {result['failed']} échec(s)")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
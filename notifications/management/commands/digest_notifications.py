@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from notifications.tasks import digest_notifications
+
+
+class Command(BaseCommand):
+    help = "Fusionne les notifications non lues identiques (destinataire, verbe, composant)."
+
+    def handle(self, *args, **options):
+        removed = digest_notifications()
+        self.stdout.write(self.style.SUCCESS(f"{removed} notification(s) fusionnée(s)"))
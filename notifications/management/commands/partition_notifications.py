@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from notifications.partitioning import PartitioningUnavailable, convert_to_partitioned, ensure_partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "PostgreSQL : partitionne la table des notifications par mois "
+        "(--setup, une seule fois) puis crée les partitions à venir."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--setup', action='store_true', help="Convertir la table existante (verrou exclusif)")
+        parser.add_argument('--months-ahead', type=int, default=3)
+
+    def handle(self, *args, **options):
+        try:
+            if options['setup']:
+                partitions = convert_to_partitioned(options['months_ahead'])
+            else:
+                partitions = ensure_partitions(options['months_ahead'])
+        except PartitioningUnavailable as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(f"{len(partitions)} partition(s) mensuelle(s) en place"))
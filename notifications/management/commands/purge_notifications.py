@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from notifications.retention import ARCHIVE_DIR, PURGE_CHUNK_SIZE, RETENTION_DAYS, purge_read_notifications
+
+
+class Command(BaseCommand):
+    help = (
+        "Archive (JSONL gzip) puis supprime par lots les notifications lues "
+        "plus anciennes que la durée de rétention."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=RETENTION_DAYS)
+        parser.add_argument('--chunk-size', type=int, default=PURGE_CHUNK_SIZE)
+        parser.add_argument('--archive-dir', default=ARCHIVE_DIR, help="Dossier des archives ('' : pas d'archive)")
+        parser.add_argument('--no-archive', action='store_true')
+        parser.add_argument('--pause', type=float, default=0.0, help="Pause (secondes) entre deux lots")
+        parser.add_argument('--dry-run', action='store_true', help="Compter seulement")
+
+    def handle(self, *args, **options):
+        result = purge_read_notifications(
+            days=options['days'],
+            chunk_size=max(1, options['chunk_size']),
+            archive_dir='' if options['no_archive'] else options['archive_dir'],
+            pause=options['pause'],
+            dry_run=options['dry_run'],
+        )
+        if options['dry_run']:
+            self.stdout.write(f"{result['deleted']} notification(s) à purger")
+            return
+        self.stdout.write(self.style.SUCCESS(f"{result['deleted']} notification(s) supprimée(s)"))
+        if result['archive']:
+            self.stdout.write(f"Archive : {result['archive']}")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from notifications.models import UnreadCounter
+
+
+class Command(BaseCommand):
+    help = "Recalcule les compteurs de notifications non lues qui ont dérivé."
+
+    def handle(self, *args, **options):
+        fixed = UnreadCounter.objects.reconcile()
+        self.stdout.write(self.style.SUCCESS(f"{fixed} compteur(s) corrigé(s)"))
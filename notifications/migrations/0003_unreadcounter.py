@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_unread_counters(apps, schema_editor):
+    Notification = apps.get_model('notifications', 'Notification')
+    UnreadCounter = apps.get_model('notifications', 'UnreadCounter')
+    rows = (
+        Notification.objects.filter(is_read=False)
+        .order_by()
+        .values_list('recipient_id')
+        .annotate(total=Count('id'))
+    )
+    UnreadCounter.objects.bulk_create(
+        [UnreadCounter(user_id=user_id, count=total) for user_id, total in rows.iterator()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_notification_notif_recipient_recent_idx_and_more'),
+        ('users', '0004_alter_user_managers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnreadCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='unread_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(fill_unread_counters, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F
 from django.contrib.auth import get_user_model
 from catalog.models import Component
 from reviews.models import Review
@@ -17,11 +18,149 @@ class Notification(models.Model):
     target = models.ForeignKey(Component, on_delete=models.CASCADE, null=True, blank=True)
     review = models.ForeignKey(Review, on_delete=models.CASCADE, null=True, blank=True)
     message = models.CharField(max_length=255)
+    # Événements identiques regroupés dans cette ligne (voir notifications.tasks)
+    occurrences = models.PositiveIntegerField(default=1)
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Liste des notifications d'un utilisateur
+            models.Index(fields=['recipient', '-created_at', '-id'], name='notif_recipient_recent_idx'),
+            # Non lues (compteur, filtres) : index partiel, couvrant pour COUNT(*)
+            models.Index(
+                fields=['recipient', '-created_at'],
+                condition=models.Q(is_read=False),
+                name='notif_unread_idx',
+            ),
+        ]
 
     def __str__(self):
-        return f"{self.actor} {self.get_verb_display()} sur {self.target}"
\ No newline at end of file
+        return f"{self.actor} {self.get_verb_display()} sur {self.target}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # État lu en base, pour ajuster le compteur de non lues à la modification
+        if 'is_read' in field_names:
+            instance._loaded_is_read = instance.is_read
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Compteur de non lues (signal post_save) dans la même transaction
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+
+class UnreadCounterManager(models.Manager):
+
+    def adjust(self, changes):
+        """
+        Applique des variations {user_id: delta} (un UPDATE par utilisateur).
+        Seules les hausses créent la ligne : une baisse sans ligne (ex:
+        suppression en cascade d'un utilisateur) n'a rien à corriger.
+        """
+        changes = {user_id: delta for user_id, delta in changes.items() if delta}
+        if not changes:
+            return
+        with transaction.atomic(using=self.db):
+            self.bulk_create(
+                [self.model(user_id=user_id) for user_id, delta in changes.items() if delta > 0],
+                ignore_conflicts=True,
+            )
+            for user_id, delta in changes.items():
+                self.filter(user_id=user_id).update(count=F('count') + delta)
+
+    def get_count(self, user_id):
+        count = self.filter(user_id=user_id).values_list('count', flat=True).first()
+        return max(count or 0, 0)
+
+    def get_counts(self, user_ids):
+        """{user_id: nombre de non lues}, en une requête"""
+        counts = dict.fromkeys(user_ids, 0)
+        counts.update(
+            (user_id, max(count, 0))
+            for user_id, count in self.filter(user_id__in=counts).values_list('user_id', 'count')
+        )
+        return counts
+
+    def reconcile(self, user_ids=None):
+        """
+        Recalcule les compteurs faux depuis `Notification` et renvoie le
+        nombre de compteurs corrigés. Chaque correction verrouille le
+        compteur et recompte : les écritures concurrentes restent exactes.
+        """
+        notifications = Notification.objects.filter(is_read=False)
+        counters = self.all()
+        if user_ids is not None:
+            notifications = notifications.filter(recipient_id__in=user_ids)
+            counters = counters.filter(user_id__in=user_ids)
+
+        actual = dict(
+            notifications.order_by().values_list('recipient_id').annotate(total=Count('pk'))
+        )
+        stored = dict(counters.values_list('user_id', 'count'))
+        drifted = {user_id for user_id in actual.keys() | stored.keys() if actual.get(user_id, 0) != stored.get(user_id, 0)}
+
+        for user_id in drifted:
+            with transaction.atomic(using=self.db):
+                self.bulk_create([self.model(user_id=user_id)], ignore_conflicts=True)
+                self.select_for_update().filter(user_id=user_id).first()
+                count = Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+                self.filter(user_id=user_id).update(count=count)
+        return len(drifted)
+
+
+class UnreadCounter(models.Model):
+    """
+    Nombre de notifications non lues d'un utilisateur, maintenu dans la
+    transaction qui crée, lit ou supprime ses notifications (voir
+    `notifications.signals`) : `unread_count` ne fait plus de COUNT(*).
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='unread_counter')
+    count = models.IntegerField(default=0)
+
+    objects = UnreadCounterManager()
+
+    def __str__(self):
+        return f"{self.user_id}: {self.count}"
+
+class OutboxEmail(models.Model):
+    """
+    Email à envoyer, écrit dans la transaction de la requête et envoyé par
+    un worker (voir `notifications.outbox`) : la requête n'attend ni SMTP
+    ni le fournisseur, et un email n'est envoyé que si la transaction qui
+    l'a produit est validée.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'En attente'),
+        ('sent', 'Envoyé'),
+        ('failed', 'Abandonné'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True)
+    recipients = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Prochain essai ; repoussé pendant un envoi (bail) puis selon le backoff
+    next_attempt_at = models.DateTimeField()
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['next_attempt_at']
+        indexes = [
+            # File d'attente : emails en attente dont l'essai est dû
+            models.Index(
+                fields=['next_attempt_at', 'id'],
+                condition=models.Q(status='pending'),
+                name='outbox_pending_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
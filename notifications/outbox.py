@@ -0,0 +1,193 @@
+"""
+Outbox des emails transactionnels.
+
+`enqueue_email` écrit une ligne `OutboxEmail` dans la transaction en cours
+et demande un envoi au commit (tâche Celery `deliver_outbox`). En mode
+eager (CELERY_TASK_ALWAYS_EAGER, broker `memory://`), la tâche tournerait
+dans la requête elle-même : la file est alors vidée au commit dans un
+thread à part, sans retarder la réponse. Le worker
+réserve un lot d'emails dus (bail de EMAIL_OUTBOX_LEASE secondes, sans
+bloquer les autres workers grâce à SKIP LOCKED sous PostgreSQL), puis les
+envoie sur une seule connexion au backend d'email. En cas d'échec, l'essai
+suivant est repoussé de façon exponentielle (EMAIL_OUTBOX_BACKOFF, plafonné
+à EMAIL_OUTBOX_BACKOFF_MAX) ; après EMAIL_OUTBOX_MAX_ATTEMPTS essais,
+l'email passe en `failed`.
+
+Livraison au moins une fois : si le worker s'arrête entre l'envoi et la
+mise à jour, l'email est renvoyé à l'expiration du bail.
+"""
+import logging
+import random
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.db.models import Avg, Count, F, Max, Min, Q
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 100)
+MAX_ATTEMPTS = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+BACKOFF = getattr(settings, 'EMAIL_OUTBOX_BACKOFF', 60)
+BACKOFF_MAX = getattr(settings, 'EMAIL_OUTBOX_BACKOFF_MAX', 3600)
+LEASE = getattr(settings, 'EMAIL_OUTBOX_LEASE', 300)
+# Tâches exécutées sur place : envoi dans un thread plutôt que par Celery
+EAGER = getattr(settings, 'CELERY_TASK_ALWAYS_EAGER', False)
+
+
+def enqueue_email(subject, message, recipient_list, from_email=None):
+    """Équivalent de `send_mail`, sans attendre l'envoi"""
+    email = OutboxEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or '',
+        recipients=list(recipient_list),
+        next_attempt_at=timezone.now(),
+    )
+
+    def deliver():
+        from .tasks import deliver_outbox
+        deliver_outbox.delay()
+
+    transaction.on_commit(deliver_in_background if EAGER else deliver)
+    return email
+
+
+def deliver_in_background():
+    """Vide la file hors de la requête (mode eager, sans worker Celery)"""
+    def run():
+        try:
+            deliver_pending()
+        except Exception:
+            logger.exception("Outbox : échec de l'envoi en arrière-plan")
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=run, name='outbox-delivery', daemon=True)
+    thread.start()
+    return thread
+
+
+def backoff_delay(attempts):
+    """Délai avant l'essai suivant : BACKOFF * 2^(essais-1), plafonné, ±10 %"""
+    delay = min(BACKOFF * 2 ** max(attempts - 1, 0), BACKOFF_MAX)
+    return timedelta(seconds=delay * random.uniform(0.9, 1.1))
+
+
+def claim_batch(batch_size=BATCH_SIZE, now=None):
+    """Réserve les emails dus (bail) et renvoie leurs lignes"""
+    now = now or timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutboxEmail.objects.filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')
+            .select_for_update(skip_locked=True)[:batch_size]
+        )
+        if emails:
+            OutboxEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+                attempts=F('attempts') + 1,
+                next_attempt_at=now + timedelta(seconds=LEASE),
+            )
+    for email in emails:
+        email.attempts += 1
+    return emails
+
+
+def send_batch(emails, connection=None):
+    """Envoie les emails sur une seule connexion ; renvoie (envoyés, échecs {email: erreur})"""
+    connection = connection or get_connection()
+    sent, failed = [], {}
+    try:
+        connection.open()
+    except Exception as error:
+        # Backend injoignable : tout le lot est repoussé
+        return sent, {email: error for email in emails}
+    try:
+        for email in emails:
+            message = EmailMessage(
+                subject=email.subject,
+                body=email.body,
+                from_email=email.from_email or None,
+                to=email.recipients,
+                connection=connection,
+            )
+            try:
+                message.send()
+            except Exception as error:
+                failed[email] = error
+            else:
+                sent.append(email)
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def record_results(sent, failed, now=None):
+    now = now or timezone.now()
+    if sent:
+        OutboxEmail.objects.filter(pk__in=[email.pk for email in sent]).update(status='sent', sent_at=now)
+    for email, error in failed.items():
+        email.last_error = f'{type(error).__name__}: {error}'[:2000]
+        if email.attempts >= MAX_ATTEMPTS:
+            email.status = 'failed'
+            logger.error(f"Email {email.pk} abandonné après {email.attempts} essais : {email.last_error}")
+        else:
+            email.next_attempt_at = now + backoff_delay(email.attempts)
+    if failed:
+        OutboxEmail.objects.bulk_update(failed, ['status', 'next_attempt_at', 'last_error'])
+
+
+def deliver_pending(batch_size=BATCH_SIZE, max_batches=None):
+    """
+    Vide la file (lots de `batch_size`) ; renvoie {'sent', 'failed', 'batches'}.
+    `failed` compte les essais en échec (repoussés ou abandonnés).
+    """
+    totals = {'sent': 0, 'failed': 0, 'batches': 0}
+    while max_batches is None or totals['batches'] < max_batches:
+        emails = claim_batch(batch_size)
+        if not emails:
+            break
+        started = time.perf_counter()
+        sent, failed = send_batch(emails)
+        record_results(sent, failed)
+        logger.info(
+            f"Outbox : {len(sent)} envoyé(s), {len(failed)} échec(s) en {time.perf_counter() - started:.2f}s"
+        )
+        totals['sent'] += len(sent)
+        totals['failed'] += len(failed)
+        totals['batches'] += 1
+    return totals
+
+
+def outbox_metrics(window=timedelta(hours=1)):
+    """
+    Profondeur de la file et latence d'envoi (création -> envoi) des
+    emails envoyés pendant `window`.
+    """
+    now = timezone.now()
+    queue = OutboxEmail.objects.filter(status='pending').aggregate(
+        pending=Count('pk'),
+        due=Count('pk', filter=Q(next_attempt_at__lte=now)),
+        retrying=Count('pk', filter=Q(attempts__gt=0)),
+        oldest=Min('created_at'),
+    )
+    latency = OutboxEmail.objects.filter(status='sent', sent_at__gte=now - window).aggregate(
+        sent=Count('pk'),
+        avg=Avg(F('sent_at') - F('created_at')),
+        max=Max(F('sent_at') - F('created_at')),
+    )
+    oldest = queue.pop('oldest')
+    return {
+        **queue,
+        'failed': OutboxEmail.objects.filter(status='failed').count(),
+        'oldest_pending_age_s': round((now - oldest).total_seconds(), 1) if oldest else None,
+        'sent_last_window': latency['sent'],
+        'avg_send_latency_s': round(latency['avg'].total_seconds(), 3) if latency['avg'] else None,
+        'max_send_latency_s': round(latency['max'].total_seconds(), 3) if latency['max'] else None,
+    }
@@ -0,0 +1,151 @@
+"""
+Partitionnement mensuel (RANGE sur `created_at`) de la table des
+notifications, PostgreSQL uniquement et optionnel.
+
+`convert_to_partitioned()` remplace la table par une table partitionnée
+(clé primaire (id, created_at), obligatoire pour une table partitionnée),
+recopie les lignes dans une partition par mois, puis recrée index et clés
+étrangères. `ensure_partitions()` crée à l'avance les partitions des mois
+à venir ; une partition DEFAULT reçoit tout ce qui tomberait hors plage.
+
+Les listes récentes ne lisent ainsi que les partitions récentes, et les
+vieux mois restent dans des partitions froides.
+"""
+from datetime import date, datetime, time
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Notification
+
+TABLE = Notification._meta.db_table
+DEFAULT_PARTITION = f'{TABLE}_default'
+
+
+class PartitioningUnavailable(Exception):
+    pass
+
+
+def _month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def _next_month(value):
+    return date(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def _bound(value):
+    return timezone.make_aware(datetime.combine(value, time.min)).isoformat()
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month:%Y_%m}'
+
+
+def _check_vendor():
+    if connection.vendor != 'postgresql':
+        raise PartitioningUnavailable('Partitionnement disponible sur PostgreSQL uniquement')
+
+
+def is_partitioned(cursor):
+    cursor.execute('SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)', [TABLE])
+    row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def _create_partitions(cursor, first_month, last_month):
+    quote = connection.ops.quote_name
+    created = []
+    month = first_month
+    while month <= last_month:
+        name = partition_name(month)
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS {quote(name)} PARTITION OF {quote(TABLE)} '
+            f'FOR VALUES FROM (%s) TO (%s)',
+            [_bound(month), _bound(_next_month(month))],
+        )
+        created.append(name)
+        month = _next_month(month)
+    cursor.execute(f'CREATE TABLE IF NOT EXISTS {quote(DEFAULT_PARTITION)} PARTITION OF {quote(TABLE)} DEFAULT')
+    return created
+
+
+def _months_ahead(months):
+    month = _month_start(timezone.now())
+    for _ in range(months):
+        month = _next_month(month)
+    return month
+
+
+def ensure_partitions(months_ahead=3):
+    """Crée les partitions du mois courant et des `months_ahead` suivants"""
+    _check_vendor()
+    with transaction.atomic(), connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            raise PartitioningUnavailable(f'{TABLE} n\'est pas partitionnée (voir --setup)')
+        return _create_partitions(cursor, _month_start(timezone.now()), _months_ahead(months_ahead))
+
+
+def convert_to_partitioned(months_ahead=3):
+    """
+    Convertit la table existante (verrou exclusif le temps de la copie :
+    à lancer pendant une fenêtre de maintenance). Renvoie les partitions créées.
+    """
+    _check_vendor()
+    quote = connection.ops.quote_name
+    legacy = f'{TABLE}_legacy'
+    columns = ', '.join(quote(field.column) for field in Notification._meta.concrete_fields)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        if is_partitioned(cursor):
+            raise PartitioningUnavailable(f'{TABLE} est déjà partitionnée')
+
+        cursor.execute(f'LOCK TABLE {quote(TABLE)} IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'SELECT MIN(created_at) FROM {quote(TABLE)}')
+        oldest = cursor.fetchone()[0] or timezone.now()
+        cursor.execute(f'ALTER TABLE {quote(TABLE)} RENAME TO {quote(legacy)}')
+
+        # Colonnes, valeurs par défaut et identité ; index et contraintes recréés plus bas
+        cursor.execute(
+            f'CREATE TABLE {quote(TABLE)} (LIKE {quote(legacy)} INCLUDING DEFAULTS INCLUDING IDENTITY) '
+            f'PARTITION BY RANGE (created_at)'
+        )
+        partitions = _create_partitions(cursor, _month_start(oldest), _months_ahead(months_ahead))
+        cursor.execute(
+            f'INSERT INTO {quote(TABLE)} ({columns}) OVERRIDING SYSTEM VALUE '
+            f'SELECT {columns} FROM {quote(legacy)}'
+        )
+
+        # Séquence de l'id : reprise après le plus grand id copié
+        cursor.execute('SELECT pg_get_serial_sequence(%s, %s)', [legacy, 'id'])
+        legacy_sequence = cursor.fetchone()[0]
+        cursor.execute('SELECT pg_get_serial_sequence(%s, %s)', [TABLE, 'id'])
+        sequence = cursor.fetchone()[0]
+        if sequence is None or sequence == legacy_sequence:
+            # Colonne serial : la séquence de l'ancienne table est réutilisée
+            sequence = legacy_sequence
+            cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY {quote(TABLE)}.id')
+        cursor.execute(f'SELECT setval(%s, COALESCE((SELECT MAX(id) FROM {quote(TABLE)}), 0) + 1, false)', [sequence])
+
+        cursor.execute(f'DROP TABLE {quote(legacy)}')
+        cursor.execute(f'ALTER TABLE {quote(TABLE)} ADD CONSTRAINT {quote(TABLE + "_pkey")} PRIMARY KEY (id, created_at)')
+
+        for field in Notification._meta.concrete_fields:
+            if field.remote_field is None:
+                continue
+            target = field.target_field
+            cursor.execute(
+                f'ALTER TABLE {quote(TABLE)} ADD CONSTRAINT {quote(f"{TABLE}_{field.column}_fk")} '
+                f'FOREIGN KEY ({quote(field.column)}) '
+                f'REFERENCES {quote(target.model._meta.db_table)} ({quote(target.column)}) '
+                f'DEFERRABLE INITIALLY DEFERRED'
+            )
+            if field.db_index:
+                cursor.execute(
+                    f'CREATE INDEX {quote(f"{TABLE}_{field.column}_idx")} ON {quote(TABLE)} ({quote(field.column)})'
+                )
+
+    with connection.schema_editor() as editor:
+        for index in Notification._meta.indexes:
+            editor.add_index(Notification, index)
+    return partitions
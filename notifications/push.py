@@ -0,0 +1,46 @@
+"""
+Envoi en temps réel vers les WebSockets (`notifications.consumers`).
+
+Chaque utilisateur connecté rejoint le groupe `user_group(user_id)`.
+Sans couche de canaux configurée, l'envoi est simplement ignoré.
+"""
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+from .models import UnreadCounter
+from .serializers import NotificationSerializer
+
+
+def user_group(user_id):
+    return f'notifications.user.{user_id}'
+
+
+def unread_counts(user_ids):
+    """{user_id: nombre de non lues}, lus dans les compteurs"""
+    return UnreadCounter.objects.get_counts(user_ids)
+
+
+def push_notifications(notifications):
+    """Envoie chaque notification (relations chargées) et le nouveau compteur de son destinataire"""
+    channel_layer = get_channel_layer()
+    if channel_layer is None or not notifications:
+        return
+    counts = unread_counts({notification.recipient_id for notification in notifications})
+    for notification in notifications:
+        async_to_sync(channel_layer.group_send)(user_group(notification.recipient_id), {
+            'type': 'notification.created',
+            'notification': NotificationSerializer(notification).data,
+            'unread_count': counts[notification.recipient_id],
+        })
+
+
+def push_unread_count(user_id, count=None):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    if count is None:
+        count = unread_counts([user_id])[user_id]
+    async_to_sync(channel_layer.group_send)(user_group(user_id), {
+        'type': 'unread.count',
+        'unread_count': count,
+    })
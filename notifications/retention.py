@@ -0,0 +1,89 @@
+"""
+Rétention des notifications lues : archivage puis suppression par lots.
+
+Chaque lot (au plus `chunk_size` lignes, par clé primaire croissante) est
+écrit dans un fichier JSONL compressé (gzip), puis supprimé dans sa propre
+transaction courte : aucun verrou n'est gardé sur toute la purge. Une
+ligne est écrite dans l'archive avant sa suppression ; en cas d'arrêt
+brutal entre les deux, elle peut figurer deux fois dans les archives
+(au moins une fois, jamais perdue).
+
+Les notifications non lues ne sont jamais purgées : les compteurs de non
+lues n'ont donc pas à être ajustés.
+"""
+import gzip
+import json
+import time
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification
+
+RETENTION_DAYS = getattr(settings, 'NOTIFICATION_RETENTION_DAYS', 90)
+PURGE_CHUNK_SIZE = getattr(settings, 'NOTIFICATION_PURGE_CHUNK_SIZE', 1000)
+ARCHIVE_DIR = getattr(settings, 'NOTIFICATION_ARCHIVE_DIR', '')
+
+ARCHIVED_FIELDS = [field.attname for field in Notification._meta.concrete_fields]
+
+
+def expired_notifications(days=RETENTION_DAYS, now=None):
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    return Notification.objects.filter(is_read=True, created_at__lt=cutoff)
+
+
+def archive_path(archive_dir, now=None):
+    # Suffixe aléatoire : deux purges à la même date n'écrivent pas le même fichier
+    stamp = (now or timezone.now()).strftime('%Y%m%dT%H%M%S%f')
+    return Path(archive_dir) / f'notifications-{stamp}-{uuid.uuid4().hex[:8]}.jsonl.gz'
+
+
+def purge_read_notifications(days=RETENTION_DAYS, chunk_size=PURGE_CHUNK_SIZE, archive_dir=ARCHIVE_DIR,
+                             pause=0.0, dry_run=False, now=None):
+    """
+    Archive (si `archive_dir`) puis supprime les notifications lues de plus
+    de `days` jours. Renvoie {'deleted': int, 'archive': chemin ou None}.
+    """
+    now = now or timezone.now()
+    queryset = expired_notifications(days, now)
+    if dry_run:
+        return {'deleted': queryset.count(), 'archive': None}
+
+    path = archive_path(archive_dir, now) if archive_dir else None
+    archive = None
+    deleted, last_pk = 0, 0
+    try:
+        while True:
+            with transaction.atomic():
+                rows = list(
+                    queryset.filter(pk__gt=last_pk)
+                    .order_by('pk')
+                    .values(*ARCHIVED_FIELDS)[:chunk_size]
+                )
+                if not rows:
+                    break
+                if path is not None:
+                    if archive is None:
+                        path.parent.mkdir(parents=True, exist_ok=True)
+                        # 'x' : jamais écraser une archive existante
+                        archive = gzip.open(path, 'xt', encoding='utf-8')
+                    archive.writelines(
+                        json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n' for row in rows
+                    )
+                    archive.flush()
+                ids = [row['id'] for row in rows]
+                last_pk = ids[-1]
+                # Lignes lues : le signal post_delete ne touche pas aux compteurs
+                deleted += queryset.filter(pk__in=ids).delete()[0]
+            if pause:
+                # Laisse respirer la base entre deux lots
+                time.sleep(pause)
+    finally:
+        if archive is not None:
+            archive.close()
+    return {'deleted': deleted, 'archive': str(path) if archive is not None else None}
@@ -1,15 +1,18 @@
 from rest_framework import serializers
 from .models import Notification
 from users.serializers import UserSerializer
+from redteamcnbackend.serializers import EagerLoadingMixin
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     actor = UserSerializer()
     target = serializers.SerializerMethodField()
     review = serializers.SerializerMethodField()
 
+    select_related_fields = ('actor', 'target', 'review')
+
     class Meta:
         model = Notification
-        fields = ['id', 'actor', 'verb', 'target', 'review', 'message', 'is_read', 'created_at']
+        fields = ['id', 'actor', 'verb', 'target', 'review', 'message', 'occurrences', 'is_read', 'created_at']
 
     def get_target(self, obj):
         return {"id": obj.target.id, "name": obj.target.name} if obj.target else None
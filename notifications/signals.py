@@ -1,29 +1,45 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from reviews.models import Review
-from .models import Notification
+from .fanout import publish_notification
+from .models import Notification, UnreadCounter
 
 @receiver(post_save, sender=Review)
-def create_review_notification(sender, instance, created, **kwargs):
+def create_review_notification(sender, instance, created, update_fields=None, **kwargs):
+    # Le créateur du composant est résolu par le worker (pas de lecture ici),
+    # sans se notifier lui-même
     if created:
-        # Notifier le créateur du composant
-        if instance.component.created_by != instance.user:
-            Notification.objects.create(
-                recipient=instance.component.created_by,
-                actor=instance.user,
-                verb='review_created',
-                target=instance.component,
-                review=instance,
-                message=f"{instance.user.email} a ajouté une review sur votre composant"
-            )
+        verb, message = 'review_created', f"{instance.user.email} a ajouté une review sur votre composant"
     else:
-        # Mise à jour → notifier seulement si c'est pas la même personne
-        if instance.component.created_by != instance.user:
-            Notification.objects.create(
-                recipient=instance.component.created_by,
-                actor=instance.user,
-                verb='review_updated',
-                target=instance.component,
-                review=instance,
-                message=f"{instance.user.email} a mis à jour sa review"
-            )
\ No newline at end of file
+        verb, message = 'review_updated', f"{instance.user.email} a mis à jour sa review"
+    publish_notification(
+        verb=verb,
+        actor_id=instance.user_id,
+        target_id=instance.component_id,
+        review_id=instance.pk,
+        message=message,
+        recipients={'component_owner': instance.component_id},
+        exclude_actor=True,
+    )
+
+
+
+@receiver(post_save, sender=Notification)
+def update_unread_counter(sender, instance, created, update_fields=None, using='default', **kwargs):
+    if update_fields is not None and 'is_read' not in update_fields:
+        return
+    if created:
+        delta = 0 if instance.is_read else 1
+    else:
+        previous = getattr(instance, '_loaded_is_read', None)
+        if previous is None or previous == instance.is_read:
+            return
+        delta = -1 if instance.is_read else 1
+    UnreadCounter.objects.db_manager(using).adjust({instance.recipient_id: delta})
+    instance._loaded_is_read = instance.is_read
+
+
+@receiver(post_delete, sender=Notification)
+def remove_from_unread_counter(sender, instance, using='default', **kwargs):
+    if not getattr(instance, '_loaded_is_read', instance.is_read):
+        UnreadCounter.objects.db_manager(using).adjust({instance.recipient_id: -1})
@@ -0,0 +1,203 @@
+"""
+Mises à jour des notifications sans WebSocket : Server-Sent Events
+(`stream/`) et long-poll (`poll/`).
+
+Vues async : sous ASGI, une connexion en attente n'occupe aucun thread.
+Elles s'abonnent au groupe Channels de l'utilisateur (mêmes événements
+que `notifications.consumers`) au lieu d'interroger la base en boucle.
+
+Identifiant d'événement : `<created_at en µs>-<id>` de la notification.
+Un client qui se reconnecte avec `Last-Event-ID` (en-tête, ou paramètre
+`last_event_id`) reçoit d'abord les notifications créées ou regroupées
+depuis, sans tout recharger.
+"""
+import asyncio
+import json
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_GET
+
+from .auth import get_user_for_token
+from .models import Notification, UnreadCounter
+from .push import user_group
+from .serializers import NotificationSerializer
+
+STREAM_TIMEOUT = getattr(settings, 'NOTIFICATION_STREAM_TIMEOUT', 55)
+STREAM_HEARTBEAT = getattr(settings, 'NOTIFICATION_STREAM_HEARTBEAT', 15)
+POLL_TIMEOUT = getattr(settings, 'NOTIFICATION_POLL_TIMEOUT', 30)
+# Délai de reconnexion suggéré au client EventSource (ms)
+STREAM_RETRY = 1000
+# Sans couche de canaux : intervalle de relecture du compteur
+FALLBACK_INTERVAL = 5
+# Notifications renvoyées au plus lors d'une reprise
+MAX_REPLAY = 50
+
+
+def event_id(notification):
+    created_at = notification['created_at']
+    if isinstance(created_at, str):
+        created_at = parse_datetime(created_at)
+    return f"{int(created_at.timestamp() * 1_000_000)}-{notification['id']}"
+
+
+def parse_event_id(value):
+    try:
+        micros, pk = (int(part) for part in str(value).split('-'))
+    except (TypeError, ValueError):
+        return None
+    return datetime.fromtimestamp(micros / 1_000_000, tz=dt_timezone.utc), pk
+
+
+async def authenticate(request):
+    """Jeton d'accès SimpleJWT : en-tête Authorization, ou `?token=` (EventSource)"""
+    scheme, _, raw_token = request.headers.get('Authorization', '').partition(' ')
+    if scheme != 'Bearer':
+        raw_token = request.GET.get('token')
+    if not raw_token:
+        return None
+    user = await get_user_for_token(raw_token.strip())
+    return user if user.is_authenticated else None
+
+
+@sync_to_async
+def missed_notifications(user_id, last_event_id):
+    """Notifications créées (ou regroupées) après `last_event_id`, plus anciennes d'abord"""
+    position = parse_event_id(last_event_id)
+    if position is None:
+        return []
+    created_at, pk = position
+    notifications = NotificationSerializer.setup_eager_loading(
+        Notification.objects.filter(recipient_id=user_id)
+        .filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+        .order_by('created_at', 'id')
+    )[:MAX_REPLAY]
+    return list(NotificationSerializer(notifications, many=True).data)
+
+
+get_unread_count = sync_to_async(UnreadCounter.objects.get_count)
+
+
+async def notification_events(user, last_event_id, timeout):
+    """
+    Produit des événements {'type', ...} : notifications manquées et
+    compteur d'abord, puis chaque changement jusqu'à `timeout` secondes
+    (None entre deux événements quand rien n'arrive, pour les heartbeats).
+    """
+    for notification in await missed_notifications(user.pk, last_event_id):
+        yield {'type': 'notification', 'notification': notification}
+    yield {'type': 'unread_count', 'unread_count': await get_unread_count(user.pk)}
+
+    deadline = time.monotonic() + timeout
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        # Pas de couche de canaux : relecture périodique du compteur
+        count = None
+        while (remaining := deadline - time.monotonic()) > 0:
+            await asyncio.sleep(min(FALLBACK_INTERVAL, remaining))
+            current = await get_unread_count(user.pk)
+            if count is not None and current != count:
+                yield {'type': 'unread_count', 'unread_count': current}
+            count = current
+        return
+
+    channel = await channel_layer.new_channel()
+    group = user_group(user.pk)
+    await channel_layer.group_add(group, channel)
+    try:
+        while (remaining := deadline - time.monotonic()) > 0:
+            try:
+                message = await asyncio.wait_for(
+                    channel_layer.receive(channel), timeout=min(STREAM_HEARTBEAT, remaining)
+                )
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            if message['type'] == 'notification.created':
+                yield {'type': 'notification', 'notification': message['notification']}
+                yield {'type': 'unread_count', 'unread_count': message['unread_count']}
+            elif message['type'] == 'unread.count':
+                yield {'type': 'unread_count', 'unread_count': message['unread_count']}
+    finally:
+        await channel_layer.group_discard(group, channel)
+
+
+def _sse(event):
+    if event is None:
+        # Commentaire SSE : garde la connexion ouverte à travers les proxies
+        return ': ping\n\n'
+    lines = [f"event: {event['type']}"]
+    if event['type'] == 'notification':
+        lines.append(f"id: {event_id(event['notification'])}")
+        data = event['notification']
+    else:
+        data = {'unread_count': event['unread_count']}
+    lines.append('data: ' + json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False))
+    return '\n'.join(lines) + '\n\n'
+
+
+def _last_event_id(request):
+    return request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+
+
+@require_GET
+async def notification_stream(request):
+    """Server-Sent Events ; le client EventSource se reconnecte seul après `retry`"""
+    user = await authenticate(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentification requise'}, status=401)
+
+    async def stream():
+        yield f'retry: {STREAM_RETRY}\n\n'
+        async for event in notification_events(user, _last_event_id(request), STREAM_TIMEOUT):
+            yield _sse(event)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Pas de mise en tampon par nginx
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@require_GET
+async def notification_poll(request):
+    """
+    Long-poll : répond dès qu'il y a du nouveau depuis `last_event_id`
+    (ou que le compteur change), sinon à l'expiration de `POLL_TIMEOUT`.
+
+    Réponse : {"unread_count", "notifications": [...], "last_event_id"}
+    """
+    user = await authenticate(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentification requise'}, status=401)
+
+    last_event_id = _last_event_id(request)
+    unread, notifications = None, []
+    events = notification_events(user, last_event_id, POLL_TIMEOUT)
+    try:
+        async for event in events:
+            if event is None:
+                continue
+            if event['type'] == 'notification':
+                notifications.append(event['notification'])
+                last_event_id = event_id(event['notification'])
+                continue
+            changed = unread is not None and event['unread_count'] != unread
+            unread = event['unread_count']
+            # Premier compteur : on attend un changement, sauf si des notifications ont été rattrapées
+            if notifications or changed:
+                break
+    finally:
+        await events.aclose()
+
+    return JsonResponse(
+        {'unread_count': unread, 'notifications': notifications, 'last_event_id': last_event_id},
+        encoder=DjangoJSONEncoder,
+    )
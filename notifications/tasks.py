@@ -0,0 +1,188 @@
+from datetime import timedelta
+from itertools import islice
+
+from celery import shared_task
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from catalog.models import Component
+from reviews.models import Review
+from .models import Notification, UnreadCounter
+from .outbox import deliver_pending
+from .partitioning import PartitioningUnavailable, ensure_partitions
+from .push import push_notifications
+from .retention import purge_read_notifications
+
+User = get_user_model()
+
+FANOUT_BATCH_SIZE = getattr(settings, 'NOTIFICATION_FANOUT_BATCH_SIZE', 500)
+COALESCE_WINDOW = getattr(settings, 'NOTIFICATION_COALESCE_WINDOW', 3600)
+COALESCE_VERBS = getattr(settings, 'NOTIFICATION_COALESCE_VERBS', ('review_created', 'review_updated'))
+
+
+def resolve_recipients(recipients):
+    """Identifiants des destinataires d'un événement (voir `notifications.fanout`)"""
+    if 'ids' in recipients:
+        return User.objects.filter(pk__in=recipients['ids'], is_active=True).values_list('pk', flat=True)
+    if 'role' in recipients:
+        return User.objects.filter(role=recipients['role'], is_active=True).values_list('pk', flat=True)
+    if 'component_owner' in recipients:
+        return Component.objects.filter(pk=recipients['component_owner']).values_list('created_by_id', flat=True)
+    raise ValueError(f'Destinataires inconnus : {recipients!r}')
+
+
+def coalesce(event, recipient_ids, now):
+    """
+    Regroupe l'événement dans les notifications non lues récentes de même
+    (destinataire, verbe, composant) : un seul UPDATE pour le lot.
+    Renvoie (notifications regroupées, destinataires restant à créer).
+    """
+    if not COALESCE_WINDOW or event['verb'] not in COALESCE_VERBS or not event.get('target_id'):
+        return [], recipient_ids
+
+    candidates = (
+        Notification.objects.select_for_update()
+        .filter(
+            recipient_id__in=recipient_ids,
+            verb=event['verb'],
+            target_id=event['target_id'],
+            is_read=False,
+            created_at__gte=now - timedelta(seconds=COALESCE_WINDOW),
+        )
+        .order_by('recipient_id', '-created_at', '-id')
+    )
+    latest = {}
+    for notification in candidates:
+        latest.setdefault(notification.recipient_id, notification)
+    if not latest:
+        return [], recipient_ids
+
+    # Toujours non lue : le compteur de non lues ne change pas
+    fields = {
+        'actor_id': event['actor_id'],
+        'review_id': event.get('review_id'),
+        'message': event['message'],
+        'created_at': now,
+    }
+    Notification.objects.filter(pk__in=[n.pk for n in latest.values()]).update(
+        occurrences=F('occurrences') + 1, **fields
+    )
+    for notification in latest.values():
+        notification.occurrences += 1
+        for name, value in fields.items():
+            setattr(notification, name, value)
+    return list(latest.values()), [pk for pk in recipient_ids if pk not in latest]
+
+
+@shared_task(ignore_result=True)
+def fanout_notification(event, batch_size=FANOUT_BATCH_SIZE):
+    """
+    Insère une notification par destinataire, par lots de `batch_size`,
+    après regroupement avec les notifications identiques récentes.
+    """
+    recipient_ids = resolve_recipients(event['recipients']).order_by().iterator(chunk_size=batch_size)
+    if event.get('exclude_actor'):
+        recipient_ids = (pk for pk in recipient_ids if pk != event['actor_id'])
+
+    # Relations communes à toutes les lignes : lues une fois pour l'envoi temps réel
+    related = {
+        'actor': User.objects.filter(pk=event['actor_id']).first(),
+        'target': Component.objects.filter(pk=event['target_id']).first() if event.get('target_id') else None,
+        'review': Review.objects.filter(pk=event['review_id']).first() if event.get('review_id') else None,
+    }
+
+    created = 0
+    while True:
+        batch = list(islice(recipient_ids, batch_size))
+        if not batch:
+            break
+        # bulk_create n'envoie pas post_save : compteurs ajustés dans la même transaction
+        with transaction.atomic():
+            merged, batch = coalesce(event, batch, timezone.now())
+            notifications = Notification.objects.bulk_create([
+                Notification(
+                    recipient_id=recipient_id,
+                    actor_id=event['actor_id'],
+                    verb=event['verb'],
+                    target_id=event.get('target_id'),
+                    review_id=event.get('review_id'),
+                    message=event['message'],
+                )
+                for recipient_id in batch
+            ])
+            UnreadCounter.objects.adjust(dict.fromkeys(batch, 1))
+        notifications += merged
+        for notification in notifications:
+            for name, value in related.items():
+                setattr(notification, name, value)
+        push_notifications(notifications)
+        created += len(batch)
+    return created
+
+
+@shared_task(ignore_result=True)
+def digest_notifications(verbs=COALESCE_VERBS):
+    """
+    Tâche périodique (NOTIFICATION_DIGEST_INTERVAL) : fusionne toutes les
+    notifications non lues de même (destinataire, verbe, composant) dans
+    la plus récente, hors fenêtre de regroupement. Renvoie le nombre de
+    lignes supprimées.
+    """
+    groups = (
+        Notification.objects.filter(is_read=False, verb__in=verbs, target__isnull=False)
+        .order_by()
+        .values_list('recipient_id', 'verb', 'target_id')
+        .annotate(rows=Count('pk'))
+        .filter(rows__gt=1)
+    )
+    removed = 0
+    for recipient_id, verb, target_id, _ in groups.iterator():
+        with transaction.atomic():
+            rows = list(
+                Notification.objects.select_for_update()
+                .filter(recipient_id=recipient_id, verb=verb, target_id=target_id, is_read=False)
+                .order_by('-created_at', '-id')
+                .values_list('pk', 'occurrences')
+            )
+            if len(rows) < 2:
+                continue
+            (keep, _), others = rows[0], rows[1:]
+            Notification.objects.filter(pk=keep).update(
+                occurrences=F('occurrences') + sum(occurrences for _, occurrences in others)
+            )
+            # delete() envoie post_delete : compteur de non lues ajusté par les signaux
+            removed += Notification.objects.filter(pk__in=[pk for pk, _ in others]).delete()[0]
+    return removed
+
+
+@shared_task(ignore_result=True)
+def reconcile_unread_counters():
+    """Tâche périodique (CELERY_BEAT_SCHEDULE) : corrige la dérive des compteurs"""
+    return UnreadCounter.objects.reconcile()
+
+
+@shared_task(ignore_result=True)
+def purge_notifications():
+    """Tâche périodique : rétention des notifications lues (voir notifications.retention)"""
+    return purge_read_notifications()['deleted']
+
+
+@shared_task(ignore_result=True)
+def ensure_notification_partitions():
+    """Tâche périodique : partitions des mois à venir (si la table est partitionnée)"""
+    try:
+        return len(ensure_partitions())
+    except PartitioningUnavailable:
+        return 0
+
+
+@shared_task(ignore_result=True)
+def deliver_outbox():
+    """
+    Envoi des emails de l'outbox (voir notifications.outbox) : déclenchée
+    au commit de chaque email, et périodiquement pour les nouveaux essais
+    """
+    return deliver_pending()['sent']
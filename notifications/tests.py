@@ -1,3 +1,649 @@
-from django.test import TestCase
+import gzip
+import json
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from itertools import count
+from smtplib import SMTPException
+from unittest import mock
 
-# Create your tests here.
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from catalog.models import Component
+from redteamcnbackend.testing import QueryBudgetAssertionsMixin, QueryPlanAssertionsMixin
+from reviews.models import Review
+from .models import Notification, OutboxEmail, UnreadCounter
+from .outbox import MAX_ATTEMPTS, deliver_pending, enqueue_email, outbox_metrics
+from .retention import ARCHIVED_FIELDS, RETENTION_DAYS, purge_read_notifications
+from .serializers import NotificationSerializer
+from .stream import event_id
+from .tasks import digest_notifications, fanout_notification
+from .views import MAX_MARK_READ_IDS
+
+User = get_user_model()
+
+
+class NotificationQueryPlanTests(QueryPlanAssertionsMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='dev@example.com', username='dev', password='x' * 10)
+        cls.actor = User.objects.create_user(email='coach@example.com', username='coach', password='x' * 10)
+        for is_read in (True, False, False):
+            Notification.objects.create(
+                recipient=cls.user, actor=cls.actor, verb='review_created',
+                message='Nouvelle review', is_read=is_read,
+            )
+
+    def test_list_uses_recipient_index(self):
+        queryset = Notification.objects.filter(recipient=self.user).order_by('-created_at', '-id')
+        self.assertUsesIndex(queryset, 'notif_recipient_recent_idx')
+
+    def test_unread_uses_partial_index(self):
+        queryset = Notification.objects.filter(recipient=self.user, is_read=False).order_by('-created_at')
+        self.assertUsesIndex(queryset, 'notif_unread_idx')
+
+
+class NotificationQueryBudgetTests(QueryBudgetAssertionsMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='dev@example.com', username='dev')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.numbers = count()
+
+    def seed(self, n):
+        for _ in range(n):
+            number = next(self.numbers)
+            # Acteur, composant et review différents pour chaque notification
+            actor = User.objects.create_user(email=f'actor{number}@example.com', username=f'actor{number}')
+            component = Component.objects.create(
+                name=f'Carte {number}', category='CARD', code='<div></div>', created_by=self.user, status='approved',
+            )
+            review = Review.objects.create(component=component, user=actor, rating=5)
+            Notification.objects.create(
+                recipient=self.user, actor=actor, verb='review_created',
+                target=component, review=review, message='Nouvelle review',
+            )
+
+    def fetch(self):
+        response = self.client.get('/api/notifications/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_list_notifications(self):
+        self.assertConstantQueries(self.seed, self.fetch)
+
+
+class NotificationFanoutTests(TestCase):
+    """Un événement publié au commit, des lignes insérées par lots par le worker."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.actor = User.objects.create_user(email='coach@example.com', username='coach', role='coach')
+        cls.coaches = [
+            User.objects.create_user(email=f'coach{index}@example.com', username=f'coach{index}', role='coach')
+            for index in range(5)
+        ]
+        User.objects.create_user(email='ancien@example.com', username='ancien', role='coach', is_active=False)
+        cls.developer = User.objects.create_user(email='dev@example.com', username='dev')
+
+    def event(self, **overrides):
+        return {
+            'verb': 'component_submitted', 'actor_id': self.actor.pk, 'target_id': None, 'review_id': None,
+            'message': 'Nouveau composant', 'recipients': {'role': 'coach'}, 'exclude_actor': True, **overrides,
+        }
+
+    def test_inserts_by_batches(self):
+        with CaptureQueriesContext(connection) as queries:
+            created = fanout_notification(self.event(), batch_size=2)
+        self.assertEqual(created, 5)
+        inserts = [q for q in queries if q['sql'].startswith(f'INSERT INTO "{Notification._meta.db_table}"')]
+        self.assertEqual(len(inserts), 3)
+
+        # Coachs actifs, sans l'auteur
+        recipients = Notification.objects.values_list('recipient_id', flat=True)
+        self.assertCountEqual(recipients, [coach.pk for coach in self.coaches])
+        self.assertEqual(
+            UnreadCounter.objects.get_counts([coach.pk for coach in self.coaches]),
+            {coach.pk: 1 for coach in self.coaches},
+        )
+
+    def test_explicit_recipients(self):
+        self.assertEqual(fanout_notification(self.event(recipients={'ids': [self.developer.pk]})), 1)
+        self.assertEqual(UnreadCounter.objects.get_count(self.developer.pk), 1)
+
+    def test_request_only_publishes(self):
+        component = Component.objects.create(
+            name='Carte', category='CARD', code='<div></div>', created_by=self.developer,
+        )
+        client = APIClient()
+        client.force_authenticate(self.developer)
+        with mock.patch('notifications.fanout.fanout_notification.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = client.post(f'/api/components/submit/{component.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Notification.objects.exists())
+        delay.assert_called_once()
+        self.assertEqual(delay.call_args.args[0]['recipients'], {'role': 'coach'})
+
+
+class UnreadCounterTests(TestCase):
+    """Compteur de non lues tenu dans la même transaction que les notifications."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='dev@example.com', username='dev')
+        cls.other = User.objects.create_user(email='autre@example.com', username='autre')
+        cls.actor = User.objects.create_user(email='coach@example.com', username='coach')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def notify(self, recipient=None, **kwargs):
+        return Notification.objects.create(
+            recipient=recipient or self.user, actor=self.actor, verb='review_created', message='Nouvelle review', **kwargs,
+        )
+
+    def assertUnread(self, expected):
+        self.assertEqual(UnreadCounter.objects.get_count(self.user.pk), expected)
+        self.assertEqual(Notification.objects.filter(recipient=self.user, is_read=False).count(), expected)
+        self.assertEqual(self.client.get('/api/notifications/unread/count/').data['unread_count'], expected)
+
+    def test_follows_saves_and_deletes(self):
+        first, second = self.notify(), self.notify()
+        self.notify(is_read=True)
+        self.assertUnread(2)
+
+        first.is_read = True
+        first.save()
+        self.assertUnread(1)
+        # Relue depuis la base : l'ancien état vient de from_db
+        first = Notification.objects.get(pk=first.pk)
+        first.is_read = False
+        first.save(update_fields=['is_read'])
+        self.assertUnread(2)
+
+        second.delete()
+        self.assertUnread(1)
+        Notification.objects.get(is_read=True).delete()
+        self.assertUnread(1)
+
+    def test_mark_as_read(self):
+        notification = self.notify()
+        self.notify()
+        response = self.client.patch(f'/api/notifications/{notification.pk}/read/')
+        self.assertEqual(response.data['unread_count'], 1)
+        self.assertUnread(1)
+
+        # Déjà lue : pas de double décrément
+        response = self.client.patch(f'/api/notifications/{notification.pk}/read/')
+        self.assertEqual(response.status_code, 200)
+        self.assertUnread(1)
+
+        # Notification d'un autre utilisateur
+        foreign = self.notify(recipient=self.other)
+        self.assertEqual(self.client.patch(f'/api/notifications/{foreign.pk}/read/').status_code, 404)
+        self.assertEqual(UnreadCounter.objects.get_count(self.other.pk), 1)
+
+    def test_reconcile_fixes_drift(self):
+        self.notify()
+        self.notify()
+        UnreadCounter.objects.filter(user=self.user).update(count=7)
+        self.assertEqual(UnreadCounter.objects.reconcile(), 1)
+        self.assertUnread(2)
+        self.assertEqual(UnreadCounter.objects.reconcile(), 0)
+
+
+class MarkReadTests(TestCase):
+    """Marquage groupé : un UPDATE, compteur ajusté, notifications des autres intactes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='dev@example.com', username='dev')
+        cls.other = User.objects.create_user(email='autre@example.com', username='autre')
+        cls.actor = User.objects.create_user(email='coach@example.com', username='coach')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        # Du plus ancien au plus récent, une minute d'écart (deux ex aequo à la fin)
+        start = timezone.now() - timedelta(hours=1)
+        self.notifications = []
+        for index, minutes in enumerate((0, 1, 2, 3, 3)):
+            notification = Notification.objects.create(
+                recipient=self.user, actor=self.actor, verb='review_created', message=f'n{index}',
+            )
+            Notification.objects.filter(pk=notification.pk).update(created_at=start + timedelta(minutes=minutes))
+            notification.refresh_from_db()
+            self.notifications.append(notification)
+        self.foreign = Notification.objects.create(
+            recipient=self.other, actor=self.actor, verb='review_created', message='autre',
+        )
+
+    def post(self, url, data):
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def unread(self):
+        return sorted(
+            Notification.objects.filter(recipient=self.user, is_read=False).values_list('message', flat=True)
+        )
+
+    def assertCounters(self, data, updated, unread):
+        self.assertEqual((data['updated'], data['unread_count']), (updated, unread))
+        self.assertEqual(UnreadCounter.objects.get_count(self.user.pk), unread)
+        self.assertEqual(len(self.unread()), unread)
+        # Jamais les notifications d'un autre utilisateur
+        self.assertEqual(UnreadCounter.objects.get_count(self.other.pk), 1)
+        self.assertFalse(Notification.objects.get(pk=self.foreign.pk).is_read)
+
+    def test_mark_read_ids(self):
+        ids = [self.notifications[0].pk, self.notifications[2].pk, self.foreign.pk, 999999]
+        self.assertCounters(self.post('/api/notifications/mark-read/', {'ids': ids}), 2, 3)
+        self.assertEqual(self.unread(), ['n1', 'n3', 'n4'])
+        # Déjà lues : rien à décompter
+        self.assertCounters(self.post('/api/notifications/mark-read/', {'ids': ids}), 0, 3)
+
+    def test_mark_read_before_cursor(self):
+        # n3 et n4 ont la même date : départagés par id, comme dans la liste
+        data = self.post('/api/notifications/mark-read-before/', {'cursor': self.notifications[3].pk})
+        self.assertCounters(data, 4, 1)
+        self.assertEqual(self.unread(), ['n4'])
+
+    def test_mark_read_before_date(self):
+        before = self.notifications[2].created_at.isoformat()
+        self.assertCounters(self.post('/api/notifications/mark-read-before/', {'before': before}), 2, 3)
+        self.assertEqual(self.unread(), ['n2', 'n3', 'n4'])
+
+    def test_mark_all_read(self):
+        self.assertCounters(self.post('/api/notifications/mark-all-read/', {}), 5, 0)
+        self.assertCounters(self.post('/api/notifications/mark-all-read/', {}), 0, 0)
+
+    def test_invalid_bodies(self):
+        for url, data in (
+            ('/api/notifications/mark-read/', {'ids': []}),
+            ('/api/notifications/mark-read/', {'ids': ['1']}),
+            ('/api/notifications/mark-read/', {'ids': list(range(MAX_MARK_READ_IDS + 1))}),
+            ('/api/notifications/mark-read-before/', {}),
+            ('/api/notifications/mark-read-before/', {'before': 'hier'}),
+            ('/api/notifications/mark-read-before/', {'cursor': True}),
+        ):
+            self.assertEqual(self.client.post(url, data, format='json').status_code, 400, data)
+        self.assertEqual(UnreadCounter.objects.get_count(self.user.pk), 5)
+
+
+class NotificationConditionalGetTests(TestCase):
+    """GET /notifications/ : 304 tant que rien ne change, y compris les lectures."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='dev@example.com', username='dev')
+        cls.actor = User.objects.create_user(email='coach@example.com', username='coach')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.notification = Notification.objects.create(
+            recipient=self.user, actor=self.actor, verb='review_created', message='Nouvelle review',
+        )
+
+    def test_etag_changes_on_mark_read(self):
+        etag = self.client.get('/api/notifications/')['ETag']
+        self.assertEqual(self.client.get('/api/notifications/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.client.post('/api/notifications/mark-all-read/')
+        response = self.client.get('/api/notifications/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertTrue(response.data[0]['is_read'])
+
+    def test_if_modified_since_never_answers_304(self):
+        response = self.client.get('/api/notifications/')
+        self.assertNotIn('Last-Modified', response)
+        since = http_date(time.time() + 60)
+        self.assertEqual(self.client.get('/api/notifications/', HTTP_IF_MODIFIED_SINCE=since).status_code, 200)
+
+        self.client.patch(f'/api/notifications/{self.notification.pk}/read/')
+        response = self.client.get('/api/notifications/', HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data[0]['is_read'])
+
+
+class NotificationCoalesceTests(TestCase):
+    """Événements répétés regroupés dans une seule notification non lue."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='dev@example.com', username='dev')
+        cls.reviewers = [
+            User.objects.create_user(email=f'reviewer{index}@example.com', username=f'reviewer{index}')
+            for index in range(3)
+        ]
+        cls.component, cls.other_component = (
+            Component.objects.create(name=name, category='CARD', code='<div></div>', created_by=cls.owner, status='approved')
+            for name in ('Carte', 'Modal')
+        )
+
+    def review(self, reviewer, component=None):
+        # Fan-out exécuté au commit (Celery en mode eager)
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(component=component or self.component, user=reviewer, rating=4)
+
+    def rows(self):
+        return list(
+            Notification.objects.filter(recipient=self.owner)
+            .order_by('created_at', 'id')
+            .values_list('target_id', 'actor_id', 'occurrences', 'is_read')
+        )
+
+    def test_repeated_events_increment_occurrences(self):
+        for reviewer in self.reviewers:
+            self.review(reviewer)
+        # Une seule ligne, à jour du dernier événement
+        self.assertEqual(self.rows(), [(self.component.pk, self.reviewers[2].pk, 3, False)])
+        self.assertEqual(UnreadCounter.objects.get_count(self.owner.pk), 1)
+
+    def test_read_old_or_other_component_start_a_new_row(self):
+        self.review(self.reviewers[0])
+        self.review(self.reviewers[1], self.other_component)
+        self.assertEqual(len(self.rows()), 2)
+
+        # Lue : plus de regroupement
+        Notification.objects.filter(target=self.component).update(is_read=True)
+        self.review(self.reviewers[1])
+        # Hors fenêtre
+        Notification.objects.filter(target=self.other_component).update(created_at=timezone.now() - timedelta(days=2))
+        self.review(self.reviewers[0], self.other_component)
+        self.assertCountEqual(self.rows(), [
+            (self.component.pk, self.reviewers[0].pk, 1, True),
+            (self.component.pk, self.reviewers[1].pk, 1, False),
+            (self.other_component.pk, self.reviewers[1].pk, 1, False),
+            (self.other_component.pk, self.reviewers[0].pk, 1, False),
+        ])
+
+    def test_disabled_window(self):
+        with mock.patch('notifications.tasks.COALESCE_WINDOW', 0):
+            for reviewer in self.reviewers[:2]:
+                self.review(reviewer)
+        self.assertEqual([row[2] for row in self.rows()], [1, 1])
+
+    def test_digest_merges_remaining_duplicates(self):
+        for occurrences in (1, 2, 1):
+            Notification.objects.create(
+                recipient=self.owner, actor=self.reviewers[0], verb='review_created',
+                target=self.component, message='Nouvelle review', occurrences=occurrences,
+            )
+        latest = Notification.objects.latest('id')
+        self.assertEqual(digest_notifications(), 2)
+        self.assertEqual(self.rows(), [(self.component.pk, self.reviewers[0].pk, 4, False)])
+        self.assertEqual(Notification.objects.get().pk, latest.pk)
+        self.assertEqual(UnreadCounter.objects.get_count(self.owner.pk), 1)
+
+
+class NotificationRetentionTests(TestCase):
+    """Purge : seules les notifications lues et anciennes, archivées avant suppression."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='dev@example.com', username='dev')
+        cls.actor = User.objects.create_user(email='coach@example.com', username='coach')
+
+    def setUp(self):
+        old = timezone.now() - timedelta(days=RETENTION_DAYS + 1)
+        recent = timezone.now() - timedelta(days=RETENTION_DAYS - 1)
+        self.rows = {}
+        for name, is_read, created_at in (
+            ('ancienne lue 1', True, old), ('ancienne lue 2', True, old), ('ancienne lue 3', True, old),
+            ('ancienne non lue', False, old), ('récente lue', True, recent),
+        ):
+            notification = Notification.objects.create(
+                recipient=self.user, actor=self.actor, verb='review_created', message=name, is_read=is_read,
+            )
+            Notification.objects.filter(pk=notification.pk).update(created_at=created_at)
+            self.rows[name] = notification.pk
+        self.expired = [self.rows[f'ancienne lue {index}'] for index in (1, 2, 3)]
+
+    def remaining(self):
+        return sorted(Notification.objects.values_list('message', flat=True))
+
+    def test_purge_archives_then_deletes_expired_read(self):
+        with tempfile.TemporaryDirectory() as archive_dir:
+            result = purge_read_notifications(chunk_size=2, archive_dir=archive_dir)
+            self.assertEqual(result['deleted'], 3)
+            with gzip.open(result['archive'], 'rt', encoding='utf-8') as archive:
+                archived = [json.loads(line) for line in archive]
+
+        self.assertEqual(self.remaining(), ['ancienne non lue', 'récente lue'])
+        self.assertEqual([row['id'] for row in archived], self.expired)
+        self.assertEqual(set(archived[0]), set(ARCHIVED_FIELDS))
+        self.assertEqual(
+            [(row['message'], row['is_read'], row['recipient_id']) for row in archived],
+            [(f'ancienne lue {index}', True, self.user.pk) for index in (1, 2, 3)],
+        )
+        # Aucune non lue supprimée : compteur inchangé
+        self.assertEqual(UnreadCounter.objects.get_count(self.user.pk), 1)
+
+    def test_purges_at_the_same_date_keep_both_archives(self):
+        now = timezone.now()
+        with tempfile.TemporaryDirectory() as archive_dir:
+            first = purge_read_notifications(archive_dir=archive_dir, now=now)
+            self.assertEqual(first['deleted'], 3)
+            notification = Notification.objects.create(
+                recipient=self.user, actor=self.actor, verb='review_created', message='ancienne lue 4', is_read=True,
+            )
+            Notification.objects.filter(pk=notification.pk).update(created_at=now - timedelta(days=RETENTION_DAYS + 1))
+            second = purge_read_notifications(archive_dir=archive_dir, now=now)
+            self.assertEqual(second['deleted'], 1)
+
+            self.assertNotEqual(first['archive'], second['archive'])
+            archived = []
+            for result in (first, second):
+                with gzip.open(result['archive'], 'rt', encoding='utf-8') as archive:
+                    archived += [json.loads(line)['id'] for line in archive]
+        self.assertEqual(archived, [*self.expired, notification.pk])
+
+    def test_dry_run_and_no_archive(self):
+        self.assertEqual(purge_read_notifications(dry_run=True), {'deleted': 3, 'archive': None})
+        self.assertEqual(Notification.objects.count(), 5)
+
+        self.assertEqual(purge_read_notifications(archive_dir=''), {'deleted': 3, 'archive': None})
+        self.assertEqual(purge_read_notifications(archive_dir=''), {'deleted': 0, 'archive': None})
+        self.assertEqual(self.remaining(), ['ancienne non lue', 'récente lue'])
+
+
+class NotificationPollTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='dev@example.com', username='dev')
+        cls.actor = User.objects.create_user(email='coach@example.com', username='coach')
+        cls.older, cls.newer = (
+            Notification.objects.create(recipient=cls.user, actor=cls.actor, verb='review_created', message=message)
+            for message in ('older', 'newer')
+        )
+
+    def test_requires_token(self):
+        self.assertEqual(self.client.get('/api/notifications/poll/').status_code, 401)
+
+    def test_resume_returns_missed_notifications(self):
+        last = event_id(NotificationSerializer(self.older).data)
+        response = self.client.get(
+            '/api/notifications/poll/', {'token': str(AccessToken.for_user(self.user))},
+            HTTP_LAST_EVENT_ID=last,
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([n['message'] for n in data['notifications']], ['newer'])
+        self.assertEqual(data['unread_count'], 2)
+        self.assertEqual(data['last_event_id'], event_id(NotificationSerializer(self.newer).data))
+
+
+class NotificationStreamTests(TestCase):
+    """Server-Sent Events : trames id/data, reprise par Last-Event-ID, heartbeat, 401."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='dev@example.com', username='dev')
+        cls.actor = User.objects.create_user(email='coach@example.com', username='coach')
+        cls.older, cls.newer = (
+            Notification.objects.create(recipient=cls.user, actor=cls.actor, verb='review_created', message=message)
+            for message in ('older', 'newer')
+        )
+
+    async def test_requires_token(self):
+        for params in ({}, {'token': 'invalide'}):
+            response = await self.async_client.get('/api/notifications/stream/', params)
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(response.json(), {'detail': 'Authentification requise'})
+
+    @mock.patch('notifications.stream.STREAM_HEARTBEAT', 0.01)
+    async def test_resume_then_heartbeat(self):
+        token = await database_sync_to_async(lambda: str(AccessToken.for_user(self.user)))()
+        last = await database_sync_to_async(lambda: event_id(NotificationSerializer(self.older).data))()
+        newer = await database_sync_to_async(lambda: NotificationSerializer(self.newer).data)()
+        response = await self.async_client.get(
+            '/api/notifications/stream/', {'token': token}, headers={'Last-Event-ID': last},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        try:
+            frames = [(await anext(chunks)).decode() for _ in range(4)]
+        finally:
+            await chunks.aclose()
+
+        self.assertEqual(frames[0], 'retry: 1000\n\n')
+        # Notification manquée depuis Last-Event-ID, avec son propre identifiant
+        event, id_line, data = frames[1].rstrip('\n').split('\n')
+        self.assertEqual(event, 'event: notification')
+        self.assertEqual(id_line, f'id: {event_id(newer)}')
+        self.assertEqual(json.loads(data.removeprefix('data: '))['message'], 'newer')
+        self.assertEqual(frames[2], 'event: unread_count\ndata: {"unread_count": 2}\n\n')
+        self.assertEqual(frames[3], ': ping\n\n')
+
+
+class NotificationConsumerTests(TransactionTestCase):
+    """
+    ws/notifications/ sur l'application ASGI complète. TransactionTestCase :
+    `database_sync_to_async` ferme les connexions hors autocommit.
+    """
+
+    def setUp(self):
+        from redteamcnbackend.asgi import application
+        self.application = application
+        self.user = User.objects.create_user(email='dev@example.com', username='dev')
+        self.actor = User.objects.create_user(email='coach@example.com', username='coach')
+
+    def communicator(self, query=''):
+        return WebsocketCommunicator(
+            self.application, f'/ws/notifications/{query}', headers=[(b'origin', b'http://localhost')],
+        )
+
+    async def test_rejects_missing_or_invalid_token(self):
+        for query in ('', '?token=', '?token=invalide'):
+            communicator = self.communicator(query)
+            connected, code = await communicator.connect()
+            self.assertFalse(connected)
+            self.assertEqual(code, 4401)
+            await communicator.disconnect()
+
+    async def test_receives_unread_count_then_pushes(self):
+        token = await database_sync_to_async(lambda: str(AccessToken.for_user(self.user)))()
+        communicator = self.communicator(f'?token={token}')
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'unread_count', 'unread_count': 0})
+
+        # Review -> fan-out (Celery en mode eager) -> push au créateur du composant
+        component = await database_sync_to_async(Component.objects.create)(
+            name='Carte', category='CARD', code='<div></div>', created_by=self.user, status='approved',
+        )
+        await database_sync_to_async(Review.objects.create)(component=component, user=self.actor, rating=5)
+        message = await communicator.receive_json_from()
+        self.assertEqual(message['type'], 'notification')
+        self.assertEqual(message['notification']['verb'], 'review_created')
+        self.assertEqual(message['unread_count'], 1)
+        await communicator.disconnect()
+
+
+class OutboxEagerDeliveryTests(TransactionTestCase):
+    """Mode eager : l'email est envoyé après le commit, dans un thread à part."""
+
+    def test_queued_email_gets_sent(self):
+        User.objects.create_user(email='dev@example.com', username='dev')
+        response = APIClient().post('/api/auth/password/reset/', {'email': 'dev@example.com'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        for thread in threading.enumerate():
+            if thread.name == 'outbox-delivery':
+                thread.join(timeout=5)
+        self.assertEqual(OutboxEmail.objects.get().status, 'sent')
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['dev@example.com'])
+
+
+class OutboxTests(TestCase):
+
+    def test_password_reset_goes_through_outbox(self):
+        User.objects.create_user(email='dev@example.com', username='dev')
+        response = APIClient().post('/api/auth/password/reset/', {'email': 'dev@example.com'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        # Rien n'est envoyé pendant la requête
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(outbox_metrics()['pending'], 1)
+
+        self.assertEqual(deliver_pending(), {'sent': 1, 'failed': 0, 'batches': 1})
+        self.assertEqual(mail.outbox[0].to, ['dev@example.com'])
+        self.assertEqual(OutboxEmail.objects.get().status, 'sent')
+        self.assertEqual(outbox_metrics()['sent_last_window'], 1)
+
+    def test_eager_mode_sends_nothing_in_request(self):
+        User.objects.create_user(email='dev@example.com', username='dev')
+        # Celery en mode eager dans les tests (broker memory://)
+        with mock.patch('notifications.outbox.threading.Thread') as thread, \
+                mock.patch('notifications.outbox.get_connection') as get_connection:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = APIClient().post('/api/auth/password/reset/', {'email': 'dev@example.com'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        thread.return_value.start.assert_called_once_with()
+        get_connection.assert_not_called()
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboxEmail.objects.get().status, 'pending')
+
+    def test_worker_delivery_requested_on_commit(self):
+        with mock.patch('notifications.outbox.EAGER', False), \
+                mock.patch('notifications.tasks.deliver_outbox.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                enqueue_email('Sujet', 'Corps', ['dev@example.com'])
+        delay.assert_called_once_with()
+
+    def test_failures_back_off_then_give_up(self):
+        email = enqueue_email('Sujet', 'Corps', ['dev@example.com'])
+        with mock.patch('notifications.outbox.EmailMessage.send', side_effect=SMTPException('indisponible')):
+            self.assertEqual(deliver_pending(), {'sent': 0, 'failed': 1, 'batches': 1})
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), ('pending', 1))
+            self.assertGreater(email.next_attempt_at, timezone.now())
+            self.assertIn('indisponible', email.last_error)
+
+            for _ in range(MAX_ATTEMPTS - 1):
+                OutboxEmail.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+                deliver_pending()
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('failed', MAX_ATTEMPTS))
+        self.assertEqual(len(mail.outbox), 0)
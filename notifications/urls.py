@@ -1,8 +1,14 @@
 from django.urls import path
-from . import views
+from . import stream, views
 
 urlpatterns = [
     path('', views.list_notifications, name='list_notifications'),
     path('<int:notification_id>/read/', views.mark_as_read, name='mark_as_read'),
     path('unread/count/', views.unread_count, name='unread_count'),
+    path('mark-all-read/', views.mark_all_read, name='mark_all_read'),
+    path('mark-read-before/', views.mark_read_before, name='mark_read_before'),
+    path('mark-read/', views.mark_read, name='mark_read'),
+    path('stream/', stream.notification_stream, name='notification_stream'),
+    path('poll/', stream.notification_poll, name='notification_poll'),
+    path('outbox/', views.outbox_status, name='outbox_status'),
 ]
\ No newline at end of file
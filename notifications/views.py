@@ -1,31 +1,127 @@
+from django.db import transaction
+from django.db.models import Count, Q, Subquery
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from .models import Notification
+from users.permissions import IsAdmin
+from .models import Notification, UnreadCounter
+from .outbox import outbox_metrics
+from .push import push_unread_count
 from .serializers import NotificationSerializer
+from redteamcnbackend.conditional import add_validators, not_modified, queryset_validators
+
+# Nombre max d'identifiants par appel à mark_read
+MAX_MARK_READ_IDS = 1000
+
+
+def _mark_read(request, notifications):
+    """
+    Marque comme lues les notifications non lues de `notifications` (un
+    seul UPDATE, sans charger les lignes) et ajuste le compteur.
+    Renvoie (nombre marquées, nouveau nombre de non lues).
+    """
+    with transaction.atomic():
+        updated = notifications.filter(recipient=request.user, is_read=False).update(is_read=True)
+        UnreadCounter.objects.adjust({request.user.id: -updated})
+    unread = UnreadCounter.objects.get_count(request.user.id)
+    if updated:
+        push_unread_count(request.user.id, unread)
+    return updated, unread
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def list_notifications(request):
     notifications = Notification.objects.filter(recipient=request.user)
-    serializer = NotificationSerializer(notifications, many=True)
-    return Response(serializer.data)
+
+    # Pas de updated_at : l'ETag porte le nombre de non lues, qui change avec
+    # mark_as_read (et pas de Last-Modified, voir redteamcnbackend.conditional)
+    validators = queryset_validators(
+        request, notifications, updated_field='created_at',
+        unread=Count('pk', filter=Q(is_read=False)),
+    )
+    response = not_modified(request, validators)
+    if response is not None:
+        return response
+
+    serializer = NotificationSerializer(NotificationSerializer.setup_eager_loading(notifications), many=True)
+    return add_validators(request, Response(serializer.data), validators)
 
 @api_view(['PATCH'])
 @permission_classes([IsAuthenticated])
 def mark_as_read(request, notification_id):
-    try:
-        notification = Notification.objects.get(id=notification_id, recipient=request.user)
-    except Notification.DoesNotExist:
+    notifications = Notification.objects.filter(id=notification_id)
+    updated, unread = _mark_read(request, notifications)
+    # Rien de modifié : déjà lue, ou pas à cet utilisateur
+    if not updated and not notifications.filter(recipient=request.user).exists():
         return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response({'message': 'Marked as read', 'unread_count': unread})
+
+# Tout marquer comme lu
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def mark_all_read(request):
+    updated, unread = _mark_read(request, Notification.objects.all())
+    return Response({'updated': updated, 'unread_count': unread})
 
-    notification.is_read = True
-    notification.save()
-    return Response({'message': 'Marked as read'})
+# Marquer comme lues les notifications jusqu'à une date ou une notification incluse
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def mark_read_before(request):
+    """
+    Body: {"before": "2025-01-31T12:00:00Z"} (créées avant cette date)
+       ou {"cursor": 42} (la notification 42 et toutes les plus anciennes)
+    """
+    before, cursor = request.data.get('before'), request.data.get('cursor')
+    if before:
+        moment = parse_datetime(str(before))
+        if moment is None:
+            return Response({'error': 'before doit être une date ISO 8601'}, status=status.HTTP_400_BAD_REQUEST)
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        notifications = Notification.objects.filter(created_at__lt=moment)
+    elif isinstance(cursor, int) and not isinstance(cursor, bool):
+        # Même ordre que la liste (-created_at, -id), résolu dans l'UPDATE
+        reference = Subquery(
+            Notification.objects.filter(pk=cursor, recipient=request.user).values('created_at')
+        )
+        notifications = Notification.objects.filter(
+            Q(created_at__lt=reference) | Q(created_at=reference, id__lte=cursor)
+        )
+    else:
+        return Response({'error': 'before ou cursor requis'}, status=status.HTTP_400_BAD_REQUEST)
+
+    updated, unread = _mark_read(request, notifications)
+    return Response({'updated': updated, 'unread_count': unread})
+
+# Marquer comme lues des notifications données
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def mark_read(request):
+    """Body: {"ids": [1, 2, 3]}"""
+    ids = request.data.get('ids')
+    if (
+        not isinstance(ids, list) or not ids
+        or not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids)
+    ):
+        return Response({'error': 'ids doit être une liste non vide d\'entiers'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(ids) > MAX_MARK_READ_IDS:
+        return Response({'error': f'{MAX_MARK_READ_IDS} identifiants maximum'}, status=status.HTTP_400_BAD_REQUEST)
+
+    updated, unread = _mark_read(request, Notification.objects.filter(id__in=ids))
+    return Response({'updated': updated, 'unread_count': unread})
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def unread_count(request):
-    count = Notification.objects.filter(recipient=request.user, is_read=False).count()
-    return Response({'unread_count': count})
\ No newline at end of file
+    # Compteur dénormalisé (une ligne par clé primaire), pas de COUNT(*)
+    count = UnreadCounter.objects.get_count(request.user.id)
+    return Response({'unread_count': count})
+
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def outbox_status(request):
+    """État de l'outbox des emails : profondeur de la file, latence d'envoi"""
+    return Response(outbox_metrics())
@@ -0,0 +1,4 @@
+# Charger Celery avec Django (pour @shared_task)
+from .celery import app as celery_app
+
+__all__ = ('celery_app',)
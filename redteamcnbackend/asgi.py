@@ -3,6 +3,9 @@ ASGI config for redteamcnbackend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+HTTP est servi par Django ; les WebSockets (notifications en temps réel)
+par Channels, authentifiés par jeton JWT.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -13,4 +16,18 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'redteamcnbackend.settings')
 
-application = get_asgi_application()
+# Initialiser Django avant d'importer les consumers (modèles)
+django_asgi_app = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from channels.security.websocket import AllowedHostsOriginValidator  # noqa: E402
+
+from notifications.auth import JWTAuthMiddleware  # noqa: E402
+from notifications.routing import websocket_urlpatterns  # noqa: E402
+
+application = ProtocolTypeRouter({
+    'http': django_asgi_app,
+    'websocket': AllowedHostsOriginValidator(
+        JWTAuthMiddleware(URLRouter(websocket_urlpatterns))
+    ),
+})
@@ -0,0 +1,19 @@
+"""
+Application Celery du projet.
+
+Configuration lue dans les settings Django (préfixe `CELERY_`). Sans
+broker configuré (`memory://`), les tâches s'exécutent en mode eager,
+dans le processus qui les envoie : tests et développement n'ont besoin
+ni de Redis ni d'un worker.
+
+    celery -A redteamcnbackend worker -l info
+"""
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'redteamcnbackend.settings')
+
+app = Celery('redteamcnbackend')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -0,0 +1,81 @@
+"""
+Requêtes conditionnelles (ETag / Last-Modified / 304) pour les vues API.
+
+Les validateurs d'une liste sont calculés avec une seule requête
+d'agrégat (`MAX(updated_at)`, `COUNT(*)`) sur le queryset filtré : un
+client à jour reçoit un 304 sans que rien ne soit chargé ni sérialisé.
+
+Les listes n'ont qu'un ETag : `MAX(updated_at)` ne bouge pas quand une
+ligne plus ancienne est supprimée ou modifiée sans toucher ce champ, un
+`If-Modified-Since` seul renverrait alors un 304 périmé. Seuls les objets
+(`object_validators`) portent un `Last-Modified`.
+
+    validators = queryset_validators(request, queryset)
+    response = not_modified(request, validators)
+    if response is None:
+        response = Response(...)
+    return add_validators(request, response, validators)
+"""
+import hashlib
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+
+class Validators(NamedTuple):
+    etag: str
+    last_modified: Optional[datetime]
+
+
+def make_validators(request, parts, last_modified=None, per_user=True):
+    """
+    ETag faible dérivé de `parts`, de l'URL complète (filtres, curseur)
+    et, pour les listes privées, de l'utilisateur.
+    """
+    user_id = getattr(request.user, 'pk', None) if per_user else None
+    raw = '|'.join(str(part) for part in (request.get_full_path(), user_id, *parts))
+    digest = hashlib.sha1(raw.encode()).hexdigest()
+    return Validators(etag=f'W/"{digest}"', last_modified=last_modified)
+
+
+def queryset_validators(request, queryset, updated_field='updated_at', extra=(), per_user=True, **aggregates):
+    """Validateurs d'une liste : ETag sur MAX(updated_field), COUNT(*) et agrégats éventuels."""
+    stats = queryset.order_by().aggregate(
+        last_modified=Max(updated_field), count=Count('pk'), **aggregates
+    )
+    parts = [stats.pop('last_modified'), *sorted(stats.items()), *extra]
+    return make_validators(request, parts, per_user=per_user)
+
+
+def object_validators(request, obj, updated_field='updated_at'):
+    updated = getattr(obj, updated_field)
+    return make_validators(request, [obj.pk, updated], last_modified=updated)
+
+
+def not_modified(request, validators):
+    """Renvoie une réponse 304 si le client est à jour, sinon None."""
+    last_modified = validators.last_modified
+    response = get_conditional_response(
+        request,
+        etag=validators.etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is not None:
+        add_validators(request, response, validators)
+    return response
+
+
+def add_validators(request, response, validators):
+    response['ETag'] = validators.etag
+    if validators.last_modified is not None:
+        response['Last-Modified'] = http_date(validators.last_modified.timestamp())
+    # Toujours revalider ; les réponses authentifiées ne sont pas partagées
+    if getattr(request.user, 'is_authenticated', False):
+        patch_cache_control(response, no_cache=True, private=True)
+        patch_vary_headers(response, ['Authorization'])
+    else:
+        patch_cache_control(response, no_cache=True)
+    return response
@@ -0,0 +1,49 @@
+"""
+Comptages bon marché pour les listes paginées.
+
+`COUNT(*)` parcourt toutes les lignes retenues : sur une grande table, il
+coûte bien plus cher que la page elle-même. Sous PostgreSQL, au-delà de
+ESTIMATED_COUNT_THRESHOLD lignes, on renvoie l'estimation du
+planificateur (`pg_class.reltuples` sans filtre, `EXPLAIN` sinon). En
+dessous du seuil, et sur les autres bases, le comptage exact est gardé en
+cache COUNT_CACHE_TIMEOUT secondes.
+"""
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+ESTIMATED_COUNT_THRESHOLD = getattr(settings, 'ESTIMATED_COUNT_THRESHOLD', 100_000)
+COUNT_CACHE_TIMEOUT = getattr(settings, 'COUNT_CACHE_TIMEOUT', 60)
+
+
+def planner_estimate(queryset):
+    """Nombre de lignes estimé par PostgreSQL (-1 si table jamais analysée)"""
+    if not queryset.query.has_filters():
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        return row[0] if row else -1
+    plan = json.loads(queryset.order_by().values('pk').explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def estimated_count(queryset, cache_key=None, threshold=ESTIMATED_COUNT_THRESHOLD, timeout=COUNT_CACHE_TIMEOUT):
+    """Renvoie (nombre, estimé ?)"""
+    if connections[queryset.db].vendor == 'postgresql':
+        estimate = planner_estimate(queryset)
+        if estimate >= threshold:
+            return estimate, True
+
+    if cache_key is not None:
+        count = cache.get(cache_key)
+        if count is not None:
+            return count, False
+    count = queryset.count()
+    if cache_key is not None:
+        cache.set(cache_key, count, timeout)
+    return count, False
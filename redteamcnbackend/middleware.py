@@ -0,0 +1,33 @@
+"""
+Middlewares du projet.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django_otp.middleware import OTPMiddleware as BaseOTPMiddleware
+
+
+class OTPMiddleware(BaseOTPMiddleware):
+    """
+    `django_otp.middleware.OTPMiddleware` utilisable en async.
+
+    Le middleware d'origine est synchrone uniquement : sous ASGI, Django
+    exécute alors toute la suite de la chaîne dans un thread, y compris
+    les vues async (flux de notifications), qui bloquent ce thread tant
+    que la connexion reste ouverte. Le travail fait ici (un `request.user`
+    paresseux) ne touche pas la base : il peut tourner dans la boucle.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        # get_response est async : super().__call__ renvoie sa coroutine
+        return await super().__call__(request)
@@ -0,0 +1,153 @@
+import base64
+import binascii
+import json
+import math
+from datetime import date, datetime
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Pagination par curseur opaque (keyset / seek method).
+
+    Le curseur encode les valeurs des champs de tri du dernier élément
+    renvoyé : la page suivante est obtenue avec un WHERE sur ce tuple au
+    lieu d'un OFFSET. Les pages restent donc stables quand de nouvelles
+    lignes sont insérées pendant que le client pagine, et le coût d'une
+    page ne dépend pas de sa position.
+
+    `ordering` doit se terminer par un champ unique (ex: `-id`) et ne
+    contenir aucun champ nullable.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = api_settings.PAGE_SIZE or 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Curseur invalide'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.fields = [(name.lstrip('-'), name.startswith('-')) for name in self.ordering]
+
+        position, reverse = self.decode_cursor(request)
+
+        order_by = self.ordering
+        if reverse:
+            order_by = [name[1:] if name.startswith('-') else '-' + name for name in self.ordering]
+        queryset = queryset.order_by(*order_by)
+
+        if position is not None:
+            queryset = queryset.filter(self._seek(queryset.model, position, reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_previous = has_more
+            self.has_next = True
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        return {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    # ------------------------------------------------------------------
+    # Curseurs
+    # ------------------------------------------------------------------
+
+    def encode_cursor(self, obj, reverse):
+        position = [self._dump(getattr(obj, name)) for name, _ in self.fields]
+        payload = {'p': position}
+        if reverse:
+            payload['r'] = 1
+        raw = json.dumps(payload, separators=(',', ':')).encode()
+        token = base64.urlsafe_b64encode(raw).decode().rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+            payload = json.loads(raw)
+            position = payload['p']
+            reverse = bool(payload.get('r'))
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.fields):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    @staticmethod
+    def _dump(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        return value
+
+    def _seek(self, model, position, reverse):
+        """
+        Construit `(a < x) OR (a = x AND b < y) OR ...` pour le tuple de tri.
+        """
+        values = []
+        for (name, _), raw in zip(self.fields, position):
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                # Annotation (ex: rang de recherche) : un nombre
+                field = None
+            try:
+                value = float(raw) if field is None else field.to_python(raw)
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+            # Champs de tri non nullables : None n'est jamais une position valide
+            if value is None or (field is None and not math.isfinite(value)):
+                raise NotFound(self.invalid_cursor_message)
+            values.append(value)
+
+        condition = Q()
+        for index, ((name, descending), value) in enumerate(zip(self.fields, values)):
+            lookup = 'lt' if descending != reverse else 'gt'
+            step = Q(**{f'{name}__{lookup}': value})
+            for prior_name, prior_value in zip([n for n, _ in self.fields[:index]], values[:index]):
+                step &= Q(**{prior_name: prior_value})
+            condition |= step
+        return condition
@@ -0,0 +1,24 @@
+"""
+Outils de sérialisation partagés entre les apps.
+"""
+
+
+class EagerLoadingMixin:
+    """
+    Déclare les relations qu'un serializer parcourt pour chaque objet.
+
+    Les vues de liste passent leur queryset par `setup_eager_loading`
+    avant de sérialiser : les relations sont chargées par jointure
+    (`select_related`) ou en une requête groupée (`prefetch_related`)
+    au lieu d'une requête par ligne.
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        if cls.select_related_fields:
+            queryset = queryset.select_related(*cls.select_related_fields)
+        if cls.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*cls.prefetch_related_fields)
+        return queryset
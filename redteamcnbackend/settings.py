@@ -12,6 +12,8 @@ DEBUG = True
 ALLOWED_HOSTS = ['*']
 
 INSTALLED_APPS = [
+    # En premier : `runserver` sert l'application ASGI (WebSockets compris)
+    'daphne',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -89,7 +91,7 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'allauth.account.middleware.AccountMiddleware',
-    'django_otp.middleware.OTPMiddleware',
+    'redteamcnbackend.middleware.OTPMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'axes.middleware.AxesMiddleware',
@@ -114,6 +116,18 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'redteamcnbackend.wsgi.application'
+ASGI_APPLICATION = 'redteamcnbackend.asgi.application'
+
+# Couche de canaux (WebSockets) : en mémoire par défaut (un seul processus,
+# tests) ; channels_redis en production pour que les workers Celery et les
+# serveurs ASGI partagent les groupes
+CHANNEL_LAYER_URL = config('CHANNEL_LAYER_URL', default='')
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': config('CHANNEL_LAYER_BACKEND', default='channels.layers.InMemoryChannelLayer'),
+        'CONFIG': {'hosts': [CHANNEL_LAYER_URL]} if CHANNEL_LAYER_URL else {},
+    }
+}
 
 DATABASES = {
     'default': dj_database_url.config(
@@ -123,6 +137,115 @@ DATABASES = {
     )
 }
 
+# Cache (LocMem par défaut ; Redis en production pour partager la version du catalogue)
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='redteamcn'),
+    }
+}
+
+# Durée de vie (secondes) des réponses du catalogue public en cache
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', default=300, cast=int)
+
+# Listes paginées : au-delà de ce nombre de lignes, total estimé par
+# PostgreSQL (pg_class / EXPLAIN) ; en dessous, comptage exact en cache
+ESTIMATED_COUNT_THRESHOLD = config('ESTIMATED_COUNT_THRESHOLD', default=100000, cast=int)
+COUNT_CACHE_TIMEOUT = config('COUNT_CACHE_TIMEOUT', default=60, cast=int)
+
+# Annuaire des utilisateurs : forme d'avant la pagination (page sous `users`
+# pour l'admin, liste nue + en-tête Link pour /users/) tant que les clients
+# n'ont pas migré vers {"next", "previous", "results"}
+USER_DIRECTORY_LEGACY_SHAPE = config('USER_DIRECTORY_LEGACY_SHAPE', default=True, cast=bool)
+
+# Celery : broker en mémoire et exécution eager par défaut (tests, dev)
+CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='memory://')
+CELERY_TASK_ALWAYS_EAGER = config(
+    'CELERY_TASK_ALWAYS_EAGER', default=CELERY_BROKER_URL.startswith('memory://'), cast=bool
+)
+CELERY_TASK_EAGER_PROPAGATES = True
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_BEAT_SCHEDULE = {
+    # Répare la dérive éventuelle des compteurs de non lues
+    'reconcile-unread-counters': {
+        'task': 'notifications.tasks.reconcile_unread_counters',
+        'schedule': config('UNREAD_RECONCILE_INTERVAL', default=3600, cast=int),
+    },
+    # Rétention des notifications lues (archive + suppression par lots)
+    'purge-notifications': {
+        'task': 'notifications.tasks.purge_notifications',
+        'schedule': config('NOTIFICATION_PURGE_INTERVAL', default=86400, cast=int),
+    },
+    # Refresh tokens expirés (et leur entrée en liste noire)
+    'purge-expired-tokens': {
+        'task': 'tokens.tasks.purge_expired_tokens',
+        'schedule': config('TOKEN_PURGE_INTERVAL', default=86400, cast=int),
+    },
+    # Nouveaux essais de l'outbox des emails (l'envoi immédiat suit le commit)
+    'deliver-outbox': {
+        'task': 'notifications.tasks.deliver_outbox',
+        'schedule': config('EMAIL_OUTBOX_INTERVAL', default=30, cast=int),
+    },
+    # PostgreSQL partitionné uniquement (sinon sans effet)
+    'ensure-notification-partitions': {
+        'task': 'notifications.tasks.ensure_notification_partitions',
+        'schedule': 86400,
+    },
+}
+
+# Notifications : lignes insérées par bulk_create lors d'une diffusion
+NOTIFICATION_FANOUT_BATCH_SIZE = config('NOTIFICATION_FANOUT_BATCH_SIZE', default=500, cast=int)
+
+# Regroupement : un même (destinataire, verbe, composant) non lu reçu dans
+# la fenêtre (secondes, 0 = désactivé) incrémente `occurrences` au lieu
+# de créer une ligne
+NOTIFICATION_COALESCE_WINDOW = config('NOTIFICATION_COALESCE_WINDOW', default=3600, cast=int)
+NOTIFICATION_COALESCE_VERBS = ('review_created', 'review_updated')
+
+# Rétention : notifications lues supprimées après N jours, archivées au
+# préalable en JSONL gzip dans NOTIFICATION_ARCHIVE_DIR ('' = sans archive)
+NOTIFICATION_RETENTION_DAYS = config('NOTIFICATION_RETENTION_DAYS', default=90, cast=int)
+NOTIFICATION_PURGE_CHUNK_SIZE = config('NOTIFICATION_PURGE_CHUNK_SIZE', default=1000, cast=int)
+NOTIFICATION_ARCHIVE_DIR = config('NOTIFICATION_ARCHIVE_DIR', default=str(BASE_DIR / 'archives' / 'notifications'))
+
+# SSE / long-poll : durée max d'une connexion et intervalle des heartbeats (secondes)
+NOTIFICATION_STREAM_TIMEOUT = config('NOTIFICATION_STREAM_TIMEOUT', default=55, cast=int)
+NOTIFICATION_STREAM_HEARTBEAT = config('NOTIFICATION_STREAM_HEARTBEAT', default=15, cast=int)
+NOTIFICATION_POLL_TIMEOUT = config('NOTIFICATION_POLL_TIMEOUT', default=30, cast=int)
+
+# Digest périodique (secondes, 0 = désactivé) : fusionne les doublons non
+# lus restants, quel que soit leur âge
+NOTIFICATION_DIGEST_INTERVAL = config('NOTIFICATION_DIGEST_INTERVAL', default=0, cast=int)
+if NOTIFICATION_DIGEST_INTERVAL:
+    CELERY_BEAT_SCHEDULE['digest-notifications'] = {
+        'task': 'notifications.tasks.digest_notifications',
+        'schedule': NOTIFICATION_DIGEST_INTERVAL,
+    }
+
+# Hachage des mots de passe : PASSWORD_HASHER choisit l'algorithme des
+# nouveaux hashs ; les autres restent acceptés et sont refaits à la
+# connexion (argon2 / bcrypt_sha256 : paquets argon2-cffi / bcrypt)
+PASSWORD_HASHER_CHOICES = {
+    'pbkdf2_sha256': 'users.hashers.PBKDF2PasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'bcrypt_sha256': 'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'pbkdf2_sha1': 'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+}
+PASSWORD_HASHER = config('PASSWORD_HASHER', default='pbkdf2_sha256')
+PASSWORD_HASHERS = [PASSWORD_HASHER_CHOICES[PASSWORD_HASHER]] + [
+    path for algorithm, path in PASSWORD_HASHER_CHOICES.items() if algorithm != PASSWORD_HASHER
+]
+# 0 = nombre d'itérations par défaut de Django
+PASSWORD_PBKDF2_ITERATIONS = config('PASSWORD_PBKDF2_ITERATIONS', default=0, cast=int)
+# Pool de hachage (users.hashing) : threads (0 = dans la requête), file
+# d'attente max avant de répondre 503, délai max d'un calcul (secondes)
+PASSWORD_HASHING_WORKERS = config('PASSWORD_HASHING_WORKERS', default=os.cpu_count() or 1, cast=int)
+PASSWORD_HASHING_MAX_QUEUE = config('PASSWORD_HASHING_MAX_QUEUE', default=64, cast=int)
+PASSWORD_HASHING_TIMEOUT = config('PASSWORD_HASHING_TIMEOUT', default=10, cast=int)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -160,7 +283,7 @@ AUTH_USER_MODEL = 'users.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
     'rest_framework.permissions.AllowAny',
@@ -180,8 +303,24 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'BLACKLIST_AFTER_ROTATION': True,
     'TOKEN_BLACKLIST_ENABLED': True,
+    'TOKEN_REFRESH_SERIALIZER': 'users.authentication.PrincipalTokenRefreshSerializer',
 }
 
+# Authentification : utilisateur gardé en cache N secondes (invalidé à
+# chaque modification) ; AUTH_TRUST_TOKEN_CLAIMS=True se fie au rôle et au
+# statut signés dans le jeton d'accès (effet différé jusqu'à son expiration)
+AUTH_USER_CACHE_TIMEOUT = config('AUTH_USER_CACHE_TIMEOUT', default=60, cast=int)
+AUTH_TRUST_TOKEN_CLAIMS = config('AUTH_TRUST_TOKEN_CLAIMS', default=False, cast=bool)
+
+# Liste noire des refresh tokens : filtre de Bloom par processus (capacité
+# initiale, taux de faux positifs, reconstruction après N secondes) ;
+# sans cache partagé, resynchronisation toutes les N secondes
+TOKEN_BLACKLIST_FILTER_CAPACITY = config('TOKEN_BLACKLIST_FILTER_CAPACITY', default=100000, cast=int)
+TOKEN_BLACKLIST_FILTER_ERROR_RATE = config('TOKEN_BLACKLIST_FILTER_ERROR_RATE', default=0.001, cast=float)
+TOKEN_BLACKLIST_FILTER_MAX_AGE = config('TOKEN_BLACKLIST_FILTER_MAX_AGE', default=86400, cast=int)
+TOKEN_BLACKLIST_SYNC_INTERVAL = config('TOKEN_BLACKLIST_SYNC_INTERVAL', default=5, cast=int)
+TOKEN_PURGE_CHUNK_SIZE = config('TOKEN_PURGE_CHUNK_SIZE', default=1000, cast=int)
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'RedTeamCN API',
     'DESCRIPTION': 'Plateforme de design system',
@@ -203,3 +342,11 @@ ACCOUNT_EMAIL_REQUIRED = True
 ACCOUNT_EMAIL_VERIFICATION = 'mandatory'
 ACCOUNT_AUTHENTICATION_METHOD = 'email'
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+
+# Outbox des emails (notifications.outbox) : taille des lots, essais max,
+# backoff exponentiel (secondes, plafond) et bail d'un lot en cours d'envoi
+EMAIL_OUTBOX_BATCH_SIZE = config('EMAIL_OUTBOX_BATCH_SIZE', default=100, cast=int)
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=5, cast=int)
+EMAIL_OUTBOX_BACKOFF = config('EMAIL_OUTBOX_BACKOFF', default=60, cast=int)
+EMAIL_OUTBOX_BACKOFF_MAX = config('EMAIL_OUTBOX_BACKOFF_MAX', default=3600, cast=int)
+EMAIL_OUTBOX_LEASE = config('EMAIL_OUTBOX_LEASE', default=300, cast=int)
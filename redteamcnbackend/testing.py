@@ -0,0 +1,75 @@
+"""
+Outils de test partagés entre les apps.
+"""
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+# Marqueurs d'un tri explicite dans un plan d'exécution
+SORT_MARKERS = {
+    'sqlite': re.compile(r'USE TEMP B-TREE FOR (ORDER BY|RIGHT PART OF ORDER BY)'),
+    'postgresql': re.compile(r'^\s*(->\s*)?(Incremental )?Sort\b', re.MULTILINE),
+}
+
+
+class QueryPlanAssertionsMixin:
+    """
+    Assertions sur le plan d'exécution (`EXPLAIN`) d'un queryset, pour
+    SQLite et PostgreSQL.
+
+    Les tables de test sont minuscules : sur PostgreSQL on désactive le
+    seq scan pour la transaction du test, afin que le plan reflète les
+    index disponibles plutôt que la taille des données.
+    """
+
+    def explain(self, queryset):
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def assertUsesIndex(self, queryset, index_name, allow_sort=False):
+        plan = self.explain(queryset)
+        self.assertIn(index_name, plan, f"Index {index_name} non utilisé :\n{plan}")
+        marker = SORT_MARKERS.get(connections[queryset.db].vendor)
+        if marker is not None and not allow_sort:
+            self.assertIsNone(marker.search(plan), f"Tri explicite dans le plan :\n{plan}")
+        return plan
+
+
+class QueryBudgetAssertionsMixin:
+    """
+    Détection des N+1 : le nombre de requêtes d'une vue de liste ne doit
+    pas dépendre du nombre de lignes affichées.
+
+    `seed(n)` ajoute n lignes, `fetch()` appelle la vue (et vérifie sa
+    réponse). Les requêtes de `fetch` sont comptées après chaque palier
+    de `sizes` et doivent être identiques.
+    """
+    query_budget_sizes = (1, 5, 10)
+
+    def assertConstantQueries(self, seed, fetch, sizes=None, using=DEFAULT_DB_ALIAS, budget=None):
+        sizes = sizes or self.query_budget_sizes
+        counts, queries, seeded = {}, {}, 0
+        for size in sizes:
+            seed(size - seeded)
+            seeded = size
+            with CaptureQueriesContext(connections[using]) as context:
+                fetch()
+            counts[size] = len(context)
+            queries[size] = [query['sql'] for query in context.captured_queries]
+
+        largest = sizes[-1]
+        self.assertEqual(
+            len(set(counts.values())), 1,
+            f"Le nombre de requêtes varie avec le nombre de lignes : {counts}\n"
+            + '\n'.join(queries[largest]),
+        )
+        if budget is not None:
+            self.assertLessEqual(
+                counts[largest], budget,
+                f"{counts[largest]} requêtes pour un budget de {budget} :\n" + '\n'.join(queries[largest]),
+            )
+        return counts[largest]
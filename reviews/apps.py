@@ -1,6 +1,10 @@
 from django.apps import AppConfig
+import importlib
 
 
 class ReviewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reviews'
+
+    def ready(self):
+        importlib.import_module('reviews.signals')  # Compteurs de notes
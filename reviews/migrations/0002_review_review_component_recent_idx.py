@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0006_component_component_approved_recent_idx_and_more'),
+        ('reviews', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['component', '-created_at', '-id'], name='review_component_recent_idx'),
+        ),
+    ]
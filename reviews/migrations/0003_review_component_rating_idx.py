@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0011_catalogfacetcount'),
+        ('reviews', '0002_review_review_component_recent_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['component', '-rating', '-id'], name='review_component_rating_idx'),
+        ),
+    ]
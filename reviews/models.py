@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from catalog.models import Component
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -17,6 +17,23 @@ class Review(models.Model):
 
     class Meta:
         unique_together = ('component', 'user')  # 1 review par user
+        indexes = [
+            models.Index(fields=['component', '-created_at', '-id'], name='review_component_recent_idx'),
+            models.Index(fields=['component', '-rating', '-id'], name='review_component_rating_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.user.email} - {self.component.name} - {self.rating} étoile(s)"
\ No newline at end of file
+        return f"{self.user.email} - {self.component.name} - {self.rating} étoile(s)"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Note en base, pour ajuster les compteurs du composant à la modification
+        if 'rating' in field_names:
+            instance._loaded_rating = instance.rating
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Compteurs du composant (signal post_save) dans la même transaction
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
\ No newline at end of file
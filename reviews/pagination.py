@@ -0,0 +1,15 @@
+from redteamcnbackend.pagination import KeysetPagination
+
+
+class ReviewPagination(KeysetPagination):
+    """Pagination des reviews d'un composant (plus récentes d'abord)"""
+    ordering = ('-created_at', '-id')
+    max_page_size = 100
+
+    # Valeurs de ?ordering= -> tri keyset (index composites de Review)
+    orderings = {
+        '-created_at': ('-created_at', '-id'),
+        'created_at': ('created_at', 'id'),
+        '-rating': ('-rating', '-id'),
+        'rating': ('rating', 'id'),
+    }
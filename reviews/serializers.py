@@ -1,12 +1,54 @@
 from rest_framework import serializers
+from django.contrib.auth import get_user_model
 from .models import Review
 from users.serializers import UserSerializer
+from redteamcnbackend.serializers import EagerLoadingMixin
 
-class ReviewSerializer(serializers.ModelSerializer):
+User = get_user_model()
+
+
+class ReviewAuthorSerializer(serializers.ModelSerializer):
+    """Projection compacte de l'auteur d'une review (listes)"""
+    display_name = serializers.SerializerMethodField()
+
+    # Seules colonnes de User lues pour cette projection
+    load_fields = ('id', 'username', 'first_name', 'last_name', 'role')
+
+    class Meta:
+        model = User
+        fields = ['id', 'display_name', 'role']
+        read_only_fields = fields
+
+    def get_display_name(self, obj):
+        return obj.get_full_name() or obj.username
+
+
+class ReviewSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     component = serializers.PrimaryKeyRelatedField(read_only=True)
 
+    select_related_fields = ('user',)
+
     class Meta:
         model = Review
         fields = ['id', 'component', 'user', 'rating', 'comment', 'created_at', 'updated_at']
-        read_only_fields = ['created_at', 'updated_at']
\ No newline at end of file
+        read_only_fields = ['created_at', 'updated_at']
+
+
+class ReviewListSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    """Reviews d'un composant : auteur réduit à (id, display_name, role)"""
+    user = ReviewAuthorSerializer(read_only=True)
+
+    select_related_fields = ('user',)
+
+    class Meta:
+        model = Review
+        fields = ['id', 'component', 'user', 'rating', 'comment', 'created_at', 'updated_at']
+        read_only_fields = fields
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        # Jointure sur User limitée aux colonnes de la projection
+        review_fields = [field.attname for field in Review._meta.concrete_fields]
+        author_fields = [f'user__{name}' for name in ReviewAuthorSerializer.load_fields]
+        return super().setup_eager_loading(queryset).only(*review_fields, *author_fields)
@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from catalog.cache import bump_catalog_version_on_commit
+from catalog.models import Component
+from .models import Review
+
+
+@receiver(post_save, sender=Review)
+def update_component_rating(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_loaded_rating', None)
+    if created:
+        Component.objects.apply_rating_change(instance.component_id, added=instance.rating)
+    elif previous is not None and previous != instance.rating:
+        Component.objects.apply_rating_change(instance.component_id, added=instance.rating, removed=previous)
+    else:
+        return
+    instance._loaded_rating = instance.rating
+    # Les notes sont affichées dans le catalogue
+    bump_catalog_version_on_commit()
+
+
+@receiver(post_delete, sender=Review)
+def remove_component_rating(sender, instance, **kwargs):
+    removed = getattr(instance, '_loaded_rating', instance.rating)
+    Component.objects.apply_rating_change(instance.component_id, removed=removed)
+    bump_catalog_version_on_commit()
@@ -1,3 +1,185 @@
+from datetime import timedelta
+from itertools import count
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+
+from catalog.models import Component
+from redteamcnbackend.testing import QueryBudgetAssertionsMixin, QueryPlanAssertionsMixin
+from .models import Review
+
+User = get_user_model()
+
+
+class ReviewQueryPlanTests(QueryPlanAssertionsMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='dev@example.com', username='dev', password='x' * 10)
+        cls.component = Component.objects.create(
+            name='Carte', category='CARD', code='<div></div>', created_by=cls.user, status='approved',
+        )
+        Review.objects.create(component=cls.component, user=cls.user, rating=4)
+
+    def test_component_reviews_use_composite_index(self):
+        queryset = Review.objects.filter(component=self.component).order_by('-created_at', '-id')[:21]
+        self.assertUsesIndex(queryset, 'review_component_recent_idx')
+
+    def test_component_reviews_by_rating_use_composite_index(self):
+        queryset = Review.objects.filter(component=self.component).order_by('-rating', '-id')[:21]
+        self.assertUsesIndex(queryset, 'review_component_rating_idx')
+
+
+class ReviewQueryBudgetTests(QueryBudgetAssertionsMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='dev@example.com', username='dev')
+        cls.component = Component.objects.create(
+            name='Carte', category='CARD', code='<div></div>', created_by=cls.user, status='approved',
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.numbers = count()
+
+    def seed(self, n):
+        for _ in range(n):
+            number = next(self.numbers)
+            # Une review par auteur
+            author = User.objects.create_user(email=f'reviewer{number}@example.com', username=f'reviewer{number}')
+            Review.objects.create(component=self.component, user=author, rating=number % 5 + 1)
+
+    def fetch(self, query=''):
+        response = self.client.get(f'/api/components/{self.component.pk}/reviews/{query}')
+        self.assertEqual(response.status_code, 200)
+
+    def test_component_reviews(self):
+        self.assertConstantQueries(self.seed, self.fetch)
+
+    def test_component_reviews_by_rating(self):
+        self.assertConstantQueries(self.seed, lambda: self.fetch('?ordering=-rating'))
+
+
+class ComponentRatingTests(TestCase):
+    """Compteurs de notes tenus par reviews.signals (un UPDATE par changement)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='dev@example.com', username='dev')
+        cls.reviewers = [
+            User.objects.create_user(email=f'reviewer{index}@example.com', username=f'reviewer{index}')
+            for index in range(3)
+        ]
+
+    def setUp(self):
+        self.component = Component.objects.create(
+            name='Carte', category='CARD', code='<div></div>', created_by=self.owner, status='approved',
+        )
+
+    def assertRatings(self, count, total, histogram):
+        self.component.refresh_from_db()
+        self.assertEqual(self.component.rating_count, count)
+        self.assertEqual(self.component.rating_sum, total)
+        self.assertAlmostEqual(self.component.rating_avg, total / count if count else 0.0)
+        self.assertEqual(self.component.rating_histogram, {star: histogram.get(star, 0) for star in range(1, 6)})
+
+    def test_create_update_delete(self):
+        reviews = [
+            Review.objects.create(component=self.component, user=user, rating=rating)
+            for user, rating in zip(self.reviewers, (5, 3, 5))
+        ]
+        self.assertRatings(3, 13, {5: 2, 3: 1})
+
+        reviews[0].rating = 1
+        reviews[0].save()
+        self.assertRatings(3, 9, {1: 1, 3: 1, 5: 1})
+
+        # Relecture depuis la base : la note d'origine vient de from_db
+        review = Review.objects.get(pk=reviews[1].pk)
+        review.rating = 4
+        review.save()
+        self.assertRatings(3, 10, {1: 1, 4: 1, 5: 1})
+
+        # Enregistrement sans changement de note : compteurs inchangés
+        review.comment = 'Bien'
+        review.save()
+        self.assertRatings(3, 10, {1: 1, 4: 1, 5: 1})
+
+        Review.objects.get(pk=reviews[2].pk).delete()
+        reviews[0].delete()
+        self.assertRatings(1, 4, {4: 1})
+        review.delete()
+        self.assertRatings(0, 0, {})
+
+    def test_new_review_invalidates_my_components(self):
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        response = client.get('/api/components/my/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertEqual(client.get('/api/components/my/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Review.objects.create(component=self.component, user=self.reviewers[0], rating=4)
+
+        response = client.get('/api/components/my/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['results'][0]['rating_count'], 1)
+
+
+class ReviewConditionalGetTests(TestCase):
+    """Reviews : ETag sur la liste, ETag et Last-Modified sur le détail."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='dev@example.com', username='dev')
+        cls.reviewers = [
+            User.objects.create_user(email=f'reviewer{index}@example.com', username=f'reviewer{index}')
+            for index in range(2)
+        ]
+        cls.component = Component.objects.create(
+            name='Carte', category='CARD', code='<div></div>', created_by=cls.owner, status='approved',
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.reviewers[0])
+        self.review = Review.objects.create(component=self.component, user=self.reviewers[0], rating=4)
+        self.url = f'/api/components/{self.component.pk}/reviews/'
+
+    def test_list_etag(self):
+        response = self.client.get(self.url)
+        self.assertNotIn('Last-Modified', response)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Suppression d'une review plus ancienne : MAX(updated_at) inchangé, l'ETag non
+        newer = Review.objects.create(component=self.component, user=self.reviewers[1], rating=2)
+        etag = self.client.get(self.url)['ETag']
+        self.review.delete()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in response.data['results']], [newer.pk])
+
+    def test_list_ignores_if_modified_since(self):
+        since = http_date(self.review.updated_at.timestamp() + 60)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=since).status_code, 200)
+
+    def test_detail_validators(self):
+        url = f'/api/reviews/{self.review.pk}/'
+        response = self.client.get(url)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
 
-# Create your tests here.
+        self.assertEqual(self.client.put(url, {'comment': 'Bien'}, format='json').status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        # Last-Modified est à la seconde : modification vue une minute plus tard
+        Review.objects.filter(pk=self.review.pk).update(updated_at=self.review.updated_at + timedelta(minutes=1))
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['comment'], 'Bien')
@@ -3,23 +3,47 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from .models import Review
-from .serializers import ReviewSerializer
+from .pagination import ReviewPagination
+from .serializers import ReviewListSerializer, ReviewSerializer
 from catalog.models import Component
+from redteamcnbackend.conditional import add_validators, not_modified, object_validators, queryset_validators
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def review_list_create(request, component_id):
+    if request.method == 'GET':
+        # Pas de lecture préalable du composant : filtre direct sur la clé
+        reviews = Review.objects.filter(component_id=component_id)
+
+        paginator = ReviewPagination()
+        ordering = request.query_params.get('ordering')
+        if ordering:
+            if ordering not in ReviewPagination.orderings:
+                return Response(
+                    {'error': f"ordering doit être parmi : {', '.join(ReviewPagination.orderings)}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            paginator.ordering = ReviewPagination.orderings[ordering]
+
+        validators = queryset_validators(request, reviews)
+        response = not_modified(request, validators)
+        if response is not None:
+            return response
+
+        page = paginator.paginate_queryset(ReviewListSerializer.setup_eager_loading(reviews), request)
+        # Page vide seulement : le composant existe-t-il ?
+        if not page and not Component.objects.filter(id=component_id).exists():
+            return Response({'error': 'Component not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        serializer = ReviewListSerializer(page, many=True)
+        return add_validators(request, paginator.get_paginated_response(serializer.data), validators)
+
     try:
         component = Component.objects.get(id=component_id)
     except Component.DoesNotExist:
         return Response({'error': 'Component not found'}, status=status.HTTP_404_NOT_FOUND)
 
-    if request.method == 'GET':
-        reviews = Review.objects.filter(component=component)
-        serializer = ReviewSerializer(reviews, many=True)
-        return Response(serializer.data)
-
-    elif request.method == 'POST':
+    if request.method == 'POST':
         data = request.data.copy()
         data['component'] = component.id
 
@@ -39,8 +63,13 @@ def review_detail(request, review_id):
         return Response({'error': 'Review not found'}, status=status.HTTP_404_NOT_FOUND)
 
     if request.method == 'GET':
+        validators = object_validators(request, review)
+        response = not_modified(request, validators)
+        if response is not None:
+            return response
+
         serializer = ReviewSerializer(review)
-        return Response(serializer.data)
+        return add_validators(request, Response(serializer.data), validators)
 
     if review.user != request.user:
         return Response({'error': 'You can only modify your own review'}, status=status.HTTP_403_FORBIDDEN)
@@ -1,6 +1,10 @@
 from django.apps import AppConfig
+import importlib
 
 
 class TokensConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tokens'
+
+    def ready(self):
+        importlib.import_module('tokens.signals')  # Filtre de la liste noire
@@ -0,0 +1,143 @@
+"""
+Liste noire des refresh tokens vérifiée sans requête dans le cas courant.
+
+SimpleJWT exécute `BlacklistedToken.objects.filter(token__jti=jti).exists()`
+à chaque rafraîchissement. Ici, chaque processus garde un filtre de Bloom
+des jti en liste noire (et non expirés) : un jti absent du filtre n'est
+certainement pas en liste noire, sans aller en base ; un jti présent est
+confirmé en base (faux positifs : `TOKEN_BLACKLIST_FILTER_ERROR_RATE`).
+
+Cohérence entre processus : une « génération » dans le cache change à
+chaque ajout en liste noire (après commit). Un processus qui voit une
+génération différente de la sienne charge les lignes récentes avant de
+répondre. Sans cache partagé (LocMem avec plusieurs processus), la
+génération locale expire au bout de `TOKEN_BLACKLIST_SYNC_INTERVAL`
+secondes : un token mis en liste noire par un autre processus peut alors
+rester accepté pendant ce délai.
+
+Le filtre est reconstruit (sans les tokens expirés) après
+`TOKEN_BLACKLIST_FILTER_MAX_AGE` secondes, ou dès qu'il dépasse sa
+capacité.
+"""
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .bloom import BloomFilter
+
+FILTER_CAPACITY = getattr(settings, 'TOKEN_BLACKLIST_FILTER_CAPACITY', 100_000)
+FILTER_ERROR_RATE = getattr(settings, 'TOKEN_BLACKLIST_FILTER_ERROR_RATE', 0.001)
+FILTER_MAX_AGE = getattr(settings, 'TOKEN_BLACKLIST_FILTER_MAX_AGE', 86400)
+SYNC_INTERVAL = getattr(settings, 'TOKEN_BLACKLIST_SYNC_INTERVAL', 5)
+
+GENERATION_CACHE_KEY = 'tokens:blacklist:generation'
+# Chevauchement des chargements incrémentaux : couvre les transactions
+# dont la ligne, horodatée avant le chargement précédent, a été commitée après
+SYNC_OVERLAP = timedelta(minutes=5)
+
+
+def bump_generation():
+    cache.set(GENERATION_CACHE_KEY, uuid.uuid4().hex, None)
+
+
+def bump_generation_on_commit():
+    transaction.on_commit(bump_generation)
+
+
+def current_generation():
+    generation = cache.get(GENERATION_CACHE_KEY)
+    if generation is None:
+        # Cache vidé, ou cache propre au processus : relecture périodique
+        generation = uuid.uuid4().hex
+        if not cache.add(GENERATION_CACHE_KEY, generation, SYNC_INTERVAL):
+            generation = cache.get(GENERATION_CACHE_KEY, generation)
+    return generation
+
+
+class BlacklistFilter:
+    """Filtre de Bloom des jti en liste noire, tenu à jour par génération"""
+
+    def __init__(self, capacity=FILTER_CAPACITY, error_rate=FILTER_ERROR_RATE, max_age=FILTER_MAX_AGE):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.max_age = max_age
+        self.bloom = None
+        self.generation = None
+        self.built_at = 0.0
+        self.synced_at = None
+        self.lock = threading.Lock()
+
+    def rebuild(self):
+        """Recharge tous les jti en liste noire non expirés"""
+        with self.lock:
+            self._rebuild(current_generation())
+        return self.bloom
+
+    def _rebuild(self, generation):
+        now = timezone.now()
+        jtis = (
+            BlacklistedToken.objects.filter(token__expires_at__gt=now)
+            .values_list('token__jti', flat=True)
+        )
+        count = jtis.count()
+        capacity = max(self.capacity, 2 * count)
+        bloom = BloomFilter(capacity, self.error_rate)
+        bloom.update(jtis.iterator(chunk_size=10_000))
+        self.bloom, self.capacity = bloom, capacity
+        self.generation, self.synced_at, self.built_at = generation, now, time.monotonic()
+
+    def _load_recent(self, generation):
+        now = timezone.now()
+        self.bloom.update(
+            BlacklistedToken.objects.filter(blacklisted_at__gte=self.synced_at - SYNC_OVERLAP)
+            .values_list('token__jti', flat=True)
+            .iterator(chunk_size=10_000)
+        )
+        self.generation, self.synced_at = generation, now
+
+    def sync(self):
+        """Met le filtre à jour si la génération a changé (une lecture de cache sinon)"""
+        generation = current_generation()
+        bloom = self.bloom
+        if (
+            bloom is not None and generation == self.generation
+            and not bloom.saturated and time.monotonic() - self.built_at < self.max_age
+        ):
+            return bloom
+        with self.lock:
+            if self.bloom is None or self.bloom.saturated or time.monotonic() - self.built_at >= self.max_age:
+                self._rebuild(generation)
+            elif generation != self.generation:
+                self._load_recent(generation)
+            return self.bloom
+
+    def add(self, jti):
+        """Ajout local immédiat (les autres processus suivent la génération)"""
+        bloom = self.bloom
+        if bloom is not None:
+            bloom.add(jti)
+
+    def reset(self):
+        with self.lock:
+            self.bloom = None
+            self.generation = None
+
+    def __contains__(self, jti):
+        return jti in self.sync()
+
+
+blacklist_filter = BlacklistFilter()
+
+
+def is_blacklisted(jti):
+    if jti not in blacklist_filter:
+        return False
+    # Présent dans le filtre : peut-être un faux positif
+    return BlacklistedToken.objects.filter(token__jti=jti).exists()
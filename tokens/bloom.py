@@ -0,0 +1,48 @@
+"""
+Filtre de Bloom minimal (chaînes de caractères).
+
+Réponse « absent » certaine, « présent » probable : le taux de faux
+positifs reste proche de `error_rate` tant que le nombre d'éléments
+ajoutés ne dépasse pas `capacity`. Aucune suppression possible.
+"""
+import hashlib
+import math
+
+
+class BloomFilter:
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(1, int(capacity))
+        self.error_rate = error_rate
+        # Taille optimale (bits) et nombre de fonctions de hachage
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # Double hachage (Kirsch-Mitzenmacher) à partir d'un seul condensat
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def update(self, keys):
+        for key in keys:
+            self.add(key)
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def saturated(self):
+        return self.count > self.capacity
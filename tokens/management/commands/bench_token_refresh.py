@@ -0,0 +1,108 @@
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.views import TokenRefreshView
+
+from tokens.blacklist import blacklist_filter
+from users.authentication import PrincipalRefreshToken
+
+User = get_user_model()
+
+JTI_PREFIX = 'bench-refresh-'
+SERIALIZERS = {
+    'simplejwt': 'rest_framework_simplejwt.serializers.TokenRefreshSerializer',
+    'filtre': 'users.authentication.PrincipalTokenRefreshSerializer',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le débit de POST /auth/refresh/ avec N tokens en liste noire : "
+        "vérification SimpleJWT (requête par rafraîchissement) contre filtre "
+        "en mémoire. Les lignes créées pour l'occasion sont supprimées à la fin."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tokens', type=int, default=1_000_000, help="Tokens en liste noire")
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(email='bench-refresh@redteamcn.local', username='bench-refresh')
+        try:
+            self._seed(user, options['tokens'], options['batch_size'])
+            refresh = str(PrincipalRefreshToken.for_user(user))
+            revoked = PrincipalRefreshToken.for_user(user)
+            revoked.blacklist()
+
+            started = time.perf_counter()
+            bloom = blacklist_filter.rebuild()
+            self.stdout.write(
+                f"Filtre : {len(bloom)} jti, {len(bloom.bits) / 1024:.0f} Kio, "
+                f"{bloom.hashes} hachages, construit en {time.perf_counter() - started:.2f}s"
+            )
+
+            for label, serializer in SERIALIZERS.items():
+                view = TokenRefreshView.as_view(_serializer_class=serializer)
+                self._check_revoked(view, str(revoked))
+                self._measure(label, view, refresh, options['requests'])
+        finally:
+            # Sans signal ni cascade : un seul DELETE, sans charger les lignes
+            BlacklistedToken.objects.filter(token__jti__startswith=JTI_PREFIX).delete()
+            # Le collecteur chargerait les N tokens en mémoire : DELETE SQL direct
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'DELETE FROM {connection.ops.quote_name(OutstandingToken._meta.db_table)} WHERE jti LIKE %s',
+                    [f'{JTI_PREFIX}%'],
+                )
+            # Tokens du login de bench : supprimés en cascade
+            OutstandingToken.objects.filter(user=user).delete()
+            user.delete()
+            blacklist_filter.reset()
+
+    def _seed(self, user, total, batch_size):
+        expires_at = timezone.now() + timedelta(days=7)
+        started = time.perf_counter()
+        created = 0
+        while created < total:
+            size = min(batch_size, total - created)
+            tokens = OutstandingToken.objects.bulk_create([
+                OutstandingToken(user=user, jti=f'{JTI_PREFIX}{uuid.uuid4().hex}', token='', expires_at=expires_at)
+                for _ in range(size)
+            ])
+            if tokens[0].pk is None:
+                # Backend sans RETURNING : relecture des identifiants
+                tokens = OutstandingToken.objects.filter(
+                    jti__in=[token.jti for token in tokens]
+                ).only('pk')
+            BlacklistedToken.objects.bulk_create([BlacklistedToken(token=token) for token in tokens])
+            created += size
+        self.stdout.write(f"{created} tokens en liste noire créés en {time.perf_counter() - started:.1f}s")
+
+    def _check_revoked(self, view, token):
+        request = APIRequestFactory().post('/api/auth/refresh/', {'refresh': token}, format='json')
+        response = view(request)
+        if response.status_code != 401:
+            raise AssertionError(f"Token en liste noire accepté ({response.status_code})")
+
+    def _measure(self, label, view, token, requests):
+        factory = APIRequestFactory()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(requests):
+                response = view(factory.post('/api/auth/refresh/', {'refresh': token}, format='json'))
+                if response.status_code != 200:
+                    raise AssertionError(f"{label} : rafraîchissement refusé ({response.status_code})")
+            elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{label:>10} : {requests / elapsed:8.0f} req/s, "
+            f"{len(queries) / requests:.2f} requête(s) SQL par rafraîchissement"
+        )
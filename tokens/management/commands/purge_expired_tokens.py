@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from tokens.purge import PURGE_CHUNK_SIZE, purge_expired_tokens
+
+
+class Command(BaseCommand):
+    help = "Supprime par lots les refresh tokens expirés (et leur entrée en liste noire)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=PURGE_CHUNK_SIZE)
+        parser.add_argument('--pause', type=float, default=0.0, help="Pause (secondes) entre deux lots")
+        parser.add_argument('--dry-run', action='store_true', help="Compter seulement")
+
+    def handle(self, *args, **options):
+        count = purge_expired_tokens(
+            chunk_size=max(1, options['chunk_size']), pause=options['pause'], dry_run=options['dry_run'],
+        )
+        if options['dry_run']:
+            self.stdout.write(f"{count} token(s) expiré(s) à purger")
+            return
+        self.stdout.write(self.style.SUCCESS(f"{count} token(s) expiré(s) supprimé(s)"))
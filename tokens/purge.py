@@ -0,0 +1,39 @@
+"""
+Purge des refresh tokens expirés (`OutstandingToken` et `BlacklistedToken`).
+
+`flushexpiredtokens` (SimpleJWT) supprime tout en une seule requête, via
+le collecteur de Django. Ici, par lots de `chunk_size` lignes, par clé
+primaire croissante (les plus anciennes expirent les premières), chaque
+lot dans sa propre transaction courte. Un token expiré est de toute façon
+refusé : le supprimer de la liste noire ne rouvre rien.
+"""
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+PURGE_CHUNK_SIZE = getattr(settings, 'TOKEN_PURGE_CHUNK_SIZE', 1000)
+
+
+def purge_expired_tokens(chunk_size=PURGE_CHUNK_SIZE, pause=0.0, dry_run=False):
+    """Renvoie le nombre de tokens (outstanding) supprimés, ou à supprimer si `dry_run`"""
+    queryset = OutstandingToken.objects.filter(expires_at__lte=timezone.now())
+    if dry_run:
+        return queryset.count()
+
+    deleted, last_pk = 0, 0
+    while True:
+        with transaction.atomic():
+            ids = list(queryset.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:chunk_size])
+            if not ids:
+                break
+            last_pk = ids[-1]
+            # Liste noire d'abord : sans signal ni cascade, un seul DELETE ;
+            # le collecteur n'a plus rien à cascader pour les outstanding
+            BlacklistedToken.objects.filter(token_id__in=ids).delete()
+            deleted += OutstandingToken.objects.filter(pk__in=ids).delete()[1].get(OutstandingToken._meta.label, 0)
+        if pause:
+            time.sleep(pause)
+    return deleted
@@ -0,0 +1,15 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .blacklist import blacklist_filter, bump_generation_on_commit
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def add_to_blacklist_filter(sender, instance, created, **kwargs):
+    if not created:
+        return
+    # Ce processus tout de suite (au pire un faux positif si la transaction
+    # est annulée), les autres au commit
+    blacklist_filter.add(instance.token.jti)
+    bump_generation_on_commit()
@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from .purge import purge_expired_tokens as purge
+
+
+@shared_task(ignore_result=True)
+def purge_expired_tokens():
+    """Tâche périodique : purge des refresh tokens expirés (voir tokens.purge)"""
+    return purge()
@@ -1,3 +1,56 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from users.authentication import PrincipalRefreshToken
+from .blacklist import blacklist_filter
+from .purge import purge_expired_tokens
+
+User = get_user_model()
+
+
+class BlacklistFilterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='dev@example.com', username='dev')
+
+    def setUp(self):
+        cache.clear()
+        blacklist_filter.reset()
+        self.client = APIClient()
+
+    def refresh(self, token):
+        return self.client.post('/api/auth/refresh/', {'refresh': token}, format='json')
+
+    def test_valid_token_skips_blacklist_query(self):
+        token = str(PrincipalRefreshToken.for_user(self.user))
+        self.refresh(token)  # Construction du filtre, utilisateur en cache
+        with self.assertNumQueries(0):
+            self.assertEqual(self.refresh(token).status_code, 200)
+
+    def test_logout_rejects_refresh(self):
+        token = str(PrincipalRefreshToken.for_user(self.user))
+        self.assertEqual(self.refresh(token).status_code, 200)
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.post('/api/auth/logout/', {'refresh': token}, format='json').status_code, 205)
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+    def test_purge_expired_tokens(self):
+        now = timezone.now()
+        expired = [
+            OutstandingToken.objects.create(user=self.user, jti=f'expired-{index}', token='', expires_at=now - timedelta(days=1))
+            for index in range(3)
+        ]
+        BlacklistedToken.objects.create(token=expired[0])
+        valid = OutstandingToken.objects.create(user=self.user, jti='valid', token='', expires_at=now + timedelta(days=1))
+        BlacklistedToken.objects.create(token=valid)
 
-# Create your tests here.
+        self.assertEqual(purge_expired_tokens(chunk_size=2), 3)
+        self.assertQuerySetEqual(OutstandingToken.objects.values_list('jti', flat=True), ['valid'])
+        self.assertEqual(BlacklistedToken.objects.get().token, valid)
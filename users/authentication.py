@@ -0,0 +1,178 @@
+"""
+Authentification JWT sans relire `users.User` à chaque requête.
+
+`JWTAuthentication` de SimpleJWT charge la ligne de l'utilisateur pour
+chaque requête authentifiée, uniquement pour vérifier `is_active` et
+lire le rôle (`IsAdmin` / `IsCoach`). Ici, l'utilisateur est reconstruit
+depuis un cache à TTL court (`AUTH_USER_CACHE_TIMEOUT`), invalidé dès
+qu'il est modifié ou supprimé (`users.signals`). Le hash du mot de passe
+n'est jamais mis en cache : le champ est différé et relu si besoin.
+
+Mode optionnel `AUTH_TRUST_TOKEN_CLAIMS` : le rôle et le statut signés
+dans le jeton d'accès suffisent, sans cache ni base. Un changement de
+rôle ou une désactivation ne prend alors effet qu'à l'expiration du
+jeton d'accès (`ACCESS_TOKEN_LIFETIME`) : le rafraîchissement relit
+toujours l'utilisateur. Seuls `id` et PRINCIPAL_CLAIMS sont chargés : au
+premier accès à un autre champ (email, nom...), tous les autres sont
+lus d'un coup depuis le cache (au plus une requête), pas un par un.
+"""
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from tokens.tokens import RefreshToken
+
+USER_CACHE_TIMEOUT = getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 60)
+TRUST_TOKEN_CLAIMS = getattr(settings, 'AUTH_TRUST_TOKEN_CLAIMS', False)
+
+# Claims ajoutés aux jetons : de quoi évaluer is_active / is_admin() / is_coach()
+PRINCIPAL_CLAIMS = ('role', 'is_active', 'is_staff', 'is_superuser')
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def invalidate_user(user_id):
+    """Retire l'utilisateur du cache, maintenant et après le commit"""
+    key = user_cache_key(user_id)
+    cache.delete(key)
+    # Une requête concurrente a pu remettre l'ancienne ligne en cache
+    # avant que la modification ne soit visible
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def cached_fields(model):
+    # Tout sauf le hash du mot de passe
+    return [field.attname for field in model._meta.concrete_fields if field.attname != 'password']
+
+
+def cache_user(user):
+    """Met en cache un utilisateur déjà chargé (ex: à la connexion)"""
+    values = {name: getattr(user, name) for name in cached_fields(type(user))}
+    cache.set(user_cache_key(user.pk), values, USER_CACHE_TIMEOUT)
+
+
+def add_principal_claims(token, user):
+    for name in PRINCIPAL_CLAIMS:
+        token[name] = getattr(user, name)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """`JWTAuthentication` dont l'utilisateur vient du cache (ou des claims)"""
+
+    def get_user(self, validated_token):
+        # Vérification du hash du mot de passe : il faut la ligne complète
+        if api_settings.CHECK_REVOKE_TOKEN:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        user = self.user_from_claims(user_id, validated_token) if TRUST_TOKEN_CLAIMS else None
+        if user is None:
+            user = self.get_cached_user(user_id)
+
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return user
+
+    def get_cached_user(self, user_id):
+        return self.build_user(self.get_cached_values(user_id))
+
+    def get_cached_values(self, user_id):
+        key = user_cache_key(user_id)
+        values = cache.get(key)
+        if values is None:
+            fields = cached_fields(self.user_model)
+            row = (
+                self.user_model.objects
+                .filter(**{api_settings.USER_ID_FIELD: user_id})
+                .values_list(*fields)
+                .first()
+            )
+            if row is None:
+                raise AuthenticationFailed(_('User not found'), code='user_not_found')
+            values = dict(zip(fields, row))
+            cache.set(key, values, USER_CACHE_TIMEOUT)
+        return values
+
+    def user_from_claims(self, user_id, validated_token):
+        claims = [validated_token.get(name) for name in PRINCIPAL_CLAIMS]
+        if None in claims:
+            # Jeton émis avant l'ajout des claims : on passe par le cache
+            return None
+        values = dict(zip(PRINCIPAL_CLAIMS, claims), id=self.user_model._meta.pk.to_python(user_id))
+        user = self.build_user(values)
+        # Champ différé lu plus tard (ex: UserSerializer) : voir load_deferred
+        user.refresh_from_db = partial(self.load_deferred, user)
+        return user
+
+    def load_deferred(self, user, using=None, fields=None, **kwargs):
+        """Charge tous les champs différés depuis le cache au lieu d'un SELECT par champ"""
+        cached = cached_fields(self.user_model)
+        if fields is None or not set(fields) <= set(cached):
+            # Rechargement complet ou hash du mot de passe : la base
+            return type(user).refresh_from_db(user, using=using, fields=fields, **kwargs)
+        values = self.get_cached_values(user.pk)
+        for name in user.get_deferred_fields() & set(cached):
+            user.__dict__[name] = values[name]
+
+    def build_user(self, values):
+        """Comme un `.only()` : les champs absents de `values` sont différés"""
+        names = [field.attname for field in self.user_model._meta.concrete_fields if field.attname in values]
+        return self.user_model.from_db(DEFAULT_DB_ALIAS, names, [values[name] for name in names])
+
+
+class PrincipalRefreshToken(RefreshToken):
+    """Refresh token portant le rôle et le statut (copiés dans l'accès)"""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        add_principal_claims(token, user)
+        return token
+
+    def refresh_principal_claims(self):
+        """Relit l'utilisateur (cache) avant d'émettre un nouvel accès"""
+        authentication = CachedJWTAuthentication()
+        user = authentication.get_cached_user(self[api_settings.USER_ID_CLAIM])
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        add_principal_claims(self, user)
+
+
+class PrincipalTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Rafraîchissement : les claims du nouvel accès reflètent l'utilisateur
+    actuel, pas celui du login (sinon un rôle retiré survivrait jusqu'à
+    l'expiration du refresh token).
+    """
+    token_class = PrincipalRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        refresh.refresh_principal_claims()
+
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+
+            data['refresh'] = str(refresh)
+
+        return data
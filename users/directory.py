@@ -0,0 +1,106 @@
+"""
+Listes d'utilisateurs : filtres, pagination et comptage.
+
+Chaque terme de `?search=` doit être le début de l'email, du prénom ou du
+nom (`istartswith`, servi par les index de préfixe de la migration
+users 0005). Le nombre total est estimé sur une grande table
+(`redteamcnbackend.counting`), sinon mis en cache jusqu'au prochain
+changement de l'annuaire (version incrémentée par `users.signals`).
+
+Forme des réponses : tant que USER_DIRECTORY_LEGACY_SHAPE est actif, les
+clients existants gardent celle d'avant la pagination (voir
+`directory_response`).
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .pagination import UserPagination
+
+User = get_user_model()
+
+DIRECTORY_PARAMS = ('role', 'is_active', 'search')
+DIRECTORY_VERSION_KEY = 'users:directory:version'
+# Termes de recherche pris en compte au plus
+MAX_SEARCH_TERMS = 4
+# Champs dont la modification change les comptages
+DIRECTORY_FIELDS = {'role', 'is_active', 'email', 'first_name', 'last_name'}
+LEGACY_SHAPE = getattr(settings, 'USER_DIRECTORY_LEGACY_SHAPE', True)
+
+
+def filter_directory(request, users):
+    params = request.query_params
+    role = params.get('role')
+    if role:
+        if role not in dict(User.ROLE_CHOICES):
+            raise ValidationError({'role': f"role doit être parmi : {', '.join(dict(User.ROLE_CHOICES))}"})
+        users = users.filter(role=role)
+
+    is_active = params.get('is_active')
+    if is_active:
+        if is_active not in ('true', 'false'):
+            raise ValidationError({'is_active': 'is_active doit valoir true ou false'})
+        users = users.filter(is_active=is_active == 'true')
+
+    for term in params.get('search', '').split()[:MAX_SEARCH_TERMS]:
+        users = users.filter(
+            Q(email__istartswith=term) | Q(first_name__istartswith=term) | Q(last_name__istartswith=term)
+        )
+    return users
+
+
+def directory_paginator(request):
+    paginator = UserPagination()
+    ordering = request.query_params.get('ordering')
+    if ordering:
+        if ordering not in UserPagination.orderings:
+            raise ValidationError({'ordering': f"ordering doit être parmi : {', '.join(UserPagination.orderings)}"})
+        paginator.ordering = UserPagination.orderings[ordering]
+    return paginator
+
+
+def directory_response(paginator, data, legacy_key=None, **extra):
+    """
+    Page de l'annuaire : {**extra, "next", "previous", "results"}.
+
+    Forme historique (LEGACY_SHAPE) : la page sous `legacy_key`, ou une
+    liste nue si `legacy_key` est None, les liens de pagination passant
+    alors dans l'en-tête `Link` (RFC 8288).
+    """
+    page = paginator.get_paginated_data(data)
+    if not LEGACY_SHAPE:
+        return Response({**extra, **page})
+    results = page.pop('results')
+    if legacy_key is not None:
+        return Response({**extra, **page, legacy_key: results})
+    response = Response(results)
+    links = [f'<{url}>; rel="{rel}"' for rel, url in page.items() if url]
+    if links:
+        response['Link'] = ', '.join(links)
+    return response
+
+
+def get_directory_version():
+    version = cache.get(DIRECTORY_VERSION_KEY)
+    if version is None:
+        cache.add(DIRECTORY_VERSION_KEY, 1, None)
+        version = cache.get(DIRECTORY_VERSION_KEY, 1)
+    return version
+
+
+def bump_directory_version():
+    try:
+        cache.incr(DIRECTORY_VERSION_KEY)
+    except ValueError:
+        cache.add(DIRECTORY_VERSION_KEY, 1, None)
+
+
+def directory_count_key(request):
+    values = [request.query_params.get(name, '').strip().lower() for name in DIRECTORY_PARAMS]
+    digest = hashlib.md5('\x1f'.join(values).encode()).hexdigest()
+    return f'users:directory:count:{get_directory_version()}:{digest}'
@@ -0,0 +1,12 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 au nombre d'itérations réglable (PASSWORD_PBKDF2_ITERATIONS,
+    0 = valeur de Django). Même algorithme que le hasher de Django : les
+    hashs existants restent valides, et sont refaits à la connexion
+    suivante si le nombre d'itérations change.
+    """
+    iterations = getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', 0) or hashers.PBKDF2PasswordHasher.iterations
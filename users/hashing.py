@@ -0,0 +1,132 @@
+"""
+Hachage des mots de passe hors du thread de la requête.
+
+PBKDF2 est du calcul pur : lors d'un pic de connexions, il accapare les
+workers au détriment des autres requêtes. Le calcul passe ici par un pool
+borné de PASSWORD_HASHING_WORKERS threads (hashlib libère le GIL pendant
+PBKDF2 : les calculs s'exécutent en parallèle sur plusieurs cœurs). Au-delà
+de PASSWORD_HASHING_MAX_QUEUE calculs en attente, l'appel échoue aussitôt
+(`HashingBusy`, 503) au lieu d'empiler de la latence.
+
+PASSWORD_HASHING_WORKERS=0 : calcul dans le thread appelant.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+HASHING_WORKERS = getattr(settings, 'PASSWORD_HASHING_WORKERS', os.cpu_count() or 1)
+HASHING_MAX_QUEUE = getattr(settings, 'PASSWORD_HASHING_MAX_QUEUE', 64)
+HASHING_TIMEOUT = getattr(settings, 'PASSWORD_HASHING_TIMEOUT', 10)
+
+
+class HashingBusy(Exception):
+    """File d'attente du pool pleine (ou délai dépassé)"""
+
+
+class HashingPool:
+
+    def __init__(self, workers=HASHING_WORKERS, max_queue=HASHING_MAX_QUEUE, timeout=HASHING_TIMEOUT):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.slots = threading.BoundedSemaphore(workers + max_queue) if workers else None
+        self.lock = threading.Lock()
+        self.executor = None
+        self.pid = None
+        self.submitted = self.completed = self.rejected = 0
+        self.wait_total = self.wait_max = self.hash_total = 0.0
+
+    def _executor(self):
+        # Un pool par processus (les workers forkés n'héritent pas des threads)
+        if self.executor is None or self.pid != os.getpid():
+            with self.lock:
+                if self.executor is None or self.pid != os.getpid():
+                    self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password-hashing')
+                    self.pid = os.getpid()
+        return self.executor
+
+    def run(self, function, *args):
+        if not self.workers:
+            self._count_submitted()
+            return self._measure(function, args, time.perf_counter())
+
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            raise HashingBusy('Trop de calculs de mots de passe en attente')
+        try:
+            self._count_submitted()
+            future = self._executor().submit(self._measure, function, args, time.perf_counter())
+        except BaseException:
+            self.slots.release()
+            raise
+        # Place rendue à la fin réelle du calcul (ou à son annulation), pas au
+        # délai dépassé : un calcul déjà lancé continue et occupe son thread
+        future.add_done_callback(lambda _: self.slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise HashingBusy('Délai de calcul du mot de passe dépassé')
+
+    def _count_submitted(self):
+        with self.lock:
+            self.submitted += 1
+
+    def _measure(self, function, args, enqueued):
+        started = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            ended = time.perf_counter()
+            with self.lock:
+                self.completed += 1
+                self.wait_total += started - enqueued
+                self.wait_max = max(self.wait_max, started - enqueued)
+                self.hash_total += ended - started
+
+    def metrics(self):
+        with self.lock:
+            done = self.completed or 1
+            return {
+                'workers': self.workers,
+                'max_queue': self.max_queue,
+                # En attente ou en cours de calcul
+                'in_flight': self.submitted - self.completed,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'avg_wait_ms': round(self.wait_total / done * 1000, 2),
+                'max_wait_ms': round(self.wait_max * 1000, 2),
+                'avg_hash_ms': round(self.hash_total / done * 1000, 2),
+            }
+
+
+pool = HashingPool()
+
+
+def make_password(raw_password):
+    return pool.run(hashers.make_password, raw_password)
+
+
+def _verify(raw_password, encoded):
+    valid, must_update = hashers.verify_password(raw_password, encoded)
+    # Politique changée (algorithme, itérations) : nouveau hash dans la même tâche
+    return valid, hashers.make_password(raw_password) if valid and must_update else None
+
+
+def verify_password(user, raw_password):
+    """
+    Renvoie (valide, nouveau hash ou None). Le nouveau hash, calculé quand
+    PASSWORD_HASHERS a changé, est à enregistrer par l'appelant avec ses
+    autres mises à jour (une seule requête).
+    """
+    return pool.run(_verify, raw_password, user.password)
+
+
+def harden_unknown_user(raw_password):
+    """Email inconnu : même coût qu'un vrai calcul (comme `ModelBackend`)"""
+    make_password(raw_password)
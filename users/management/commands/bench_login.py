@@ -0,0 +1,98 @@
+import os
+import statistics
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from users import hashing, views
+
+User = get_user_model()
+
+PASSWORD = 'Bench-passw0rd'
+
+
+class Command(BaseCommand):
+    help = (
+        "Charge POST /auth/login/ depuis N threads concurrents : hachage dans "
+        "la requête contre pool borné (users.hashing). Affiche le débit par "
+        "cœur, les latences et les métriques du pool. Les utilisateurs créés "
+        "pour l'occasion sont supprimés à la fin."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--requests', type=int, default=400)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--workers', type=int, default=hashing.HASHING_WORKERS, help="Threads du pool")
+        parser.add_argument('--max-queue', type=int, default=hashing.HASHING_MAX_QUEUE)
+
+    def handle(self, *args, **options):
+        # Un seul calcul pour tous les comptes de bench
+        encoded = make_password(PASSWORD)
+        users = User.objects.bulk_create([
+            User(email=f'bench-login-{index}@redteamcn.local', username=f'bench-login-{index}', password=encoded)
+            for index in range(options['users'])
+        ])
+        cores = os.cpu_count() or 1
+        self.stdout.write(f"{cores} cœur(s), {options['concurrency']} client(s) concurrents")
+
+        modes = {
+            'requête': hashing.HashingPool(workers=0),
+            'pool': hashing.HashingPool(workers=options['workers'], max_queue=options['max_queue']),
+        }
+        default_pool = hashing.pool
+        try:
+            for label, pool in modes.items():
+                hashing.pool = pool
+                elapsed, latencies, statuses = self._run([user.email for user in users], options)
+                ok = statuses.count(200)
+                self.stdout.write(
+                    f"{label:>8} : {ok / elapsed:7.1f} req/s ({ok / elapsed / cores:.1f} par cœur), "
+                    f"p50 {statistics.median(latencies) * 1000:.0f} ms, "
+                    f"p95 {statistics.quantiles(latencies, n=20)[-1] * 1000:.0f} ms, "
+                    f"{len(statuses) - ok} refus"
+                )
+                self.stdout.write(f"{'':>10} {pool.metrics()}")
+        finally:
+            hashing.pool = default_pool
+            OutstandingToken.objects.filter(user__in=users).delete()
+            User.objects.filter(email__startswith='bench-login-', email__endswith='@redteamcn.local').delete()
+
+    def _run(self, emails, options):
+        factory = APIRequestFactory()
+        remaining = iter(range(options['requests']))
+        lock = threading.Lock()
+        latencies, statuses = [], []
+
+        def client():
+            try:
+                while True:
+                    with lock:
+                        index = next(remaining, None)
+                    if index is None:
+                        return
+                    request = factory.post(
+                        '/api/auth/login/', {'email': emails[index % len(emails)], 'password': PASSWORD},
+                        format='json',
+                    )
+                    started = time.perf_counter()
+                    response = views.login(request)
+                    with lock:
+                        latencies.append(time.perf_counter() - started)
+                        statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=client) for _ in range(options['concurrency'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - started, latencies, statuses
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:31
+
+from django.db import migrations, models
+
+PREFIX_COLUMNS = ('email', 'first_name', 'last_name')
+
+
+def prefix_index_name(column):
+    return f'users_user_{column}_prefix_idx'
+
+
+def create_prefix_indexes(apps, schema_editor):
+    # `istartswith` : UPPER(col) LIKE UPPER('x%') sous PostgreSQL (indexable
+    # en text_pattern_ops, quelle que soit la collation), LIKE insensible à
+    # la casse sous SQLite (indexable en COLLATE NOCASE)
+    vendor = schema_editor.connection.vendor
+    for column in PREFIX_COLUMNS:
+        if vendor == 'postgresql':
+            schema_editor.execute(
+                f"CREATE INDEX {prefix_index_name(column)} ON users_user (UPPER({column}::text) text_pattern_ops)"
+            )
+        elif vendor == 'sqlite':
+            schema_editor.execute(
+                f"CREATE INDEX {prefix_index_name(column)} ON users_user ({column} COLLATE NOCASE)"
+            )
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor in ('postgresql', 'sqlite'):
+        for column in PREFIX_COLUMNS:
+            schema_editor.execute(f"DROP INDEX IF EXISTS {prefix_index_name(column)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0004_alter_user_managers'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-date_joined', '-id'], name='user_joined_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', '-date_joined', '-id'], name='user_role_joined_idx'),
+        ),
+        migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+    ]
@@ -62,6 +62,13 @@ class User(AbstractUser):
 
     class Meta:
         ordering = ['-date_joined']
+        indexes = [
+            # Annuaire paginé par curseur, éventuellement filtré par rôle.
+            # Recherche par préfixe (email, prénom, nom) : index propres à
+            # chaque base, créés par la migration 0005
+            models.Index(fields=['-date_joined', '-id'], name='user_joined_idx'),
+            models.Index(fields=['role', '-date_joined', '-id'], name='user_role_joined_idx'),
+        ]
         verbose_name = 'User'
         verbose_name_plural = 'Users'
     
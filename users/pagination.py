@@ -0,0 +1,15 @@
+from redteamcnbackend.pagination import KeysetPagination
+
+
+class UserPagination(KeysetPagination):
+    """Annuaire des utilisateurs (derniers inscrits d'abord)"""
+    ordering = ('-date_joined', '-id')
+    max_page_size = 100
+
+    # Valeurs de ?ordering= -> tri keyset (chacun suit un index)
+    orderings = {
+        '-date_joined': ('-date_joined', '-id'),
+        'date_joined': ('date_joined', 'id'),
+        'email': ('email',),
+        '-email': ('-email',),
+    }
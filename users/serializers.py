@@ -4,10 +4,13 @@ from django.utils.http import urlsafe_base64_decode
 from django.utils.encoding import force_str
 from allauth.account.models import EmailConfirmation
 
+from redteamcnbackend.serializers import EagerLoadingMixin
+from . import hashing
+
 User = get_user_model()
 
-class UserSerializer(serializers.ModelSerializer):
-    """Serializer pour afficher les infos d'un user"""
+class UserSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    """Serializer pour afficher les infos d'un user (aucune relation à charger)"""
     role_display = serializers.CharField(source='get_role_display', read_only=True)
     
     class Meta:
@@ -35,14 +38,16 @@ class RegisterSerializer(serializers.ModelSerializer):
         password = validated_data.pop('password')
         
         # Par défaut, nouveau user = Developer
-        user = User.objects.create_user(
-            email=validated_data['email'],
+        user = User(
+            email=User.objects.normalize_email(validated_data['email']),
             username=validated_data['username'],
-            password=password,
             first_name=validated_data.get('first_name', ''),
             last_name=validated_data.get('last_name', ''),
             role='developer'  # Toujours Developer à l'inscription
         )
+        # Hash calculé dans le pool (users.hashing), pas dans le worker
+        user.password = hashing.make_password(password)
+        user.save()
         
         return user
 
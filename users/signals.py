@@ -0,0 +1,30 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_user
+from .directory import DIRECTORY_FIELDS, bump_directory_version
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """
+    Rôle, statut, mot de passe (reset)... : l'utilisateur mis en cache par
+    `CachedJWTAuthentication` est retiré à chaque écriture.
+    """
+    invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def invalidate_directory_counts(sender, instance, created, update_fields=None, **kwargs):
+    # Inutile si seuls des champs hors filtres ont changé (ex: mot de passe)
+    if created or update_fields is None or DIRECTORY_FIELDS.intersection(update_fields):
+        bump_directory_version()
+
+
+@receiver(post_delete, sender=User)
+def invalidate_directory_counts_on_delete(sender, instance, **kwargs):
+    bump_directory_version()
@@ -1,3 +1,228 @@
+import threading
+from itertools import count
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, identify_hasher
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from redteamcnbackend.testing import QueryBudgetAssertionsMixin, QueryPlanAssertionsMixin
+from .authentication import CachedJWTAuthentication, PrincipalRefreshToken, user_cache_key
+from .hashing import HashingBusy, HashingPool
+
+User = get_user_model()
+
+
+class UserQueryBudgetTests(QueryBudgetAssertionsMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(email='admin@example.com', username='admin', role='admin')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.numbers = count()
+
+    def seed(self, n):
+        for _ in range(n):
+            number = next(self.numbers)
+            User.objects.create_user(email=f'user{number}@example.com', username=f'user{number}')
+
+    def fetch(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_list_users(self):
+        self.assertConstantQueries(self.seed, lambda: self.fetch('/api/users/'))
+
+    def test_admin_list_users(self):
+        self.assertConstantQueries(self.seed, lambda: self.fetch('/api/admin/users/'))
+
+
+class CachedJWTAuthenticationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(email='admin@example.com', username='admin', role='admin')
+        cls.user = User.objects.create_user(email='dev@example.com', username='dev')
+
+    def setUp(self):
+        cache.clear()
+        self.authentication = CachedJWTAuthentication()
+        self.token = AccessToken(str(PrincipalRefreshToken.for_user(self.user).access_token))
+
+    def test_second_lookup_hits_cache(self):
+        self.authentication.get_user(self.token)
+        with self.assertNumQueries(0):
+            user = self.authentication.get_user(self.token)
+        self.assertEqual((user.pk, user.email, user.role), (self.user.pk, 'dev@example.com', 'developer'))
+
+    def test_role_change_invalidates_cache(self):
+        self.authentication.get_user(self.token)
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.patch(f'/api/admin/users/{self.user.pk}/', {'role': 'coach'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(self.authentication.get_user(self.token).is_coach())
+
+    def test_trusted_claims_skip_lookup(self):
+        with mock.patch('users.authentication.TRUST_TOKEN_CLAIMS', True), self.assertNumQueries(0):
+            user = self.authentication.get_user(self.token)
+        self.assertEqual((user.pk, user.role, user.is_active), (self.user.pk, 'developer', True))
+
+    def test_trusted_claims_load_other_fields_at_once(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        with mock.patch('users.authentication.TRUST_TOKEN_CLAIMS', True):
+            # Champs hors claims : un seul SELECT, puis le cache
+            with self.assertNumQueries(1):
+                response = client.get('/api/auth/me/')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                (response.data['email'], response.data['username'], response.data['role']),
+                ('dev@example.com', 'dev', 'developer'),
+            )
+            with self.assertNumQueries(0):
+                self.assertEqual(client.get('/api/auth/me/').data, response.data)
+
+            # Le hash n'est pas en cache : relu en base
+            user = self.authentication.get_user(self.token)
+            self.assertEqual(user.password, User.objects.get(pk=self.user.pk).password)
+
+    def test_refresh_reads_current_role(self):
+        refresh = str(PrincipalRefreshToken.for_user(self.user))
+        User.objects.filter(pk=self.user.pk).update(role='coach')
+        cache.clear()
+        response = APIClient().post('/api/auth/refresh/', {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(AccessToken(response.data['access'])['role'], 'coach')
+
+
+class LoginTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='dev@example.com', username='dev')
+        # Hash d'une ancienne politique (moins d'itérations) : refait à la connexion
+        cls.user.password = PBKDF2PasswordHasher().encode('S3cret-pass', 'salt' * 6, iterations=1000)
+        cls.user.save(update_fields=['password'])
+
+    def setUp(self):
+        cache.clear()
+
+    def login(self, password):
+        return APIClient().post('/api/auth/login/', {'email': 'dev@example.com', 'password': password}, format='json')
+
+    def test_login_rehash_shares_last_login_update(self):
+        # SELECT de l'utilisateur, UPDATE (last_login + hash), INSERT du refresh token
+        with self.assertNumQueries(3) as queries:
+            response = self.login('S3cret-pass')
+        self.assertEqual(response.status_code, 200)
+        table = User._meta.db_table
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith(f'UPDATE "{table}"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"last_login"', updates[0])
+        self.assertIn('"password"', updates[0])
+
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+        self.assertFalse(identify_hasher(self.user.password).must_update(self.user.password))
+        self.assertTrue(self.user.check_password('S3cret-pass'))
+        # Utilisateur déjà en cache pour les requêtes suivantes
+        self.assertIsNotNone(cache.get(user_cache_key(self.user.pk)))
+
+    def test_wrong_password(self):
+        self.assertEqual(self.login('wrong-pass').status_code, 401)
+
+    def test_register_hashes_in_pool(self):
+        response = APIClient().post('/api/auth/register/', {
+            'email': 'New@Example.com', 'username': 'new', 'password': 'An0ther-pass',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(User.objects.get(email='New@example.com').check_password('An0ther-pass'))
+
+
+class HashingPoolTests(TestCase):
+    """Pool borné : une place n'est rendue qu'à la fin réelle du calcul."""
+
+    def test_timed_out_hash_keeps_its_slot(self):
+        pool = HashingPool(workers=1, max_queue=0, timeout=0.05)
+        release = threading.Event()
+        with self.assertRaises(HashingBusy):
+            pool.run(release.wait, 5)
+        # Le calcul tourne encore : pas de nouvelle place
+        with self.assertRaises(HashingBusy):
+            pool.run(lambda: 'trop tôt')
+        self.assertEqual(pool.metrics()['rejected'], 1)
+
+        release.set()
+        pool.executor.shutdown(wait=True)
+        pool.executor = None
+        self.assertEqual(pool.run(lambda: 'ok'), 'ok')
+
+
+@mock.patch('users.directory.LEGACY_SHAPE', False)
+class UserDirectoryTests(QueryPlanAssertionsMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(email='admin@example.com', username='admin', role='admin')
+        User.objects.create_user(email='jdupont@example.com', username='jd', first_name='Jean', last_name='Dupont')
+        User.objects.create_user(email='marie@example.com', username='md', first_name='Marie', last_name='Dupuis', role='coach')
+        User.objects.create_user(email='paul@example.com', username='pm', first_name='Paul', last_name='Martin', is_active=False)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def emails(self, response):
+        self.assertEqual(response.status_code, 200)
+        return sorted(user['email'] for user in response.data['results'])
+
+    def test_prefix_search_and_filters(self):
+        response = self.client.get('/api/admin/users/', {'search': 'dup'})
+        self.assertEqual(self.emails(response), ['jdupont@example.com', 'marie@example.com'])
+        self.assertEqual((response.data['count'], response.data['count_is_estimate']), (2, False))
+
+        response = self.client.get('/api/admin/users/', {'search': 'dup', 'role': 'coach'})
+        self.assertEqual(self.emails(response), ['marie@example.com'])
+        response = self.client.get('/api/admin/users/', {'is_active': 'false'})
+        self.assertEqual(self.emails(response), ['paul@example.com'])
+        # Public : comptes actifs seulement
+        self.assertEqual(self.emails(self.client.get('/api/users/', {'search': 'PAUL'})), [])
+        self.assertEqual(self.client.get('/api/admin/users/', {'role': 'owner'}).status_code, 400)
+
+    def test_cursor_pagination(self):
+        response = self.client.get('/api/admin/users/', {'page_size': 3, 'ordering': 'email'})
+        first = [user['email'] for user in response.data['results']]
+        response = self.client.get(response.data['next'])
+        self.assertEqual(first + [user['email'] for user in response.data['results']], [
+            'admin@example.com', 'jdupont@example.com', 'marie@example.com', 'paul@example.com',
+        ])
+        self.assertIsNone(response.data['next'])
+
+    def test_legacy_shape(self):
+        with mock.patch('users.directory.LEGACY_SHAPE', True):
+            admin = self.client.get('/api/admin/users/', {'page_size': 3})
+            first_page = self.client.get('/api/users/', {'page_size': 1, 'ordering': 'email'})
+            single = self.client.get('/api/users/', {'search': 'marie'})
+
+        self.assertEqual(set(admin.data), {'count', 'count_is_estimate', 'next', 'previous', 'users'})
+        self.assertEqual((admin.data['count'], len(admin.data['users'])), (4, 3))
+
+        # Liste nue, liens de pagination dans l'en-tête Link
+        self.assertEqual([user['email'] for user in first_page.data], ['admin@example.com'])
+        self.assertRegex(first_page['Link'], r'^<http://testserver/api/users/\?[^>]*cursor=[^>]+>; rel="next"$')
+        self.assertEqual([user['email'] for user in single.data], ['marie@example.com'])
+        self.assertFalse(single.has_header('Link'))
 
-# Create your tests here.
+    def test_prefix_search_uses_index(self):
+        self.assertUsesIndex(User.objects.filter(email__istartswith='dup').order_by(), 'users_user_email_prefix_idx')
+        self.assertUsesIndex(
+            User.objects.filter(role='coach').order_by('-date_joined', '-id'), 'user_role_joined_idx',
+        )
@@ -12,6 +12,7 @@ urlpatterns = [
     path('admin/users/<int:user_id>/', views.change_user_role, name='admin-change-role'),
     path('admin/users/<int:user_id>/toggle-active/', views.toggle_user_active, name='admin-toggle-active'),
     path('admin/users/<int:user_id>/delete/', views.delete_user, name='admin-delete-user'),
+    path('admin/auth/hashing/', views.hashing_metrics, name='admin-hashing-metrics'),
 
     path('auth/logout/', views.logout, name='logout'),
     path('users/', views.list_users, name='list_users'),
@@ -2,10 +2,8 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
-from django.core.mail import send_mail
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from django.urls import reverse
@@ -19,6 +17,13 @@ from django.utils import timezone
 import logging
 
 from .serializers import RegisterSerializer, LoginSerializer, UserSerializer, ChangeRoleSerializer
+from notifications.outbox import enqueue_email
+from tokens.tokens import RefreshToken
+from redteamcnbackend.counting import estimated_count
+from . import hashing
+from .authentication import PrincipalRefreshToken, cache_user
+from .directory import directory_count_key, directory_paginator, directory_response, filter_directory
+from .hashing import HashingBusy
 from .permissions import IsAdmin 
 
 logger = logging.getLogger(__name__)
@@ -26,6 +31,14 @@ User = get_user_model()
 token_generator = PasswordResetTokenGenerator()
 
 
+def hashing_busy_response():
+    return Response(
+        {'detail': "Trop de connexions en cours, réessayez dans quelques secondes."},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={'Retry-After': '1'},
+    )
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 @csrf_exempt
@@ -33,8 +46,11 @@ def register(request):
     """Inscription d'un nouvel utilisateur (toujours Developer)"""
     serializer = RegisterSerializer(data=request.data)
     if serializer.is_valid():
-        user = serializer.save()
-        refresh = RefreshToken.for_user(user)
+        try:
+            user = serializer.save()
+        except HashingBusy:
+            return hashing_busy_response()
+        refresh = PrincipalRefreshToken.for_user(user)
         
         logger.info(f"New user registered: {user.email}")
         
@@ -60,15 +76,20 @@ def login(request):
     password = serializer.validated_data.get('password')
 
     try:
-        user = User.objects.get(email=email)
-    except User.DoesNotExist:
-        logger.warning(f"Login attempt with non-existent email: {email}")
-        return Response(
-            {'detail': "Email ou mot de passe incorrect."}, 
-            status=status.HTTP_401_UNAUTHORIZED
-        )
+        try:
+            user = User.objects.get(email=email)
+        except User.DoesNotExist:
+            hashing.harden_unknown_user(password)
+            logger.warning(f"Login attempt with non-existent email: {email}")
+            return Response(
+                {'detail': "Email ou mot de passe incorrect."}, 
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        valid, new_hash = hashing.verify_password(user, password)
+    except HashingBusy:
+        return hashing_busy_response()
 
-    if not user.check_password(password):
+    if not valid:
         logger.warning(f"Failed login attempt for: {email}")
         return Response(
             {'detail': "Email ou mot de passe incorrect."}, 
@@ -81,11 +102,19 @@ def login(request):
             status=status.HTTP_403_FORBIDDEN
         )
 
-    # Mise à jour last_login
-    user.last_login = timezone.now()
-    user.save(update_fields=['last_login'])
-
-    refresh = RefreshToken.for_user(user)
+    # Une seule écriture : last_login, et le nouveau hash si PASSWORD_HASHERS a changé.
+    # La lecture reste séparée : le hash doit être vérifié (pool) avant d'écrire,
+    # un UPDATE ... RETURNING ne pourrait pas la remplacer
+    changes = {'last_login': timezone.now()}
+    if new_hash:
+        changes['password'] = new_hash
+    User.objects.filter(pk=user.pk).update(**changes)
+    for name, value in changes.items():
+        setattr(user, name, value)
+    # update() ne passe pas par post_save : cache d'authentification rempli ici
+    cache_user(user)
+
+    refresh = PrincipalRefreshToken.for_user(user)
     
     logger.info(f"User logged in: {user.email}")
     
@@ -140,15 +169,22 @@ def logout(request):
 @permission_classes([IsAdmin])
 def list_all_users(request):
     """
-    Liste TOUS les users (Admin uniquement)
+    Liste TOUS les users (Admin uniquement), paginée par curseur
+
+    Filtres : ?role=, ?is_active=true|false, ?search= (préfixe de l'email,
+    du prénom ou du nom), ?ordering=. `count` est estimé sur une grande
+    table (`count_is_estimate`).
     """
-    users = User.objects.all().order_by('-date_joined')
-    serializer = UserSerializer(users, many=True)
+    users = filter_directory(request, User.objects.all())
+    count, is_estimate = estimated_count(users, cache_key=directory_count_key(request))
+
+    paginator = directory_paginator(request)
+    page = paginator.paginate_queryset(UserSerializer.setup_eager_loading(users), request)
+    serializer = UserSerializer(page, many=True)
     
-    return Response({
-        'count': users.count(),
-        'users': serializer.data
-    })
+    return directory_response(
+        paginator, serializer.data, legacy_key='users', count=count, count_is_estimate=is_estimate,
+    )
 
 
 @api_view(['PATCH'])
@@ -281,6 +317,16 @@ def delete_user(request, user_id):
     }, status=status.HTTP_200_OK)
 
 
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def hashing_metrics(request):
+    """
+    Pool de hachage des mots de passe (processus courant) : file d'attente,
+    temps d'attente et de calcul moyens, refus
+    """
+    return Response(hashing.pool.metrics())
+
+
 # ============================================
 # SECTION PUBLIQUE
 # ============================================
@@ -289,11 +335,14 @@ def delete_user(request, user_id):
 @permission_classes([IsAuthenticated])
 def list_users(request):
     """
-    Liste basique des users actifs (pour tous les users authentifiés)
+    Liste basique des users actifs (pour tous les users authentifiés),
+    paginée par curseur ; mêmes filtres que l'annuaire admin
     """
-    users = User.objects.filter(is_active=True).order_by('-date_joined')
-    serializer = UserSerializer(users, many=True)
-    return Response(serializer.data)
+    users = filter_directory(request, User.objects.filter(is_active=True))
+    paginator = directory_paginator(request)
+    page = paginator.paginate_queryset(UserSerializer.setup_eager_loading(users), request)
+    serializer = UserSerializer(page, many=True)
+    return directory_response(paginator, serializer.data)
 
 # gestion de mot de passe oubliée
 @api_view(['POST'])
@@ -318,13 +367,12 @@ def request_password_reset(request):
         reverse('reset_password', kwargs={'uidb64': uid, 'token': token})
     )
 
-    # Envoyer l'email
-    send_mail(
+    # Envoyer l'email (outbox : envoyé par le worker, hors de la requête)
+    enqueue_email(
         subject='Réinitialisation de votre mot de passe',
         message=f'Cliquez sur ce lien pour réinitialiser votre mot de passe : {reset_url}',
         from_email='no-reply@redteamcn.com',
         recipient_list=[user.email],
-        fail_silently=False,
     )
 
     return Response({'message': 'If the email exists, a reset link has been sent.'}, status=status.HTTP_200_OK)
@@ -348,7 +396,10 @@ def reset_password(request, uidb64, token):
     if not new_password or new_password != confirm_password:
         return Response({'error': 'Passwords do not match or are missing'}, status=status.HTTP_400_BAD_REQUEST)
 
-    user.set_password(new_password)
+    try:
+        user.password = hashing.make_password(new_password)
+    except HashingBusy:
+        return hashing_busy_response()
     user.save()
 
     return Response({'message': 'Password has been reset successfully'}, status=status.HTTP_200_OK)
\ No newline at end of file